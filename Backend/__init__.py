@@ -0,0 +1,4 @@
+"""
+EcoPackAI Backend API (Backend.app) and the modules it shares with the root
+app.py. Both apps import them as Backend.<module>, from the repository root.
+"""
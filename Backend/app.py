@@ -5,25 +5,36 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import hmac
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import pagesizes
-from io import BytesIO
+import threading
+from collections import OrderedDict
+from functools import partial
+import click
+import tempfile
 from flask import send_file
 
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import pandas as pd
-import joblib
 
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.exc import IntegrityError
 import re
-import plotly.express as px
-import plotly.io as pio
-pio.templates.default = "plotly_white"
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from Backend.write_behind import WriteBehindLogger
+from Backend.batch_input import BatchError, ndjson_lines, read_profiles
+from Backend.exports import (
+    EXPORT_FORMATS, ExportError, csv_file, csv_lines, export_format, iter_chunks, iter_rows,
+    parquet_file, recommendation_summary, top_materials, xlsx_file
+)
+from Backend.report_jobs import ReportJobs
+from Backend.migrations import ensure_indexes
+from Backend.model_registry import RegistryError
+from Backend.query_filters import FilterError, day_conditions, filters_key, parse_filters, parse_granularity, time_conditions
+from Backend.rollups import (
+    UPSERT_DIALECTS, archive_rows, coarser_rows, increment_totals, period_filters, rollup_rows, summarize_rows
+)
+from Backend import recommender
+from Backend.recommender import generate_recommendations, rank_materials, resolve_profile, validate_input
 
 
 app = Flask(__name__)
@@ -100,353 +111,601 @@ class Recommendation(db.Model):
             "material_name",
             name="unique_recommendation"
         ),
+        # time-window and per-category dashboard/export filters
+        db.Index("ix_recommendation_created_at", "created_at"),
+        db.Index("ix_recommendation_category_created_at", "product_category", "created_at"),
     )
 
-with app.app_context():
-    db.create_all()
 
+# raw rows past the retention window, moved here by `flask archive-recommendations`
+class RecommendationArchive(db.Model):
+    __tablename__ = "recommendation_archive"
 
-# Load Dataset & Models
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    product_category = db.Column(db.String(50))
+    fragility = db.Column(db.String(20))
+    shipping_type = db.Column(db.String(20))
+    sustainability_priority = db.Column(db.String(20))
+    material_name = db.Column(db.String(100))
 
-# Models
-cost_model = joblib.load(os.path.join(BASE_DIR, "models", "cost_model.pkl"))
-co2_model = joblib.load(os.path.join(BASE_DIR, "models", "co2_model.pkl"))
+    predicted_cost = db.Column(db.Float)
+    predicted_co2 = db.Column(db.Float)
+    suitability_score = db.Column(db.Float)
 
-# Dataset (now inside data/ folder)
-materials_df = pd.read_csv(os.path.join(BASE_DIR, "data", "Ecopack_dataset.csv"))
+    created_at = db.Column(db.DateTime, index=True)
 
 
-# Baseline Configuration
+# Dashboard Aggregates
 
-BASELINE_MODE = "industry"   # options: "industry"(Dataset Average) or "category"
+# Running totals maintained by save_rows, so the dashboard reads
+# O(#periods x #categories + #materials) rows instead of the full history.
+# Day, week and month rollups of the same totals (see rollups.py).
+class DailyStats(db.Model):
+    __tablename__ = "recommendation_daily_stats"
 
-FEATURE_COLS = [
-    "strength",
-    "weight_capacity",
-    "recyclability_percentage",
-    "biodegradability_score"
-]
+    day = db.Column(db.Date, primary_key=True)
+    product_category = db.Column(db.String(50), primary_key=True)
 
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)
 
-# Industry Baselines (Global Average)
 
-INDUSTRY_BASELINE_CO2 = materials_df["co2_score"].mean()
+class WeeklyStats(db.Model):
+    __tablename__ = "recommendation_weekly_stats"
 
-# Since original dataset may not contain cost column,
-# we will define baseline cost as average predicted cost from dataset features
-industry_features = materials_df[FEATURE_COLS]
-INDUSTRY_BASELINE_COST = cost_model.predict(industry_features).mean()
+    week = db.Column(db.Date, primary_key=True)
+    product_category = db.Column(db.String(50), primary_key=True)
 
-# Thresholds
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)
 
-GLOBAL_MAX_STRENGTH = materials_df["strength"].max()
-STRENGTH_Q75 = materials_df["strength"].quantile(0.75)
-STRENGTH_Q50 = materials_df["strength"].quantile(0.50)
-WEIGHT_MEDIAN = materials_df["weight_capacity"].median()
-BIO_Q70 = materials_df["biodegradability_score"].quantile(0.70)
-CO2_Q75 = materials_df["co2_score"].quantile(0.75)
 
-# Validation
+class MonthlyStats(db.Model):
+    __tablename__ = "recommendation_monthly_stats"
 
-def validate_input(data):
-    required = [
-        "product_category",
-        "fragility",
-        "shipping_type",
-        "sustainability_priority"
-    ]
+    month = db.Column(db.Date, primary_key=True)
+    product_category = db.Column(db.String(50), primary_key=True)
 
-    for field in required:
-        if field not in data:
-            return False, f"Missing field: {field}"
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)
 
-    return True, None
 
-# Filtering
+# granularity -> rollup table, whose period column has the granularity's name
+ROLLUP_MODELS = {
+    "day": DailyStats,
+    "week": WeeklyStats,
+    "month": MonthlyStats
+}
 
-def apply_filters(df, product_category, fragility):
 
-    filtered = df.copy()
-    category_applied = True
+class MaterialStats(db.Model):
+    __tablename__ = "recommendation_material_stats"
 
-    if product_category == "electronics":
-        filtered = filtered[
-            (filtered["strength"] >= STRENGTH_Q50) &
-            (filtered["co2_score"] <= CO2_Q75)
-        ]
+    material_name = db.Column(db.String(100), primary_key=True)
 
-    elif product_category == "food":
-        filtered = filtered[
-            filtered["biodegradability_score"] >= BIO_Q70
-        ]
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)
 
-    elif product_category == "cosmetics":
-        filtered = filtered[
-            filtered["weight_capacity"] <= WEIGHT_MEDIAN
-        ]
-    else:
-        # Unknown category → adaptive fallback logic
-        filtered = filtered[
-            filtered["strength"] >= STRENGTH_Q50
-        ]
 
+with app.app_context():
+    db.create_all()
+    # indexes declared after the table was first created
+    ensure_indexes(db.engine, Recommendation.__table__)
 
-    if fragility == "high":
-        filtered = filtered[filtered["strength"] >= STRENGTH_Q75]
-    elif fragility == "medium":
-        filtered = filtered[filtered["strength"] >= STRENGTH_Q50]
+    # gunicorn.conf.py preloads the app in the master: forked workers drop
+    # the master's pooled connections and open their own
+    os.register_at_fork(after_in_child=partial(db.engine.dispose, close=False))
 
-    return filtered, category_applied
 
-# ML Prediction
+# Baseline Configuration
 
-def run_predictions(df):
+BASELINE_MODE = "industry"   # options: "industry"(Dataset Average) or "category"
 
-    df = df.copy()
 
-    features = df[[
-        "strength",
-        "weight_capacity",
-        "recyclability_percentage",
-        "biodegradability_score"
-    ]]
+# Database Save Logic
 
-    df["predicted_cost"] = cost_model.predict(features)
-    df["predicted_co2"] = co2_model.predict(features)
+# adds inserted rows to every rollup and the per-material totals
+def update_dashboard_stats(rows):
 
-    return df
+    for granularity, model in ROLLUP_MODELS.items():
+        increment_totals(db.session, model, rollup_rows(rows, granularity))
 
-# Weight Logic
+    increment_totals(db.session, MaterialStats, summarize_rows(rows, ["material_name"]))
 
-def get_weights(product_category, sustainability_priority, shipping_type):
 
-    eco_weight = 0.4
-    cost_weight = 0.3
-    strength_weight = 0.3
+# Identifies the recommendation data behind the cached dashboards and reports
+# without a shared row that every insert would have to lock: inserts raise the
+# max id and the rollup totals, archiving raises the min id and the archive's
+# max id, and a rebuild rewrites the totals. All reads are index lookups or
+# sums over the small monthly rollup table.
+def get_data_version():
 
-    if sustainability_priority == "high":
-        eco_weight += 0.2
-        cost_weight -= 0.1
-    elif sustainability_priority == "low":
-        cost_weight += 0.1
+    ids = db.session.query(
+        db.select(db.func.min(Recommendation.id)).scalar_subquery(),
+        db.select(db.func.max(Recommendation.id)).scalar_subquery(),
+        db.select(db.func.max(RecommendationArchive.id)).scalar_subquery()
+    ).one()
 
-    if shipping_type == "international":
-        eco_weight += 0.1
+    totals = db.session.query(
+        db.func.sum(MonthlyStats.count),
+        db.func.sum(MonthlyStats.total_cost),
+        db.func.sum(MonthlyStats.total_co2)
+    ).one()
 
-    if product_category == "electronics":
-        strength_weight += 0.2
-        eco_weight -= 0.1
-    elif product_category == "cosmetics":
-        cost_weight += 0.1
-    elif product_category == "food":
-        eco_weight += 0.2
-        strength_weight -= 0.1
+    return tuple(ids) + tuple(totals)
 
-    total = eco_weight + cost_weight + strength_weight
 
-    return eco_weight/total, cost_weight/total, strength_weight/total
+UNIQUE_RECOMMENDATION_FIELDS = [
+    "product_category",
+    "fragility",
+    "shipping_type",
+    "sustainability_priority",
+    "material_name"
+]
 
-# Scoring
 
-def calculate_score(df, eco_w, cost_w, strength_w):
+def build_recommendation_rows(product_category, fragility, shipping_type, sustainability_priority, results, created_at=None):
 
-    df = df.copy()
+    created_at = created_at or datetime.utcnow()
 
-    df["eco_score"] = 1 / (df["predicted_co2"] + 1)
-    df["cost_efficiency"] = 1 / (df["predicted_cost"] + 1)
-    df["strength_norm"] = df["strength"] / GLOBAL_MAX_STRENGTH
+    return [{
+        "product_category": product_category,
+        "fragility": fragility,
+        "shipping_type": shipping_type,
+        "sustainability_priority": sustainability_priority,
+        "material_name": item["material_name"],
+        "predicted_cost": float(item["predicted_cost"]),
+        "predicted_co2": float(item["predicted_co2"]),
+        "suitability_score": float(item["suitability_score"]),
+        "created_at": created_at
+    } for item in results]
 
-    df["suitability_score"] = (
-        eco_w * df["eco_score"] +
-        cost_w * df["cost_efficiency"] +
-        strength_w * df["strength_norm"]
-    )
 
-    return df
+# saving reccomendation result to database, if same materials present in dataset for same i/p combination, then it ignores duplicate & contiues without crashing
+def save_to_database(product_category, fragility, shipping_type, sustainability_priority, results):
 
+    save_rows(build_recommendation_rows(
+        product_category,
+        fragility,
+        shipping_type,
+        sustainability_priority,
+        results
+    ))
 
 
-def generate_recommendations(product_category, fragility, shipping_type, sustainability_priority):
+# keeps each INSERT under the bind parameter limits of SQLite and PostgreSQL
+SAVE_ROWS_CHUNK_SIZE = 1000
 
-    filtered_df, _ = apply_filters(materials_df, product_category, fragility)
 
-    if filtered_df.empty:
-        return []
+# All rows go out in bulk INSERT ... ON CONFLICT DO NOTHING statements and commit together
+# with the aggregate updates for the rows that were actually inserted.
+def save_rows(rows):
 
-    predicted_df = run_predictions(filtered_df)
+    # duplicates inside one batch would be skipped by the database but counted twice here
+    unique_rows = {}
+    for row in rows:
+        unique_rows.setdefault(tuple(row[field] for field in UNIQUE_RECOMMENDATION_FIELDS), row)
 
-    eco_w, cost_w, strength_w = get_weights(
-        product_category,
-        sustainability_priority,
-        shipping_type
-    )
+    if not unique_rows:
+        return
 
-    scored_df = calculate_score(predicted_df, eco_w, cost_w, strength_w)
+    insert = UPSERT_DIALECTS.get(db.engine.dialect.name)
 
-    ranked_df = scored_df.sort_values("suitability_score", ascending=False)
+    if insert is None:
+        save_rows_individually(list(unique_rows.values()))
+        return
 
-    top_results = ranked_df[[
-        "material_name",
-        "predicted_cost",
-        "predicted_co2",
-        "suitability_score"
-    ]].head(3)
+    pending_rows = list(unique_rows.values())
+    inserted_rows = []
 
-    return top_results.to_dict(orient="records")
+    try:
+        for start in range(0, len(pending_rows), SAVE_ROWS_CHUNK_SIZE):
+            stmt = (
+                insert(Recommendation)
+                .values(pending_rows[start:start + SAVE_ROWS_CHUNK_SIZE])
+                .on_conflict_do_nothing()
+                .returning(*(getattr(Recommendation, field) for field in UNIQUE_RECOMMENDATION_FIELDS))
+            )
+            inserted_rows += [unique_rows[tuple(key)] for key in db.session.execute(stmt)]
 
+        if inserted_rows:
+            update_dashboard_stats(inserted_rows)
 
-# Database Save Logic
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
 
-# saving reccomendation result to database, if same materials present in dataset for same i/p combination, then it ignores duplicate & contiues without crashing
-def save_to_database(product_category, fragility, shipping_type, sustainability_priority, results):
 
-    for item in results:
-        record = Recommendation(
-            product_category=product_category,
-            fragility=fragility,
-            shipping_type=shipping_type,
-            sustainability_priority=sustainability_priority,
-            material_name=item["material_name"],
-            predicted_cost=item["predicted_cost"],
-            predicted_co2=item["predicted_co2"],
-            suitability_score=item["suitability_score"]
-        )
+# databases without ON CONFLICT support: one transaction per row
+def save_rows_individually(rows):
 
+    for row in rows:
         try:
-            db.session.add(record)
+            db.session.add(Recommendation(**row))
+            update_dashboard_stats([row])
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
             # Duplicate detected → ignore silently
-            
 
 
-def get_category_baseline(product_category):
+# Write-behind: with ASYNC_DB_WRITES=1 requests only queue their rows and a
+# background flusher inserts them in batches (see write_behind.py).
+ASYNC_DB_WRITES = os.environ.get("ASYNC_DB_WRITES") == "1"
 
-    filtered_df, _ = apply_filters(materials_df, product_category, fragility="medium")
 
-    if filtered_df.empty:
-        return INDUSTRY_BASELINE_COST, INDUSTRY_BASELINE_CO2
+def write_queued_rows(rows):
 
-    features = filtered_df[FEATURE_COLS]
+    for row in rows:
+        # rows replayed from the spill file carry created_at as a string
+        if isinstance(row["created_at"], str):
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
 
-    baseline_cost = cost_model.predict(features).mean()
-    baseline_co2 = co2_model.predict(features).mean()
+    with app.app_context():
+        save_rows(rows)
 
-    return baseline_cost, baseline_co2
 
+recommendation_writer = WriteBehindLogger(
+    write_queued_rows,
+    max_queue=int(os.environ.get("WRITE_BEHIND_QUEUE_SIZE", 10000)),
+    batch_size=int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", 500)),
+    flush_interval=float(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", 1.0)),
+    spill_path=os.environ.get("WRITE_BEHIND_SPILL_PATH"),
+    dead_letter_path=os.environ.get("WRITE_BEHIND_DEAD_LETTER_PATH"),
+    max_attempts=int(os.environ.get("WRITE_BEHIND_MAX_ATTEMPTS", 10))
+)
 
-def compute_dashboard_data():
 
-    records = Recommendation.query.all()
+def record_rows(rows):
 
-    if not records:
-        return None
+    if ASYNC_DB_WRITES:
+        recommendation_writer.submit([{**row, "created_at": row["created_at"].isoformat()} for row in rows])
+    else:
+        save_rows(rows)
+
+
+def record_recommendations(product_category, fragility, shipping_type, sustainability_priority, results):
+
+    record_rows(build_recommendation_rows(
+        product_category,
+        fragility,
+        shipping_type,
+        sustainability_priority,
+        results
+    ))
+
+
+# recomputes the aggregate tables from the full recommendation history,
+# archived rows included
+def rebuild_dashboard_stats():
+
+    columns = ("material_name", "product_category", "predicted_cost", "predicted_co2", "created_at")
+    history = db.union_all(
+        db.select(*(getattr(Recommendation, name) for name in columns)),
+        db.select(*(getattr(RecommendationArchive, name) for name in columns))
+    ).subquery()
+
+    day = db.func.date(history.c.created_at)
+    category = db.func.coalesce(history.c.product_category, "")
+    totals = (
+        db.func.count(),
+        db.func.coalesce(db.func.sum(history.c.predicted_cost), 0.0),
+        db.func.coalesce(db.func.sum(history.c.predicted_co2), 0.0)
+    )
+
+    daily_rows = [
+        {
+            "day": date.fromisoformat(str(row_day)[:10]),
+            "product_category": row_category,
+            "count": count,
+            "total_cost": total_cost,
+            "total_co2": total_co2
+        }
+        for row_day, row_category, count, total_cost, total_co2
+        in db.session.query(day, category, *totals).group_by(day, category).all()
+        if row_day is not None
+    ]
+    material_rows = (
+        db.session.query(history.c.material_name, *totals)
+        .group_by(history.c.material_name)
+        .all()
+    )
+
+    try:
+        for model in ROLLUP_MODELS.values():
+            model.query.delete()
+        MaterialStats.query.delete()
+
+        db.session.add_all(DailyStats(**row) for row in daily_rows)
+        for granularity in ("week", "month"):
+            model = ROLLUP_MODELS[granularity]
+            db.session.add_all(model(**row) for row in coarser_rows(daily_rows, granularity))
+
+        db.session.add_all(
+            MaterialStats(material_name=name, count=count, total_cost=total_cost, total_co2=total_co2)
+            for name, count, total_cost, total_co2 in material_rows
+            if name is not None
+        )
+
+        db.session.commit()
+    except IntegrityError:
+        # another worker rebuilt the tables at the same time
+        db.session.rollback()
+
+
+@app.cli.command("rebuild-stats")
+def rebuild_stats_command():
+    rebuild_dashboard_stats()
+
+
+# Retention: raw rows older than RECOMMENDATION_RETENTION_DAYS move to
+# recommendation_archive. The rollup and material tables already count them,
+# so the dashboard trends do not change; exports and filtered material
+# totals only cover the rows still in the recommendation table.
+RECOMMENDATION_RETENTION_DAYS = int(os.environ.get("RECOMMENDATION_RETENTION_DAYS", 365))
+
+
+def archive_old_recommendations(days=RECOMMENDATION_RETENTION_DAYS):
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    return archive_rows(db.session, Recommendation, RecommendationArchive, cutoff)
+
+
+@app.cli.command("archive-recommendations")
+@click.option("--days", type=int, default=RECOMMENDATION_RETENTION_DAYS, show_default=True,
+              help="archive raw rows older than this many days")
+def archive_recommendations_command(days):
+    archived = archive_old_recommendations(days)
+    click.echo(f"Archived {archived} recommendations older than {days} days")
+
+
+# existing databases: fill the aggregate tables once from history
+with app.app_context():
+    # databases from before the week/month rollups have day totals but no week totals
+    if WeeklyStats.query.first() is None and Recommendation.query.first() is not None:
+        rebuild_dashboard_stats()
 
-    df = pd.DataFrame([{
-        "product_category": r.product_category,
-        "material_name": r.material_name,
-        "predicted_cost": r.predicted_cost,
-        "predicted_co2": r.predicted_co2,
-        "created_at": r.created_at
-    } for r in records])
 
-    df["created_at"] = pd.to_datetime(df["created_at"])
+# Chart Fragment Cache
 
+# Rendered Plotly HTML per chart, together with the data it was drawn from.
+# A chart is only re-rendered when its own data changed.
+chart_cache = {}
 
+# recent dashboard results, keyed on the data version and filters they were
+# built for; the least recently used goes first beyond DASHBOARD_CACHE_SIZE
+DASHBOARD_CACHE_SIZE = int(os.environ.get("DASHBOARD_CACHE_SIZE", 32))
+dashboard_cache = OrderedDict()
+dashboard_cache_lock = threading.Lock()
+
+
+# Plotly is only imported when the first chart is drawn
+def plotly_express():
+
+    import plotly.express as px
+    import plotly.io as pio
+
+    pio.templates.default = "plotly_white"
+
+    return px
+
+
+def render_chart(name, data, make_figure):
+
+    cached = chart_cache.get(name)
+
+    if cached is not None and cached["data"].equals(data):
+        return cached["html"]
+
+    html = make_figure(data).to_html(full_html=False)
+    chart_cache[name] = {"data": data, "html": html}
+
+    return html
+
+
+def compute_dashboard_data(filters=None, granularity="day"):
+
+    key = (get_data_version(), recommender.catalog.signature, BASELINE_MODE, filters_key(filters), granularity)
+
+    with dashboard_cache_lock:
+        metrics = dashboard_cache.get(key)
+        if metrics is not None:
+            dashboard_cache.move_to_end(key)
+            return metrics
+
+    metrics = build_dashboard_data(filters, granularity)
+
+    with dashboard_cache_lock:
+        dashboard_cache[key] = metrics
+        dashboard_cache.move_to_end(key)
+        while len(dashboard_cache) > DASHBOARD_CACHE_SIZE:
+            dashboard_cache.popitem(last=False)
+
+    return metrics
+
+
+# Adds baseline columns and summed CO2 reduction / cost savings to a frame of
+# per-category totals (product_category, count, total_cost, total_co2).
+def add_savings_totals(totals_df):
+
+    catalog = recommender.catalog
 
     # Baseline Selection
 
     if BASELINE_MODE == "industry":
 
-        df["baseline_cost"] = INDUSTRY_BASELINE_COST
-        df["baseline_co2"] = INDUSTRY_BASELINE_CO2
+        totals_df["baseline_cost"] = catalog.industry_baseline_cost
+        totals_df["baseline_co2"] = catalog.industry_baseline_co2
 
     elif BASELINE_MODE == "category":
 
-        baseline_cost_list = []
-        baseline_co2_list = []
-
-        for category in df["product_category"]:
-            cost_b, co2_b = get_category_baseline(category)
-            baseline_cost_list.append(cost_b)
-            baseline_co2_list.append(co2_b)
+        # precomputed per category rule with the catalog (see recommender.py)
+        baselines = recommender.lookup_category_baselines(catalog, totals_df["product_category"])
 
-        df["baseline_cost"] = baseline_cost_list
-        df["baseline_co2"] = baseline_co2_list
+        totals_df["baseline_cost"] = baselines["baseline_cost"]
+        totals_df["baseline_co2"] = baselines["baseline_co2"]
 
-    
-    # Compute Metrics
-    
+    # per-recommendation metrics summed over a group of `count` rows:
+    # sum((baseline - x) / baseline) = count - sum(x) / baseline
 
-    df["co2_reduction_pct"] = (
-        (df["baseline_co2"] - df["predicted_co2"]) / df["baseline_co2"]
+    totals_df["co2_reduction_total"] = (
+        totals_df["count"] - totals_df["total_co2"] / totals_df["baseline_co2"]
     ) * 100
 
-    df["cost_savings"] = df["baseline_cost"] - df["predicted_cost"]
+    totals_df["cost_savings_total"] = totals_df["count"] * totals_df["baseline_cost"] - totals_df["total_cost"]
+
+
+def average_savings(totals_df):
+
+    total_count = totals_df["count"].sum()
+
+    avg_co2_reduction = round(totals_df["co2_reduction_total"].sum() / total_count, 2)
+    avg_cost_savings = round(totals_df["cost_savings_total"].sum() / total_count, 2)
+
+    return avg_co2_reduction, avg_cost_savings
+
+
+# (material_name, count, total_cost, total_co2) rows. MaterialStats has no
+# time or category dimension, so a filtered dashboard groups the matching
+# recommendations instead (an index range scan on created_at).
+def material_totals(filters=None):
+
+    if filters_key(filters) == filters_key(None):
+        return [(s.material_name, s.count, s.total_cost, s.total_co2) for s in MaterialStats.query.all()]
+
+    rows = (
+        db.session.query(
+            Recommendation.material_name,
+            db.func.count(Recommendation.id),
+            db.func.coalesce(db.func.sum(Recommendation.predicted_cost), 0.0),
+            db.func.coalesce(db.func.sum(Recommendation.predicted_co2), 0.0)
+        )
+        .filter(Recommendation.material_name.isnot(None))
+        .filter(*time_conditions(Recommendation.created_at, Recommendation.product_category, filters))
+        .group_by(Recommendation.material_name)
+        .order_by(Recommendation.material_name)
+        .all()
+    )
+
+    return [tuple(row) for row in rows]
+
 
-    avg_co2_reduction = round(df["co2_reduction_pct"].mean(), 2)
-    avg_cost_savings = round(df["cost_savings"].mean(), 2)
+# Trends are drawn per day, week or month from the matching rollup table; with
+# week/month the date filters are widened to whole periods.
+def build_dashboard_data(filters=None, granularity="day"):
+
+    rollup = ROLLUP_MODELS[granularity]
+    period = getattr(rollup, granularity)
+
+    period_stats = db.session.query(
+        period, rollup.product_category, rollup.count, rollup.total_cost, rollup.total_co2
+    ).filter(
+        *day_conditions(period, rollup.product_category, period_filters(filters, granularity))
+    ).all()
+
+    daily_df = pd.DataFrame(
+        [tuple(row) for row in period_stats],
+        columns=["date", "product_category", "count", "total_cost", "total_co2"]
+    )
+
+    if daily_df.empty:
+        return None
+
+    material_df = pd.DataFrame(
+        material_totals(filters),
+        columns=["material_name", "count", "total_cost", "total_co2"]
+    )
+
+
+    # Baseline Selection & Metrics
+
+    add_savings_totals(daily_df)
+
+    avg_co2_reduction, avg_cost_savings = average_savings(daily_df)
 
     
     # Trend Data (Grouped by Date)
 
-    trend_df = df.groupby(df["created_at"].dt.date).agg({
-        "co2_reduction_pct": "mean",
-        "cost_savings": "mean"
+    trend_df = daily_df.groupby("date").agg({
+        "count": "sum",
+        "co2_reduction_total": "sum",
+        "cost_savings_total": "sum"
     }).reset_index()
 
-    trend_df.columns = ["date", "co2_reduction_pct", "cost_savings"]
+    trend_df["co2_reduction_pct"] = trend_df["co2_reduction_total"] / trend_df["count"]
+    trend_df["cost_savings"] = trend_df["cost_savings_total"] / trend_df["count"]
 
-    co2_trend_fig = px.line(
-        trend_df,
-        x="date",
-        y="co2_reduction_pct",
-        title="CO₂ Reduction Trend",
-        markers=True
+    trend_df = trend_df[["date", "co2_reduction_pct", "cost_savings"]]
+
+    co2_trend_chart = render_chart(
+        "co2_trend_chart",
+        trend_df[["date", "co2_reduction_pct"]],
+        lambda data: plotly_express().line(
+            data,
+            x="date",
+            y="co2_reduction_pct",
+            title="CO₂ Reduction Trend",
+            markers=True
+        )
     )
 
-    cost_trend_fig = px.line(
-        trend_df,
-        x="date",
-        y="cost_savings",
-        title="Cost Savings Trend",
-        markers=True
+    cost_trend_chart = render_chart(
+        "cost_trend_chart",
+        trend_df[["date", "cost_savings"]],
+        lambda data: plotly_express().line(
+            data,
+            x="date",
+            y="cost_savings",
+            title="Cost Savings Trend",
+            markers=True
+        )
     )
 
     
     # Material Usage
     material_usage = (
-        df["material_name"]
-        .value_counts()
-        .reset_index()
+        material_df[["material_name", "count"]]
+        .sort_values("count", ascending=False, kind="stable")
+        .reset_index(drop=True)
     )
 
-    material_usage.columns = ["material_name", "count"]
-
-    bar_fig = px.bar(
+    bar_chart = render_chart(
+        "bar_chart",
         material_usage,
-        x="material_name",
-        y="count",
-        title="Material Usage Trends"
+        lambda data: plotly_express().bar(
+            data,
+            x="material_name",
+            y="count",
+            title="Material Usage Trends"
+        )
     )
 
-    pie_fig = px.pie(
+    pie_chart = render_chart(
+        "pie_chart",
         material_usage,
-        names="material_name",
-        values="count",
-        title="Material Usage Distribution"
+        lambda data: plotly_express().pie(
+            data,
+            names="material_name",
+            values="count",
+            title="Material Usage Distribution"
+        )
     )
 
     
     # Ranking Chart (Horizontal Bar)
 
-    ranking_df = df.groupby("material_name").agg({
-        "predicted_cost": "mean",
-        "predicted_co2": "mean"
-    }).reset_index()
+    ranking_df = pd.DataFrame({
+        "material_name": material_df["material_name"],
+        "predicted_cost": material_df["total_cost"] / material_df["count"],
+        "predicted_co2": material_df["total_co2"] / material_df["count"]
+    })
 
     ranking_df["ranking_score"] = (
         (ranking_df["predicted_cost"].max() - ranking_df["predicted_cost"]) +
@@ -455,25 +714,26 @@ def compute_dashboard_data():
 
     ranking_df = ranking_df.sort_values("ranking_score", ascending=False).head(5)
 
-    ranking_fig = px.bar(
-        ranking_df,
-        x="ranking_score",
-        y="material_name",
-        orientation="h",
-        title="Top Material Rankings"
+    ranking_chart = render_chart(
+        "ranking_chart",
+        ranking_df.reset_index(drop=True),
+        lambda data: plotly_express().bar(
+            data,
+            x="ranking_score",
+            y="material_name",
+            orientation="h",
+            title="Top Material Rankings"
+        )
     )
 
-    
-    # Convert Charts to HTML
-
     return {
         "avg_co2_reduction": avg_co2_reduction,
         "avg_cost_savings": avg_cost_savings,
-        "bar_chart": bar_fig.to_html(full_html=False),
-        "pie_chart": pie_fig.to_html(full_html=False),
-        "co2_trend_chart": co2_trend_fig.to_html(full_html=False),
-        "cost_trend_chart": cost_trend_fig.to_html(full_html=False),
-        "ranking_chart": ranking_fig.to_html(full_html=False)
+        "bar_chart": bar_chart,
+        "pie_chart": pie_chart,
+        "co2_trend_chart": co2_trend_chart,
+        "cost_trend_chart": cost_trend_chart,
+        "ranking_chart": ranking_chart
     }
 
 
@@ -566,7 +826,7 @@ def recommend():
     )
 
     if results:
-        save_to_database(
+        record_recommendations(
             product_category,
             fragility,
             shipping_type,
@@ -586,13 +846,17 @@ def recommend():
 
 # REST API Endpoint
 
+def is_authorized():
+
+    key = request.headers.get("x-api-key")
+
+    return hmac.compare_digest(key or "", API_KEY or "")
+
+
 @app.route("/api/recommend", methods=["POST"])
 def api_recommend():
 
-    key = request.headers.get("x-api-key")
-    
-    #import hmac
-    if not hmac.compare_digest(key or "", API_KEY or ""):
+    if not is_authorized():
         return jsonify({"status": "error", "message": "Unauthorized"}), 401
 
 
@@ -602,49 +866,173 @@ def api_recommend():
     if not valid:
         return jsonify({"status": "error", "message": error}), 400
 
-    product_category = data["product_category"]
+    profile = resolve_profile(data)
 
-    if product_category.lower() == "other" and "other_category" in data:
-        product_category = data["other_category"].strip().title()
-
-    results = generate_recommendations(
-        product_category,
-        data["fragility"],
-        data["shipping_type"],
-        data["sustainability_priority"]
-    )
+    results = generate_recommendations(*profile)
+    model_version = recommender.catalog.model_version
 
     if not results:
-        return jsonify({"status": "success", "message": "No exact match found", "data": []})
+        return jsonify({"status": "success", "message": "No exact match found", "data": [], "model_version": model_version})
 
         # Save for API also
-    save_to_database(
-        product_category,  # use overridden value
-        data["fragility"],
-        data["shipping_type"],
-        data["sustainability_priority"],
-        results
-    )
+    record_recommendations(*profile, results)  # uses overridden category
 
 
     return jsonify({
         "status": "success",
         "message": "Recommendations generated",
-        "data": results
+        "data": results,
+        "model_version": model_version
     })
 
 
+BATCH_MAX_PROFILES = int(os.environ.get("BATCH_MAX_PROFILES", 50000))
+
+
+# Accepts a JSON array or NDJSON of /api/recommend profiles. Identical profiles are
+# scored once, all rows are saved together, and one NDJSON line per profile is
+# streamed back in input order.
+@app.route("/api/recommend/batch", methods=["POST"])
+def api_recommend_batch():
+
+    if not is_authorized():
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+
+    try:
+        profiles = read_profiles(request, BATCH_MAX_PROFILES)
+    except BatchError as e:
+        return jsonify({"status": "error", "message": str(e)}), e.status
+
+    groups = {}
+    outcomes = []
+
+    for data in profiles:
+
+        valid, error = validate_input(data)
+        if not valid:
+            outcomes.append(error)
+            continue
+
+        profile = resolve_profile(data)
+
+        if profile not in groups:
+            groups[profile] = generate_recommendations(*profile)
+
+        outcomes.append(profile)
+
+    model_version = recommender.catalog.model_version
+    created_at = datetime.utcnow()
+    rows = []
+
+    for profile, results in groups.items():
+        rows += build_recommendation_rows(*profile, results, created_at=created_at)
+
+    record_rows(rows)
+
+    def results():
+
+        for index, outcome in enumerate(outcomes):
+
+            if isinstance(outcome, str):
+                yield {"index": index, "status": "error", "message": outcome}
+            elif groups[outcome]:
+                yield {
+                    "index": index,
+                    "status": "success",
+                    "message": "Recommendations generated",
+                    "data": groups[outcome],
+                    "model_version": model_version
+                }
+            else:
+                yield {"index": index, "status": "success", "message": "No exact match found", "data": [], "model_version": model_version}
+
+    return Response(ndjson_lines(results()), mimetype="application/x-ndjson")
+
+
+def prediction_table_stats():
+
+    table = recommender.catalog.prediction_table
+
+    return table.describe() if table is not None else None
+
+
+@app.route("/api/metrics")
+def api_metrics():
+
+    if not is_authorized():
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+
+    cache_info = rank_materials.cache_info()
+
+    return jsonify({
+        "status": "success",
+        "data": {
+            "recommendation_cache": {
+                "hits": cache_info.hits,
+                "misses": cache_info.misses,
+                "size": cache_info.currsize,
+                "max_size": cache_info.maxsize
+            },
+            "write_behind": recommendation_writer.metrics(),
+            "models": recommender.model_registry.describe(),
+            "prediction_table": prediction_table_stats()
+        }
+    })
+
+
+# Model Versions
+
+# GET lists the loaded cost/CO2 model versions; POST .../rollback activates an
+# earlier one ({"version": "..."} or, without a body, the previous version).
+# The version is pinned in models/ACTIVE and every worker's watcher switches to
+# it; the pin lasts until new model files land on disk.
+@app.route("/api/models")
+def api_models():
+
+    if not is_authorized():
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+
+    return jsonify({"status": "success", "data": recommender.model_registry.describe()})
+
+
+@app.route("/api/models/rollback", methods=["POST"])
+def api_models_rollback():
+
+    if not is_authorized():
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+
+    try:
+        recommender.model_registry.rollback(data.get("version"))
+    except RegistryError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    # re-score the catalog now instead of on the next recommendation
+    recommender.refresh_catalog()
+
+    return jsonify({"status": "success", "data": recommender.model_registry.describe()})
+
+
 # Route for Dashboards
 @app.route("/dashboard")
 def dashboard():
 
-    metrics = compute_dashboard_data()
+    try:
+        filters = parse_filters(request.args)
+        granularity = parse_granularity(request.args, ROLLUP_MODELS)
+    except FilterError as e:
+        return str(e), 400
+
+    metrics = compute_dashboard_data(filters, granularity)
 
     if not metrics:
         return "No recommendation data available yet."
 
     return render_template(
         "dashboard.html",
+        filters=filters,
+        granularity=granularity,
         avg_co2_reduction=metrics["avg_co2_reduction"],
         avg_cost_savings=metrics["avg_cost_savings"],
         bar_chart=metrics["bar_chart"],
@@ -656,47 +1044,173 @@ def dashboard():
 
 
 # ONLY EXCEL EXPORT
+EXPORT_COLUMNS = [
+    ("Product Category", Recommendation.product_category),
+    ("Material Name", Recommendation.material_name),
+    ("Predicted Cost", Recommendation.predicted_cost),
+    ("Predicted CO2", Recommendation.predicted_co2),
+    ("Suitability Score", Recommendation.suitability_score),
+    ("Created At", Recommendation.created_at)
+]
+
+
+def export_conditions(filters):
+    return time_conditions(Recommendation.created_at, Recommendation.product_category, filters)
+
+
+def export_statement(filters):
+
+    return (
+        db.select(*(column for _, column in EXPORT_COLUMNS))
+        .where(*export_conditions(filters))
+        .order_by(Recommendation.id)
+    )
+
+
+# Writes the history (or the filtered window) to `output` as xlsx, csv or
+# parquet. Rows are streamed from the database in chunks; see exports.py
+def build_excel_export(output, fmt, filters=None):
+
+    conditions = export_conditions(filters)
+    summary = recommendation_summary(db.session, Recommendation, conditions)
+
+    if not summary["total"]:
+        return False
+
+    header = [name for name, _ in EXPORT_COLUMNS]
+    stmt = export_statement(filters)
+
+    if fmt == "csv":
+        csv_file(header, iter_rows(iter_chunks(db.session, stmt)), output)
+    elif fmt == "parquet":
+        parquet_file(header, iter_chunks(db.session, stmt), output)
+    else:
+        xlsx_file([
+            ("Recommendations", header, iter_rows(iter_chunks(db.session, stmt))),
+            ("Summary", ["Metric", "Value"], [
+                ("Total Recommendations", summary["total"]),
+                ("Unique Materials", summary["unique_materials"]),
+                ("Average CO2", round(summary["avg_co2"], 2)),
+                ("Average Cost", round(summary["avg_cost"], 2)),
+                ("Average Suitability Score", round(summary["avg_score"], 4))
+            ]),
+            ("Top Materials", ["Material", "Count"], top_materials(db.session, Recommendation, conditions))
+        ], output)
+
+    return True
+
+
+# Full history as xlsx (default), csv or parquet: ?format=csv
+# Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD&category=... narrow the rows.
 @app.route("/export/excel")
 def export_excel():
 
-    records = Recommendation.query.all()
+    try:
+        fmt = export_format(request.args.get("format"))
+        filters = parse_filters(request.args)
+    except (ExportError, FilterError) as e:
+        return str(e), 400
 
-    if not records:
+    download_name = f"EcoPackAI_Full_Dataset.{fmt}"
+
+    if fmt == "csv":
+
+        if not recommendation_summary(db.session, Recommendation, export_conditions(filters))["total"]:
+            return "No data available"
+
+        header = [name for name, _ in EXPORT_COLUMNS]
+        stmt = export_statement(filters)
+
+        return Response(
+            stream_with_context(csv_lines(header, iter_rows(iter_chunks(db.session, stmt)))),
+            mimetype=EXPORT_FORMATS["csv"],
+            headers={"Content-Disposition": f"attachment; filename={download_name}"}
+        )
+
+    output = tempfile.TemporaryFile()
+
+    try:
+        built = build_excel_export(output, fmt, filters)
+    except ExportError as e:
+        output.close()
+        return str(e), 501
+
+    if not built:
+        output.close()
         return "No data available"
 
-    df = pd.DataFrame([{
-        "Product Category": r.product_category,
-        "Material Name": r.material_name,
-        "Predicted Cost": r.predicted_cost,
-        "Predicted CO2": r.predicted_co2,
-        "Suitability Score": r.suitability_score,
-        "Created At": r.created_at
-    } for r in records])
-
-    output = BytesIO()
-    df.to_excel(output, index=False, engine="openpyxl")
     output.seek(0)
 
     return send_file(
         output,
-        download_name="EcoPackAI_Full_Dataset.xlsx",
+        download_name=download_name,
+        mimetype=EXPORT_FORMATS[fmt],
         as_attachment=True
     )
 
 
 # ONLY PDF EXPORT
-@app.route("/export/pdf")
-def export_pdf():
 
-    metrics = compute_dashboard_data()
+PDF_ROWS_PER_TABLE = 40
+PDF_DETAIL_ROW_LIMIT = int(os.environ.get("PDF_DETAIL_ROW_LIMIT", 2000))
+
+# fixed widths so the chunked tables line up across pages
+PDF_COLUMN_WIDTHS = [190, 90, 90, 80]
+
+PDF_TABLE_STYLE = [
+    ("BACKGROUND", (0, 0), (-1, 0), "lightblue"),
+    ("GRID", (0, 0), (-1, -1), 0.5, "grey"),
+    ("ALIGN", (1, 1), (-1, -1), "CENTER")
+]
+
+
+# report summary straight from the aggregate tables, no charts
+def compute_report_metrics(filters=None):
+
+    totals = db.session.query(
+        DailyStats.product_category,
+        db.func.sum(DailyStats.count),
+        db.func.sum(DailyStats.total_cost),
+        db.func.sum(DailyStats.total_co2)
+    ).filter(
+        *day_conditions(DailyStats.day, DailyStats.product_category, filters)
+    ).group_by(DailyStats.product_category).all()
+
+    if not totals:
+        return None
+
+    totals_df = pd.DataFrame(
+        [tuple(row) for row in totals],
+        columns=["product_category", "count", "total_cost", "total_co2"]
+    )
+
+    add_savings_totals(totals_df)
+
+    avg_co2_reduction, avg_cost_savings = average_savings(totals_df)
+
+    return {
+        "total_recommendations": int(totals_df["count"].sum()),
+        "avg_co2_reduction": avg_co2_reduction,
+        "avg_cost_savings": avg_cost_savings
+    }
+
+
+# Writes the summary report to `output`. The detail table is capped at
+# PDF_DETAIL_ROW_LIMIT rows and split into small tables, which ReportLab lays
+# out page by page instead of splitting one huge table.
+def build_pdf_report(output, filters=None):
+
+    metrics = compute_report_metrics(filters)
 
     if not metrics:
-        return "No data available"
+        return False
 
-    records = Recommendation.query.all()
+    # ReportLab is only imported when a PDF is built
+    from reportlab.lib import pagesizes
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=pagesizes.A4)
+    doc = SimpleDocTemplate(output, pagesize=pagesizes.A4)
     elements = []
 
     styles = getSampleStyleSheet()
@@ -706,37 +1220,171 @@ def export_pdf():
     elements.append(Spacer(1, 20))
 
     # Metrics
+    elements.append(Paragraph(f"Total Recommendations: {metrics['total_recommendations']}", styles["Normal"]))
     elements.append(Paragraph(f"Average CO₂ Reduction: {metrics['avg_co2_reduction']} %", styles["Normal"]))
     elements.append(Paragraph(f"Average Cost Savings: ₹ {metrics['avg_cost_savings']}", styles["Normal"]))
     elements.append(Spacer(1, 20))
 
+    if metrics["total_recommendations"] > PDF_DETAIL_ROW_LIMIT:
+        elements.append(Paragraph(
+            f"Showing the first {PDF_DETAIL_ROW_LIMIT} of {metrics['total_recommendations']} recommendations. "
+            "Use the Excel export for the full history.",
+            styles["Italic"]
+        ))
+        elements.append(Spacer(1, 10))
+
     # Table Data
-    table_data = [["Material", "Predicted Cost", "Predicted CO2", "Score"]]
+    header = ["Material", "Predicted Cost", "Predicted CO2", "Score"]
+
+    stmt = db.select(
+        Recommendation.material_name,
+        Recommendation.predicted_cost,
+        Recommendation.predicted_co2,
+        Recommendation.suitability_score
+    ).where(*export_conditions(filters)).order_by(Recommendation.id).limit(PDF_DETAIL_ROW_LIMIT)
 
-    for r in records:
-        table_data.append([
-            r.material_name,
-            round(r.predicted_cost, 2),
-            round(r.predicted_co2, 2),
-            round(r.suitability_score, 4)
-        ])
+    for chunk in iter_chunks(db.session, stmt, PDF_ROWS_PER_TABLE):
 
-    table = Table(table_data)
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("ALIGN", (1, 1), (-1, -1), "CENTER")
-    ]))
+        table_data = [header] + [[
+            material_name,
+            round(predicted_cost, 2),
+            round(predicted_co2, 2),
+            round(suitability_score, 4)
+        ] for material_name, predicted_cost, predicted_co2, suitability_score in chunk]
 
-    elements.append(table)
+        table = Table(table_data, colWidths=PDF_COLUMN_WIDTHS, repeatRows=1)
+        table.setStyle(TableStyle(PDF_TABLE_STYLE))
+
+        elements.append(table)
 
     doc.build(elements)
 
-    buffer.seek(0)
+    return True
+
+
+@app.route("/export/pdf")
+def export_pdf():
+
+    try:
+        filters = parse_filters(request.args)
+    except FilterError as e:
+        return str(e), 400
+
+    # anonymous temp file, removed when the response closes it
+    output = tempfile.TemporaryFile()
+
+    if not build_pdf_report(output, filters):
+        output.close()
+        return "No data available"
+
+    output.seek(0)
 
     return send_file(
-        buffer,
+        output,
         download_name="EcoPackAI_Summary_Report.pdf",
+        mimetype="application/pdf",
+        as_attachment=True
+    )
+
+
+# Report Jobs
+
+# POST /reports queues a PDF or Excel export on a background worker pool; the
+# client polls /reports/<job_id> and downloads /reports/<job_id>/download.
+# Jobs are keyed on the data version, so repeated requests share one file.
+# Jobs and their files are removed REPORT_TTL_SECONDS (default a day) after
+# their last update.
+report_jobs = ReportJobs(
+    os.environ.get("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ecopackai_reports")),
+    workers=int(os.environ.get("REPORT_WORKERS", 2)),
+    keep_for=int(os.environ.get("REPORT_TTL_SECONDS", 86400))
+)
+
+
+def report_job_response(job, status_code=200):
+
+    return jsonify({
+        "status": "success",
+        "data": {
+            "job_id": job["job_id"],
+            "state": job["status"],
+            "error": job["error"],
+            "size": job["size"],
+            "status_url": f"/reports/{job['job_id']}",
+            "download_url": f"/reports/{job['job_id']}/download" if job["status"] == "done" else None
+        }
+    }), status_code
+
+
+def run_in_app_context(build, *args):
+
+    def run(output):
+        with app.app_context():
+            return build(output, *args)
+
+    return run
+
+
+@app.route("/reports", methods=["POST"])
+def create_report():
+
+    data = request.get_json(silent=True) or request.form
+    report = data.get("report", "pdf")
+
+    try:
+        filters = parse_filters(data)
+    except FilterError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if report == "pdf":
+        fmt = "pdf"
+        build = run_in_app_context(build_pdf_report, filters)
+        filename = "EcoPackAI_Summary_Report.pdf"
+    elif report == "excel":
+        try:
+            fmt = export_format(data.get("format"))
+        except ExportError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        build = run_in_app_context(build_excel_export, fmt, filters)
+        filename = f"EcoPackAI_Full_Dataset.{fmt}"
+    else:
+        return jsonify({"status": "error", "message": "report must be 'pdf' or 'excel'"}), 400
+
+    version = (get_data_version(), recommender.catalog.signature, BASELINE_MODE)
+
+    params = {"report": report, "format": fmt, "filters": filters_key(filters)}
+
+    job = report_jobs.submit(params, version, build, fmt, filename)
+
+    return report_job_response(job, 200 if job["status"] == "done" else 202)
+
+
+@app.route("/reports/<job_id>")
+def report_status(job_id):
+
+    job = report_jobs.get(job_id)
+
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown report job"}), 404
+
+    return report_job_response(job)
+
+
+@app.route("/reports/<job_id>/download")
+def download_report(job_id):
+
+    job = report_jobs.get(job_id)
+
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown report job"}), 404
+
+    if job["status"] != "done":
+        return report_job_response(job, 409)
+
+    return send_file(
+        report_jobs.artifact_path(job),
+        download_name=job["filename"],
+        mimetype=EXPORT_FORMATS.get(job["extension"], "application/pdf"),
         as_attachment=True
     )
 
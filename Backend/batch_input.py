@@ -0,0 +1,52 @@
+"""
+Request and response helpers for the batch recommendation endpoints.
+
+A batch body is either a JSON array of profiles or NDJSON: one JSON object
+per line, sent with an application/x-ndjson content type. Results are
+streamed back as NDJSON, one line per profile, in input order.
+"""
+
+import json
+
+
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+class BatchError(ValueError):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def read_profiles(request, max_profiles):
+    """Profiles from a JSON array or NDJSON body. Raises BatchError."""
+
+    if request.mimetype in NDJSON_MIMETYPES:
+        profiles = []
+
+        for number, line in enumerate(request.get_data(as_text=True).splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                profiles.append(json.loads(line))
+            except ValueError:
+                raise BatchError(f"Line {number} is not valid JSON")
+
+    else:
+        profiles = request.get_json(silent=True)
+
+        if not isinstance(profiles, list):
+            raise BatchError("Expected a JSON array or an NDJSON body")
+
+    if len(profiles) > max_profiles:
+        raise BatchError(f"Batch is limited to {max_profiles} profiles", 413)
+
+    return profiles
+
+
+def ndjson_lines(results):
+    """Serialize result dicts as NDJSON lines for a streamed response"""
+
+    for result in results:
+        yield json.dumps(result) + "\n"
@@ -0,0 +1,471 @@
+"""
+Tree ensembles compiled to packed NumPy node arrays.
+
+compile_model() flattens a fitted regressor into one set of arrays holding
+every node of every tree:
+
+    feature        int32    feature index tested at the node (0 at leaves)
+    threshold      float32  a row goes right when its feature value is > threshold
+    children       int32    [left, right] node indices per node; a leaf points to itself
+    missing_right  bool     NaN goes right
+    value          float    leaf value (0 at internal nodes)
+    roots          int32    root node of each tree
+
+Supported: scikit-learn RandomForestRegressor, ExtraTreesRegressor and
+DecisionTreeRegressor, and XGBoost XGBRegressor / Booster (gbtree, identity
+link), alone or behind StandardScaler steps in a Pipeline.
+
+CompiledEnsemble.predict() walks all trees for a block of rows at once, one
+tree level per step, so a call costs a few dozen array operations whatever
+the batch size, without the input validation and thread pool set-up of the
+models' own predict(). That is what the apps' batches of 1 to ~60 catalog
+rows pay for; past about a thousand rows the libraries' multithreaded
+traversal is faster (benchmarks/bench_compiled_trees.py).
+
+Predictions are the libraries' own, bit for bit:
+
+- both compare float32 features; scikit-learn's `x <= t` (t float64) and
+  XGBoost's `x < t` (t float32) are rewritten as `not x > t'` with t' the
+  float32 just below, which gives the same answer for every float32 x
+- scikit-learn averages the trees' float64 leaf values, XGBoost sums float32
+  leaf values onto base_score, tree by tree in model order; base_score is
+  packed as a first one-leaf tree, so both are one running sum
+
+The apps serve compile_or_keep(model): the compiled ensemble when the model
+can be compiled and predicts the same on a sample of rows, the model itself
+otherwise (or when COMPILED_TREES=0).
+
+Export / check from the command line (writes <model>.npz next to each file):
+
+    python Backend/compiled_trees.py models/cost_model.pkl models/co2_model.pkl
+"""
+
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+COMPILED_TREES = os.environ.get("COMPILED_TREES", "1") != "0"
+
+SKLEARN_TREE_MODELS = {"DecisionTreeRegressor", "ExtraTreeRegressor"}
+SKLEARN_FOREST_MODELS = {"RandomForestRegressor", "ExtraTreesRegressor"}
+
+# XGBoost objectives whose prediction is the raw sum of the trees
+XGBOOST_IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"}
+
+# rows walked together; (trees x rows) working arrays that stay in cache
+BLOCK_ROWS = 512
+
+# relative tolerance for check_equivalence()
+EQUIVALENCE_RTOL = 1e-6
+
+# rows compared by compile_or_keep() before a compiled model is used
+CHECK_ROWS = 256
+
+
+class UnsupportedModel(ValueError):
+    pass
+
+
+class CompiledEnsemble:
+
+    def __init__(self, arrays, meta):
+        """
+        arrays: the node arrays (see module docstring) plus optional
+        scaler_mean / scaler_scale; meta: {"kind", "depth", "feature_names", ...}
+        """
+
+        self.arrays = arrays
+        self.meta = meta
+
+        self.kind = meta["kind"]
+        self.depth = meta["depth"]
+        self.n_features = meta["n_features"]
+        self.feature_names = meta["feature_names"]
+
+        self.feature = arrays["feature"].astype(np.intp)
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"].astype(np.intp)
+        self.missing_right = arrays["missing_right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"].astype(np.intp)
+
+        self.scaler_mean = arrays.get("scaler_mean")
+        self.scaler_scale = arrays.get("scaler_scale")
+
+    # ---------------- prediction
+
+    def prepare(self, X):
+        """Feature matrix in training column order, after any scaler steps"""
+
+        if hasattr(X, "columns"):
+            # selecting columns copies the frame: only when they are out of order
+            if self.feature_names is not None and list(X.columns) != self.feature_names:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float64)
+
+        x = np.asarray(X, dtype=np.float64)
+
+        if x.ndim != 2 or x.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {x.shape}")
+
+        # StandardScaler.transform: subtract, then divide, in float64
+        if self.scaler_mean is not None:
+            for mean, scale in zip(self.scaler_mean, self.scaler_scale):
+                x = (x - mean) / scale
+
+        # both libraries predict from float32 features
+        return np.ascontiguousarray(x, dtype=np.float32)
+
+    def leaves(self, x):
+        """(trees, rows) leaf values for a block of prepared rows"""
+
+        n_rows = len(x)
+        flat_x = x.ravel()
+        row_offsets = np.arange(n_rows) * self.n_features
+        has_missing = np.isnan(flat_x).any()
+
+        nodes = np.repeat(self.roots[:, None], n_rows, axis=1)
+
+        for _ in range(self.depth):
+            values = flat_x.take(row_offsets + self.feature.take(nodes))
+            go_right = values > self.threshold.take(nodes)
+
+            if has_missing:
+                go_right = np.where(np.isnan(values), self.missing_right.take(nodes), go_right)
+
+            nodes = self.children.take(2 * nodes + go_right)
+
+        return self.value.take(nodes)
+
+    def predict(self, X):
+
+        x = self.prepare(X)
+        out = np.empty(len(x), dtype=np.float32 if self.kind == "xgboost" else np.float64)
+
+        for start in range(0, len(x), BLOCK_ROWS):
+            leaves = self.leaves(x[start:start + BLOCK_ROWS])
+
+            # running sum down the trees, in the libraries' order (sum() may
+            # add pairwise and round differently)
+            total = np.add.accumulate(leaves, axis=0, out=leaves)[-1]
+
+            if self.kind == "forest":
+                total = total / len(self.roots)
+
+            out[start:start + BLOCK_ROWS] = total
+
+        return out
+
+    # ---------------- export
+
+    def save(self, path):
+
+        np.savez(path, meta=np.array(json.dumps(self.meta)), **self.arrays)
+
+    @classmethod
+    def load(cls, path):
+
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files if name != "meta"}
+            meta = json.loads(str(data["meta"]))
+
+        return cls(arrays, meta)
+
+
+# ---------------- compiling
+
+def float32_floor(values):
+    """Largest float32 <= each float64 value: for float32 x, x <= v exactly when not x > floor"""
+
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+
+    return rounded
+
+
+def pack_trees(trees):
+    """
+    One set of node arrays from per-tree (feature, threshold, left, right,
+    missing_right, value) arrays, with -1 children marking leaves
+    """
+
+    arrays = {name: [] for name in ("feature", "threshold", "children", "missing_right", "value")}
+    roots = []
+    offset = 0
+
+    for feature, threshold, left, right, missing_right, value in trees:
+        is_leaf = left < 0
+        own_index = np.arange(len(left)) + offset
+
+        roots.append(offset)
+        arrays["feature"].append(np.where(is_leaf, 0, feature))
+        arrays["threshold"].append(threshold)
+        arrays["children"].append(np.column_stack([
+            np.where(is_leaf, own_index, left + offset),
+            np.where(is_leaf, own_index, right + offset)
+        ]).ravel())
+        arrays["missing_right"].append(missing_right)
+        arrays["value"].append(np.where(is_leaf, value, 0))
+
+        offset += len(left)
+
+    return {
+        "feature": np.concatenate(arrays["feature"]).astype(np.int32),
+        "threshold": np.concatenate(arrays["threshold"]).astype(np.float32),
+        "children": np.concatenate(arrays["children"]).astype(np.int32),
+        "missing_right": np.concatenate(arrays["missing_right"]).astype(bool),
+        "value": np.concatenate(arrays["value"]),
+        "roots": np.array(roots, dtype=np.int32)
+    }
+
+
+def tree_depth(left, right):
+    """Edges on the longest root-to-leaf path"""
+
+    depth = np.zeros(len(left), dtype=np.int64)
+
+    # children always come after their parent in both libraries' layouts
+    for node in range(len(left)):
+        if left[node] >= 0:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+
+    return int(depth.max())
+
+
+def sklearn_trees(estimators):
+
+    trees = []
+
+    for estimator in estimators:
+        tree = estimator.tree_
+
+        if tree.n_outputs != 1:
+            raise UnsupportedModel("Only single-output trees can be compiled")
+
+        # left when x <= threshold (x float32, threshold float64)
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=bool))
+
+        trees.append((
+            tree.feature,
+            float32_floor(tree.threshold.astype(np.float64)),
+            tree.children_left,
+            tree.children_right,
+            ~missing_left.astype(bool),
+            tree.value[:, 0, 0].astype(np.float64)
+        ))
+
+    return trees
+
+
+def xgboost_trees(booster):
+    """(trees, base_score) from the booster's JSON model"""
+
+    model = json.loads(bytes(booster.save_raw(raw_format="json")))
+    learner = model["learner"]
+
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise UnsupportedModel(f"Unsupported XGBoost booster: {learner['gradient_booster']['name']}")
+
+    if learner["objective"]["name"] not in XGBOOST_IDENTITY_OBJECTIVES:
+        raise UnsupportedModel(f"Unsupported XGBoost objective: {learner['objective']['name']}")
+
+    if int(learner["learner_model_param"].get("num_target", 1)) != 1:
+        raise UnsupportedModel("Only single-target XGBoost models can be compiled")
+
+    tree_models = learner["gradient_booster"]["model"]["trees"]
+
+    # XGBRegressor.predict() stops at the best iteration after early stopping
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is not None:
+        per_round = len(tree_models) // booster.num_boosted_rounds()
+        tree_models = tree_models[:(int(best_iteration) + 1) * per_round]
+
+    trees = []
+
+    for tree in tree_models:
+        if any(tree.get("split_type", [])):
+            raise UnsupportedModel("Categorical XGBoost splits cannot be compiled")
+
+        split_conditions = np.array(tree["split_conditions"], dtype=np.float32)
+
+        # left when x < condition, i.e. not x > the float32 just below it;
+        # a leaf's split_conditions entry holds its value
+        trees.append((
+            np.array(tree["split_indices"]),
+            np.nextafter(split_conditions, np.float32(-np.inf)),
+            np.array(tree["left_children"]),
+            np.array(tree["right_children"]),
+            ~np.array(tree["default_left"], dtype=bool),
+            split_conditions
+        ))
+
+    # "[3.6923077E0]" in recent versions, "3.6923077E0" before
+    base_score = np.float32(learner["learner_model_param"]["base_score"].strip("[]"))
+
+    # predictions start from base_score: a one-leaf tree summed first
+    base_tree = (np.zeros(1), np.zeros(1), np.array([-1]), np.array([-1]), np.zeros(1, dtype=bool),
+                 np.array([base_score], dtype=np.float32))
+
+    return [base_tree] + trees, float(base_score)
+
+
+def compile_model(model):
+    """CompiledEnsemble for a fitted model; UnsupportedModel for anything else"""
+
+    feature_names = getattr(model, "feature_names_in_", None)
+    scaler_steps = []
+
+    if hasattr(model, "steps"):
+        for _, step in model.steps[:-1]:
+            if step == "passthrough" or step is None:
+                continue
+            if type(step).__name__ != "StandardScaler":
+                raise UnsupportedModel(f"Unsupported pipeline step: {type(step).__name__}")
+            scaler_steps.append((
+                step.mean_ if step.with_mean else np.zeros(step.n_features_in_),
+                step.scale_ if step.with_std else np.ones(step.n_features_in_)
+            ))
+        model = model.steps[-1][1]
+
+    name = type(model).__name__
+    meta = {}
+
+    if name in SKLEARN_FOREST_MODELS:
+        trees = sklearn_trees(model.estimators_)
+        meta["kind"] = "forest"
+    elif name in SKLEARN_TREE_MODELS:
+        trees = sklearn_trees([model])
+        meta["kind"] = "tree"
+    elif hasattr(model, "get_booster") or name == "Booster":
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        trees, meta["base_score"] = xgboost_trees(booster)
+        meta["kind"] = "xgboost"
+    else:
+        raise UnsupportedModel(f"Cannot compile {name}")
+
+    if feature_names is None:
+        feature_names = getattr(model, "feature_names_in_", None)
+
+    meta["n_trees"] = len(trees) - (meta["kind"] == "xgboost")
+
+    arrays = pack_trees(trees)
+
+    if scaler_steps:
+        arrays["scaler_mean"] = np.array([mean for mean, _ in scaler_steps], dtype=np.float64)
+        arrays["scaler_scale"] = np.array([scale for _, scale in scaler_steps], dtype=np.float64)
+
+    meta["depth"] = max(tree_depth(tree[2], tree[3]) for tree in trees)
+    meta["n_features"] = int(model.n_features_in_) if hasattr(model, "n_features_in_") else int(arrays["feature"].max()) + 1
+    meta["feature_names"] = None if feature_names is None else [str(column) for column in feature_names]
+
+    return CompiledEnsemble(arrays, meta)
+
+
+def check_equivalence(model, compiled, X):
+    """Largest relative difference between the two predictions; raises past EQUIVALENCE_RTOL"""
+
+    expected = np.asarray(model.predict(X), dtype=np.float64)
+    actual = compiled.predict(X).astype(np.float64)
+
+    difference = np.abs(actual - expected) / np.maximum(np.abs(expected), 1.0)
+    worst = float(difference.max()) if len(difference) else 0.0
+
+    if worst > EQUIVALENCE_RTOL:
+        raise AssertionError(f"Compiled predictions differ by up to {worst:.3g} (relative)")
+
+    return worst
+
+
+def sample_rows(compiled, n_rows, rng):
+    """Random model inputs spanning every split threshold of every feature"""
+
+    internal = compiled.children[0::2] != np.arange(len(compiled.feature))
+    x = np.zeros((n_rows, compiled.n_features))
+
+    for feature in range(compiled.n_features):
+        thresholds = compiled.threshold[internal & (compiled.feature == feature)]
+        if len(thresholds):
+            x[:, feature] = rng.uniform(float(thresholds.min()) - 1, float(thresholds.max()) + 1, n_rows)
+
+    # thresholds are in scaled units: undo the scaler steps, last one first
+    if compiled.scaler_mean is not None:
+        for mean, scale in zip(compiled.scaler_mean[::-1], compiled.scaler_scale[::-1]):
+            x = x * scale + mean
+
+    return x
+
+
+def compile_or_keep(model):
+    """Compiled ensemble for serving, or `model` when it cannot be compiled exactly"""
+
+    if not COMPILED_TREES:
+        return model
+
+    try:
+        compiled = compile_model(model)
+        X = sample_rows(compiled, CHECK_ROWS, np.random.default_rng(0))
+
+        if compiled.feature_names is not None:
+            # the model may have been fitted on a DataFrame
+            import pandas as pd
+            X = pd.DataFrame(X, columns=compiled.feature_names)
+
+        check_equivalence(model, compiled, X)
+    except UnsupportedModel as e:
+        logger.info("Serving %s uncompiled: %s", type(model).__name__, e)
+        return model
+    except AssertionError:
+        logger.exception("Compiled %s does not match the model, serving it uncompiled", type(model).__name__)
+        return model
+    except Exception:
+        # an unexpected tree layout or dump must not keep the model from loading
+        logger.exception("Could not compile %s, serving it uncompiled", type(model).__name__)
+        return model
+
+    return compiled
+
+
+def main(paths):
+
+    import warnings
+
+    import joblib
+    import pandas as pd
+
+    # the pickled models were saved with older scikit-learn/XGBoost versions
+    warnings.filterwarnings("ignore")
+
+    rng = np.random.default_rng(0)
+
+    for path in paths:
+        model = joblib.load(path)
+
+        try:
+            compiled = compile_model(model)
+        except UnsupportedModel as e:
+            print(f"{path}: not compiled ({e})")
+            continue
+
+        X = sample_rows(compiled, 10_000, rng)
+        if compiled.feature_names is not None:
+            X = pd.DataFrame(X, columns=compiled.feature_names)
+
+        worst = check_equivalence(model, compiled, X)
+
+        output = path.rsplit(".", 1)[0] + ".npz"
+        compiled.save(output)
+
+        print(f"{path} -> {output}: {compiled.meta['kind']}, {compiled.meta['n_trees']} trees, "
+              f"{len(compiled.feature)} nodes, depth {compiled.depth}, max relative difference {worst:.3g}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
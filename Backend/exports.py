@@ -0,0 +1,186 @@
+"""
+Constant-memory export writers for the recommendation history.
+
+Rows are read in chunks (yield_per, which uses a server-side cursor on
+PostgreSQL) and written straight to the output, so an export never holds
+the whole table in memory:
+
+- xlsx: openpyxl write-only workbook in an anonymous temp file
+- csv: streamed line by line
+- parquet: pyarrow ParquetWriter, one row group per chunk (needs pyarrow)
+
+Summary and top-materials figures come from SQL aggregates.
+"""
+
+import csv
+import io
+import tempfile
+
+from sqlalchemy import func, select
+
+
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def export_format(value):
+    """Validated ?format= value, xlsx by default"""
+
+    fmt = (value or "xlsx").lower()
+
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unsupported export format: {value}")
+
+    return fmt
+
+
+def iter_chunks(session, stmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """Result rows of stmt as lists of at most chunk_size tuples"""
+
+    result = session.execute(stmt.execution_options(yield_per=chunk_size))
+
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+
+def iter_rows(chunks):
+
+    for chunk in chunks:
+        yield from chunk
+
+
+def recommendation_summary(session, model, conditions=()):
+    """count / distinct materials / averages over the table (or the rows
+    matching `conditions`) in one query"""
+
+    row = session.execute(select(
+        func.count(model.id),
+        func.count(func.distinct(model.material_name)),
+        func.avg(model.predicted_co2),
+        func.avg(model.predicted_cost),
+        func.avg(model.suitability_score)
+    ).where(*conditions)).one()
+
+    return {
+        "total": row[0],
+        "unique_materials": row[1],
+        "avg_co2": row[2],
+        "avg_cost": row[3],
+        "avg_score": row[4]
+    }
+
+
+def top_materials(session, model, conditions=()):
+    """(material_name, count) pairs, most recommended first"""
+
+    count = func.count(model.id)
+
+    rows = session.execute(
+        select(model.material_name, count)
+        .where(*conditions)
+        .group_by(model.material_name)
+        .order_by(count.desc(), model.material_name)
+    )
+
+    return [tuple(row) for row in rows]
+
+
+def xlsx_file(sheets, output=None):
+    """
+    Write-only workbook, rewound for sending. Written to `output` if given,
+    otherwise to an anonymous temp file.
+
+    sheets: (title, header, rows) tuples; rows may be any iterable.
+    """
+
+    # openpyxl is only imported when a workbook is written
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+
+    for title, header, rows in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+
+    output = output or tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+
+    return output
+
+
+def csv_lines(header, rows):
+    """CSV text for a streamed response, one chunk of lines per yield"""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(header)
+
+    for row in rows:
+        writer.writerow(row)
+
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def csv_file(header, rows, output=None):
+    """CSV written to a binary file (`output` or an anonymous temp file), rewound"""
+
+    output = output or tempfile.TemporaryFile()
+
+    for text in csv_lines(header, rows):
+        output.write(text.encode("utf-8"))
+
+    output.seek(0)
+
+    return output
+
+
+def parquet_file(header, chunks, output=None):
+    """Parquet file (`output` or an anonymous temp file), one row group per chunk"""
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires the pyarrow package")
+
+    output = output or tempfile.TemporaryFile()
+    writer = None
+
+    for chunk in chunks:
+        table = pa.Table.from_pydict({
+            name: list(values) for name, values in zip(header, zip(*chunk))
+        })
+
+        if writer is None:
+            writer = pq.ParquetWriter(output, table.schema)
+        else:
+            table = table.cast(writer.schema)
+
+        writer.write_table(table)
+
+    if writer is None:
+        pq.write_table(pa.Table.from_pydict({name: [] for name in header}), output)
+    else:
+        writer.close()
+
+    output.seek(0)
+
+    return output
@@ -0,0 +1,37 @@
+"""
+Startup migrations for schema changes db.create_all() does not apply.
+
+create_all() only creates missing tables, so indexes added to an existing
+model never reach databases created before them. ensure_indexes() creates
+each missing declared index; on PostgreSQL with CREATE INDEX CONCURRENTLY,
+so a large table keeps accepting writes while it is built.
+"""
+
+import logging
+
+from sqlalchemy import inspect
+
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_indexes(engine, table):
+    """Create indexes declared on `table` that the database does not have yet"""
+
+    existing = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+    created = []
+
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+
+        # CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            try:
+                index.create(connection, checkfirst=True)
+                created.append(index.name)
+            except Exception:
+                # usually another worker creating the same index at startup
+                logger.exception("Could not create index %s", index.name)
+
+    return created
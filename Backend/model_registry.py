@@ -0,0 +1,421 @@
+"""
+Versioned, hot-reloadable model registry.
+
+A registry watches a fixed set of model files in one directory. Each
+distinct set of file contents is a version, named by a short SHA-256 of the
+files, so the same files always get the same version in every worker.
+
+- the files on disk are loaded and made active when the registry is created
+- a background thread polls the files' mtimes and sizes; when they change,
+  the new files are loaded, warmed with a probe prediction and swapped in
+- the last `keep` versions stay in memory, so rollback() switches back to an
+  earlier one without loading anything
+- each loaded version's files are also copied to an archive directory, so
+  any worker can load an earlier version it never saw. MODEL_ARCHIVE_DIR
+  (default: ecopackai_model_versions in the system temp dir) holds one
+  subdirectory per model directory; it must be writable and shared by the
+  workers
+- rollback() pins the version in an ACTIVE file in the directory. Every
+  worker's watcher applies the pin on its next poll, and a worker started
+  later applies it on load. A pin lasts until different files land on disk.
+
+Readers take `registry.active` once per request and use that ModelVersion
+throughout; activating a version is a single reference assignment.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+MODEL_ARCHIVE_DIR = os.environ.get(
+    "MODEL_ARCHIVE_DIR", os.path.join(tempfile.gettempdir(), "ecopackai_model_versions")
+)
+
+# files still being copied in at startup: retries before giving up
+STARTUP_ATTEMPTS = 20
+STARTUP_RETRY_SECONDS = 0.5
+
+
+class RegistryError(ValueError):
+    pass
+
+
+class ModelVersion:
+
+    def __init__(self, version, models, signature):
+        self.version = version
+        self.models = models
+        self.signature = signature
+        self.loaded_at = time.time()
+
+
+def files_digest(paths):
+    """Short content hash over the (name, bytes) of each file; missing files count as empty"""
+
+    digest = hashlib.sha256()
+
+    for name, path in sorted(paths.items()):
+        digest.update(name.encode("utf-8") + b"\0")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        digest.update(b"\0")
+
+    return digest.hexdigest()[:12]
+
+
+class ModelRegistry:
+
+    def __init__(self, directory, filenames, loader, probe=None, poll_seconds=30, keep=3, archive_dir=None):
+        """
+        loader(paths) builds the models object from {filename: path};
+        probe(models) runs a prediction and raises if the models are unusable.
+        archive_dir defaults to a subdirectory of MODEL_ARCHIVE_DIR named
+        after the model directory.
+        """
+
+        self.directory = directory
+        self.paths = {name: os.path.join(directory, name) for name in filenames}
+        self.loader = loader
+        self.probe = probe
+        self.poll_seconds = poll_seconds
+        self.keep = keep
+
+        self.pin_path = os.path.join(directory, "ACTIVE")
+        self.archive_dir = archive_dir or os.path.join(
+            MODEL_ARCHIVE_DIR, hashlib.sha256(os.path.abspath(directory).encode("utf-8")).hexdigest()[:12]
+        )
+
+        self.versions = OrderedDict()
+        self.active = None
+        self.disk_signature = None
+        self.disk_version = None
+        # archived versions that failed to load; their pins are ignored
+        self.unusable = set()
+
+        self.lock = threading.Lock()
+        # one switch at a time: the watcher's sync() and rollback()
+        self.switch_lock = threading.Lock()
+        self.watcher = None
+        self.pid = None
+        self.stats = {"reloads": 0, "last_reload_ms": None, "last_error": None}
+
+        for _ in range(STARTUP_ATTEMPTS):
+            if self.reload() is not None:
+                break
+            time.sleep(STARTUP_RETRY_SECONDS)
+        else:
+            raise RegistryError(f"Model files in {directory} kept changing while loading")
+
+        self.apply_pin()
+
+    # ---------------- loading
+
+    def file_signature(self):
+
+        signature = []
+
+        for path in self.paths.values():
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+
+        return tuple(signature)
+
+    def reload(self):
+        """Load the files on disk as a version if they are new, and make it active"""
+
+        started = time.perf_counter()
+        signature = self.file_signature()
+        version = files_digest(self.paths)
+
+        with self.lock:
+            existing = self.versions.get(version)
+
+        if existing is None:
+            models = self.loader(self.paths)
+
+            if self.probe is not None:
+                self.probe(models)
+
+            if self.file_signature() != signature:
+                # files changed while loading (a copy still in progress): next poll retries
+                return None
+
+            existing = ModelVersion(version, models, signature)
+            self.archive(version)
+
+        with self.lock:
+            self.versions[version] = existing
+            self.versions.move_to_end(version)
+            self.active = existing
+            self.disk_signature = signature
+            self.disk_version = version
+            self.forget_oldest()
+
+        self.stats["reloads"] += 1
+        self.stats["last_reload_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.stats["last_error"] = None
+
+        return existing
+
+    def forget_oldest(self):
+        """Drop the oldest versions beyond `keep`; the active one is always kept. Needs self.lock"""
+
+        for version in list(self.versions):
+            if len(self.versions) <= self.keep:
+                break
+            if self.versions[version] is not self.active:
+                self.versions.pop(version)
+
+    def get(self, version):
+
+        with self.lock:
+            found = self.versions.get(version)
+
+        if found is None:
+            raise RegistryError(f"Unknown model version: {version}")
+
+        return found
+
+    # ---------------- switching
+
+    def rollback(self, version=None):
+        """Activate `version`, or the version loaded before the active one, and pin it for every worker"""
+
+        with self.switch_lock:
+            previous = self.active
+
+            if version is None:
+                with self.lock:
+                    loaded = list(self.versions)
+                position = loaded.index(previous.version)
+                if position == 0:
+                    raise RegistryError("No earlier model version to roll back to")
+                version = loaded[position - 1]
+
+            self.activate(version)
+
+            try:
+                self.write_pin(version)
+            except OSError as e:
+                self.active = previous
+                raise RegistryError(f"Could not pin model version {version}: {e}")
+
+        return self.active
+
+    def activate(self, version):
+        """Make `version` active, loading it from the archive if it is not in memory"""
+
+        with self.lock:
+            found = self.versions.get(version)
+
+        if found is None:
+            found = self.load_archived(version)
+
+        with self.lock:
+            if version not in self.versions:
+                # older than anything loaded here, so previous-version rollbacks skip it
+                self.versions[version] = found
+                self.versions.move_to_end(version, last=False)
+            self.active = self.versions[version]
+            self.forget_oldest()
+
+        return self.active
+
+    # ---------------- pinning
+
+    def write_pin(self, version):
+        """Pin `version` over the files on disk now, replacing the file in one step"""
+
+        fd, temp_path = tempfile.mkstemp(prefix=".ACTIVE-", dir=self.directory)
+
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": version, "disk_version": self.disk_version}, f)
+            os.replace(temp_path, self.pin_path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+    def read_pin(self):
+
+        try:
+            with open(self.pin_path, encoding="utf-8") as f:
+                pin = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring model pin %s: %s", self.pin_path, e)
+            return None
+
+        return pin if isinstance(pin, dict) else None
+
+    def pinned_version(self):
+        """The pinned version, or None when there is no pin or the files on disk changed since"""
+
+        pin = self.read_pin()
+
+        if pin is None or pin.get("disk_version") != self.disk_version:
+            return None
+
+        return pin.get("version")
+
+    def apply_pin(self):
+        """Activate the pinned version, or the files on disk when nothing is pinned"""
+
+        version = self.pinned_version()
+
+        if version is None or version in self.unusable:
+            version = self.disk_version
+
+        if version == self.active.version:
+            return
+
+        try:
+            self.activate(version)
+        except Exception as e:
+            self.unusable.add(version)
+            self.stats["last_error"] = str(e)
+            logger.exception("Could not activate pinned model version %s", version)
+
+    # ---------------- archiving
+
+    def archive(self, version):
+        """Copy the files of a newly loaded `version` to the archive, then prune it"""
+
+        target = os.path.join(self.archive_dir, version)
+        if os.path.isdir(target):
+            return
+
+        staging = None
+
+        try:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=f".{version}-", dir=self.archive_dir)
+
+            for name, path in self.paths.items():
+                if os.path.exists(path):
+                    shutil.copy2(path, os.path.join(staging, name))
+
+            # the files may have been replaced again since they were loaded
+            if files_digest(self.archived_paths(staging)) == version:
+                # another worker may have archived it first; then this fails
+                os.rename(staging, target)
+                staging = None
+        except OSError as e:
+            logger.warning("Could not archive model version %s in %s: %s", version, self.archive_dir, e)
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+
+        pin = self.read_pin() or {}
+        self.prune_archive(keep={version, pin.get("version")})
+
+    def prune_archive(self, keep):
+        """Remove archived versions beyond the newest `self.keep`, except those in `keep`"""
+
+        try:
+            archived = [
+                entry for entry in os.scandir(self.archive_dir)
+                if entry.is_dir() and not entry.name.startswith(".")
+            ]
+        except OSError:
+            return
+
+        archived.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+
+        for entry in archived[self.keep:]:
+            if entry.name not in keep:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def archived_paths(self, directory):
+        return {name: os.path.join(directory, name) for name in self.paths}
+
+    def load_archived(self, version):
+
+        directory = os.path.join(self.archive_dir, version)
+
+        if not os.path.isdir(directory):
+            raise RegistryError(f"Unknown model version: {version}")
+
+        paths = self.archived_paths(directory)
+
+        if files_digest(paths) != version:
+            raise RegistryError(f"Archived files of model version {version} do not match it")
+
+        models = self.loader(paths)
+
+        if self.probe is not None:
+            self.probe(models)
+
+        return ModelVersion(version, models, None)
+
+    # ---------------- watching
+
+    def ensure_watching(self):
+        """Watcher thread per process; threads do not survive a fork"""
+
+        if self.poll_seconds <= 0:
+            return
+
+        if self.pid == os.getpid() and self.watcher.is_alive():
+            return
+
+        with self.lock:
+            if self.pid != os.getpid() or not self.watcher.is_alive():
+                self.watcher = threading.Thread(target=self.watch, name="model-registry", daemon=True)
+                self.watcher.start()
+                self.pid = os.getpid()
+
+    def watch(self):
+
+        while True:
+            time.sleep(self.poll_seconds)
+            self.sync()
+
+    def sync(self):
+        """Load changed files on disk, then apply the pinned version"""
+
+        with self.switch_lock:
+            signature = self.file_signature()
+
+            if signature != self.disk_signature:
+                try:
+                    self.reload()
+                except Exception as e:
+                    # the active version keeps serving; these files are not retried
+                    self.disk_signature = signature
+                    self.stats["last_error"] = str(e)
+                    logger.exception("Model reload from %s failed", self.directory)
+
+            self.apply_pin()
+
+    def describe(self):
+
+        with self.lock:
+            versions = list(self.versions.values())
+            active = self.active
+
+        return {
+            "active_version": active.version,
+            "pinned_version": self.pinned_version(),
+            "versions": [{
+                "version": entry.version,
+                "loaded_at": entry.loaded_at,
+                "active": entry is active
+            } for entry in versions],
+            **self.stats
+        }
@@ -0,0 +1,119 @@
+"""
+Lookup tables of model predictions over discrete feature values.
+
+The model features (strength, weight capacity, recyclability,
+biodegradability) are small bounded integers in every bundled catalog, so
+the predictions can be computed ahead of time and looked up:
+
+- "grid": every integer tuple in the bounding box of the catalog's values,
+  in dense arrays indexed by the tuple's cell number, so new materials
+  within those ranges are covered too. Needs integer catalog values and at
+  most PREDICTION_TABLE_MAX_CELLS cells, otherwise "rows" is used.
+- "rows": the distinct catalog feature tuples, in a dict keyed by tuple.
+
+Rows the table does not cover (other values, NaN) are predicted by the live
+model and counted as fallbacks. Tree models predict every row on its own, so
+a looked-up prediction is bit-identical to a live one.
+
+PREDICTION_TABLE=grid|rows turns the tables on; they are off by default.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+PREDICTION_TABLE = os.environ.get("PREDICTION_TABLE", "off")
+PREDICTION_TABLE_MAX_CELLS = int(os.environ.get("PREDICTION_TABLE_MAX_CELLS", 1_000_000))
+
+
+class PredictionTable:
+
+    def __init__(self, predict, columns, rows, mode="grid", max_cells=PREDICTION_TABLE_MAX_CELLS):
+        """
+        predict(df) returns a tuple of per-row output arrays for a DataFrame
+        with `columns`; the table covers the feature values found in `rows`.
+        """
+
+        self.predict_live = predict
+        self.columns = list(columns)
+        self.lock = threading.Lock()
+        self.stats = {"lookups": 0, "fallbacks": 0}
+
+        values = rows[self.columns].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values).any(axis=1)]
+
+        integral = len(values) > 0 and bool((values == np.round(values)).all())
+
+        shape = None
+
+        if mode == "grid" and integral:
+            low = values.min(axis=0)
+            shape = (values.max(axis=0) - low + 1).astype(np.int64)
+
+        # only the attributes of the mode in use are set; the others stay None
+        self.low = self.shape = self.strides = self.index = None
+
+        if shape is not None and np.prod(shape, dtype=np.float64) <= max_cells:
+            self.mode = "grid"
+            self.low, self.shape = low, shape
+            # row-major cell numbers, the layout of np.indices below
+            self.strides = np.cumprod(np.append(1, shape[:0:-1]))[::-1]
+            keys = np.indices(shape).reshape(len(self.columns), -1).T + low
+        else:
+            self.mode = "rows"
+            keys = np.unique(values, axis=0)
+            self.index = {key: cell for cell, key in enumerate(map(tuple, keys.tolist()))}
+
+        self.size = len(keys)
+        self.outputs = self.predict_live(pd.DataFrame(keys, columns=self.columns)) if self.size else ()
+
+    def cells(self, x):
+        """Table cell of each feature row, -1 where the table has none"""
+
+        if self.mode == "grid":
+            offset = x - self.low
+            # NaN fails every comparison, so it is never inside
+            inside = ((offset >= 0) & (offset < self.shape) & (offset == np.floor(offset))).all(axis=1)
+            cell = np.where(inside[:, None], offset, 0).astype(np.int64) @ self.strides
+            return np.where(inside, cell, -1)
+
+        return np.array([self.index.get(key, -1) for key in map(tuple, x.tolist())], dtype=np.int64)
+
+    def predict(self, df):
+        """Same outputs as predict(df), from the table where it has the rows"""
+
+        # stacking the columns is much cheaper than df[columns] on small frames
+        x = np.column_stack([df[column].to_numpy(dtype=np.float64) for column in self.columns])
+        cells = self.cells(x) if self.size else np.full(len(x), -1)
+        missed = cells < 0
+        n_missed = int(missed.sum())
+
+        with self.lock:
+            self.stats["lookups"] += len(x)
+            self.stats["fallbacks"] += n_missed
+
+        if not self.size or (n_missed and n_missed == len(x)):
+            return self.predict_live(df)
+
+        outputs = tuple(output[np.where(missed, 0, cells)] for output in self.outputs)
+
+        if n_missed:
+            for output, live in zip(outputs, self.predict_live(df[missed])):
+                output[missed] = live
+
+        return outputs
+
+    def describe(self):
+
+        with self.lock:
+            stats = dict(self.stats)
+
+        return {
+            "mode": self.mode,
+            "cells": self.size,
+            **stats,
+            "fallback_rate": round(stats["fallbacks"] / stats["lookups"], 4) if stats["lookups"] else None
+        }
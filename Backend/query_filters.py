@@ -0,0 +1,97 @@
+"""
+Date-range and category filters for dashboard, analytics and export queries.
+
+Requests pass ?start=YYYY-MM-DD&end=YYYY-MM-DD&category=<name>; every part
+is optional and `end` is inclusive. The conditions match the indexes on
+created_at and (product_category, created_at), so a recent window stays an
+index range scan however long the history gets.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+
+class FilterError(ValueError):
+    pass
+
+
+def parse_filters(args):
+    """{"start", "end", "category"} from request args; missing parts are None"""
+
+    filters = {}
+
+    for name in ("start", "end"):
+        value = args.get(name)
+        try:
+            filters[name] = date.fromisoformat(value) if value else None
+        except (TypeError, ValueError):
+            raise FilterError(f"{name} must be a date in YYYY-MM-DD format")
+
+    if filters["start"] and filters["end"] and filters["start"] > filters["end"]:
+        raise FilterError("start must not be after end")
+
+    filters["category"] = args.get("category") or None
+
+    return filters
+
+
+def parse_granularity(args, choices):
+    """?granularity= for trend charts, one of `choices`; "day" by default"""
+
+    granularity = args.get("granularity") or "day"
+
+    if granularity not in choices:
+        raise FilterError(f"granularity must be one of: {', '.join(choices)}")
+
+    return granularity
+
+
+def filters_key(filters):
+    """Hashable form of the filters, for cache keys and report parameters"""
+
+    if not filters:
+        return (None, None, None)
+
+    return tuple(
+        filters[name].isoformat() if isinstance(filters[name], date) else filters[name]
+        for name in ("start", "end", "category")
+    )
+
+
+def time_conditions(created_at, category_column, filters):
+    """SQL conditions on a timestamp column and a category column"""
+
+    if not filters:
+        return []
+
+    conditions = []
+
+    if filters["category"] is not None:
+        conditions.append(category_column == filters["category"])
+
+    if filters["start"] is not None:
+        conditions.append(created_at >= datetime.combine(filters["start"], time.min))
+
+    if filters["end"] is not None:
+        conditions.append(created_at < datetime.combine(filters["end"] + timedelta(days=1), time.min))
+
+    return conditions
+
+
+def day_conditions(day, category_column, filters):
+    """SQL conditions on a DATE column (daily aggregate tables)"""
+
+    if not filters:
+        return []
+
+    conditions = []
+
+    if filters["category"] is not None:
+        conditions.append(category_column == filters["category"])
+
+    if filters["start"] is not None:
+        conditions.append(day >= filters["start"])
+
+    if filters["end"] is not None:
+        conditions.append(day <= filters["end"])
+
+    return conditions
@@ -0,0 +1,471 @@
+"""
+Recommendation engine: catalog loading, filtering, prediction and scoring.
+
+Has no Flask or database dependency, so it is shared by app.py and the
+offline scorer (score_profiles.py). The catalog is loaded on import.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from functools import lru_cache, partial
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from Backend.compiled_trees import compile_or_keep
+from Backend.model_registry import ModelRegistry
+from Backend.prediction_table import PREDICTION_TABLE, PredictionTable
+
+
+logger = logging.getLogger(__name__)
+
+# Load Dataset & Models
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DATASET_PATH = os.path.join(BASE_DIR, "data", "Ecopack_dataset.csv")
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+
+
+FEATURE_COLS = [
+    "strength",
+    "weight_capacity",
+    "recyclability_percentage",
+    "biodegradability_score"
+]
+
+
+# Model Registry
+
+# cost/CO2 model versions; replaced files are loaded and probed in the
+# background, and the catalog is re-scored with them on the next request
+def load_models(paths):
+
+    # served as NumPy node arrays when they compile exactly (compiled_trees.py)
+    return (
+        compile_or_keep(joblib.load(paths["cost_model.pkl"])),
+        compile_or_keep(joblib.load(paths["co2_model.pkl"]))
+    )
+
+
+def probe_models(models):
+
+    probe = pd.DataFrame([[1.0] * len(FEATURE_COLS)], columns=FEATURE_COLS)
+
+    for model in models:
+        model.predict(probe)
+
+
+model_registry = ModelRegistry(
+    MODELS_DIR,
+    ["cost_model.pkl", "co2_model.pkl"],
+    load_models,
+    probe_models,
+    poll_seconds=float(os.environ.get("MODEL_POLL_SECONDS", 30))
+)
+
+
+# Prediction Store
+
+# Model features never change while the process runs, so every material is
+# scored once when the catalog is loaded and requests only look predictions up.
+def build_prediction_store(catalog):
+
+    features = catalog.materials_df[FEATURE_COLS]
+
+    if catalog.prediction_table is not None:
+        predicted_cost, predicted_co2 = catalog.prediction_table.predict(features)
+    else:
+        predicted_cost, predicted_co2 = predict_live(catalog.models, features)
+
+    return pd.DataFrame({
+        "predicted_cost": predicted_cost,
+        "predicted_co2": predicted_co2
+    }, index=catalog.materials_df.index)
+
+
+def predict_live(models, features):
+
+    cost_model, co2_model = models
+
+    return cost_model.predict(features), co2_model.predict(features)
+
+
+# PREDICTION_TABLE=grid|rows: predictions are looked up by feature values
+# (prediction_table.py). The table is built once per model version, so a
+# reloaded catalog only runs the models for feature values it has not seen.
+def build_prediction_table(catalog, previous):
+
+    if PREDICTION_TABLE == "off":
+        return None
+
+    if previous is not None and previous.model_version == catalog.model_version:
+        return previous.prediction_table
+
+    return PredictionTable(partial(predict_live, catalog.models), FEATURE_COLS, catalog.materials_df, PREDICTION_TABLE)
+
+
+# Catalog
+
+# Everything derived from one version of the dataset and of the models. A
+# reload builds a new Catalog and publishes it with a single reference
+# assignment, so a request keeps reading the catalog it started with.
+class Catalog:
+
+    def __init__(self, signature, active, previous=None):
+
+        self.signature = signature
+
+        # Models (already loaded and probed by the registry)
+        self.models = active.models
+        self.model_version = active.version
+
+        # Dataset (now inside data/ folder)
+        self.materials_df = pd.read_csv(DATASET_PATH)
+
+        self.prediction_table = build_prediction_table(self, previous)
+        self.prediction_store = build_prediction_store(self)
+
+        # Industry Baselines (Global Average)
+
+        self.industry_baseline_co2 = self.materials_df["co2_score"].mean()
+
+        # Since original dataset may not contain cost column,
+        # we will define baseline cost as average predicted cost from dataset features
+        self.industry_baseline_cost = self.prediction_store["predicted_cost"].mean()
+
+        # Thresholds
+
+        self.global_max_strength = self.materials_df["strength"].max()
+        self.strength_q75 = self.materials_df["strength"].quantile(0.75)
+        self.strength_q50 = self.materials_df["strength"].quantile(0.50)
+        self.weight_median = self.materials_df["weight_capacity"].median()
+        self.bio_q70 = self.materials_df["biodegradability_score"].quantile(0.70)
+        self.co2_q75 = self.materials_df["co2_score"].quantile(0.75)
+
+        self.filter_index = FilterIndex(self.materials_df, self)
+
+        self.category_baselines = build_category_baselines(self)
+
+
+# dataset modification time + active model version
+def get_catalog_signature():
+    return (os.path.getmtime(DATASET_PATH), model_registry.active.version)
+
+
+def load_catalog():
+
+    global catalog
+
+    signature = get_catalog_signature()
+
+    catalog = Catalog(signature, model_registry.get(signature[1]), catalog)
+
+
+# The dataset's modification time is checked at most every CATALOG_CHECK_SECONDS;
+# a newly active model version is picked up on the next request.
+CATALOG_CHECK_SECONDS = float(os.environ.get("CATALOG_CHECK_SECONDS", 2))
+
+catalog_checked_at = 0.0
+
+
+# re-scores the catalog when the dataset was replaced on disk or another
+# model version became active; True when this call reloaded it
+def refresh_catalog():
+
+    global catalog_checked_at
+
+    model_registry.ensure_watching()
+
+    now = time.monotonic()
+
+    if model_registry.active.version == catalog.model_version and now - catalog_checked_at < CATALOG_CHECK_SECONDS:
+        return False
+
+    catalog_checked_at = now
+
+    with catalog_lock:
+        try:
+            if get_catalog_signature() == catalog.signature:
+                return False
+
+            load_catalog()
+
+        # e.g. the dataset is missing or half-written while it is being replaced:
+        # keep serving the current catalog and try again on a later request
+        except Exception:
+            logger.exception("Catalog reload from %s failed", DATASET_PATH)
+            return False
+
+        rank_materials.cache_clear()
+        warm_recommendation_cache()
+
+    return True
+
+
+# Validation
+
+def validate_input(data):
+    required = [
+        "product_category",
+        "fragility",
+        "shipping_type",
+        "sustainability_priority"
+    ]
+
+    if not isinstance(data, dict):
+        return False, "Profile must be a JSON object"
+
+    for field in required:
+        if field not in data:
+            return False, f"Missing field: {field}"
+
+    # resolve_profile and the cache key need strings
+    for field in required + ["other_category"]:
+        if field in data and not isinstance(data[field], str):
+            return False, f"Field must be a string: {field}"
+
+    return True, None
+
+
+# (product_category, fragility, shipping_type, sustainability_priority) for one API profile
+def resolve_profile(data):
+
+    product_category = data["product_category"]
+
+    if product_category.lower() == "other" and "other_category" in data:
+        product_category = data["other_category"].strip().title()
+
+    return (
+        product_category,
+        data["fragility"],
+        data["shipping_type"],
+        data["sustainability_priority"]
+    )
+
+# Filtering
+
+# One precomputed mask per category and fragility rule over materials_df,
+# built with the catalog. A request only ANDs two masks and gathers the rows.
+class FilterIndex:
+
+    def __init__(self, df, thresholds):
+
+        strength = df["strength"].to_numpy()
+        weight_capacity = df["weight_capacity"].to_numpy()
+        biodegradability = df["biodegradability_score"].to_numpy()
+        co2 = df["co2_score"].to_numpy()
+
+        self.category_masks = {
+            "electronics": (strength >= thresholds.strength_q50) & (co2 <= thresholds.co2_q75),
+            "food": biodegradability >= thresholds.bio_q70,
+            "cosmetics": weight_capacity <= thresholds.weight_median
+        }
+
+        # Unknown category → adaptive fallback logic
+        self.fallback_mask = strength >= thresholds.strength_q50
+
+        self.fragility_masks = {
+            "high": strength >= thresholds.strength_q75,
+            "medium": strength >= thresholds.strength_q50
+        }
+
+    def select(self, product_category, fragility):
+
+        mask = self.category_masks.get(product_category, self.fallback_mask)
+
+        fragility_mask = self.fragility_masks.get(fragility)
+        if fragility_mask is not None:
+            mask = mask & fragility_mask
+
+        return np.flatnonzero(mask)
+
+
+def apply_filters(catalog, product_category, fragility):
+
+    category_applied = True
+
+    rows = catalog.filter_index.select(product_category, fragility)
+    filtered = catalog.materials_df.iloc[rows]
+
+    return filtered, category_applied
+
+# Category Baselines
+
+# Baseline for BASELINE_MODE = "category": mean predicted cost / CO2 of the
+# medium-fragility materials passing a category's filter. It only depends on
+# the category rule, so it is one row per rule ("other" for the fallback),
+# rebuilt with the catalog and models.
+def build_category_baselines(catalog):
+
+    rows = {}
+
+    for category in list(catalog.filter_index.category_masks) + ["other"]:
+        predictions = catalog.prediction_store.iloc[catalog.filter_index.select(category, "medium")]
+
+        if predictions.empty:
+            rows[category] = (catalog.industry_baseline_cost, catalog.industry_baseline_co2)
+        else:
+            rows[category] = (predictions["predicted_cost"].mean(), predictions["predicted_co2"].mean())
+
+    return pd.DataFrame.from_dict(rows, orient="index", columns=["baseline_cost", "baseline_co2"])
+
+
+# baseline_cost / baseline_co2 for each value of a Series of product categories
+def lookup_category_baselines(catalog, categories):
+
+    rules = categories.where(categories.isin(list(catalog.filter_index.category_masks)), "other")
+
+    return catalog.category_baselines.loc[rules].set_axis(categories.index)
+
+
+# ML Prediction
+
+def run_predictions(catalog, df):
+
+    # lookup only, predictions were computed with the catalog
+    return df.join(catalog.prediction_store)
+
+# Weight Logic
+
+def get_weights(product_category, sustainability_priority, shipping_type):
+
+    eco_weight = 0.4
+    cost_weight = 0.3
+    strength_weight = 0.3
+
+    if sustainability_priority == "high":
+        eco_weight += 0.2
+        cost_weight -= 0.1
+    elif sustainability_priority == "low":
+        cost_weight += 0.1
+
+    if shipping_type == "international":
+        eco_weight += 0.1
+
+    if product_category == "electronics":
+        strength_weight += 0.2
+        eco_weight -= 0.1
+    elif product_category == "cosmetics":
+        cost_weight += 0.1
+    elif product_category == "food":
+        eco_weight += 0.2
+        strength_weight -= 0.1
+
+    total = eco_weight + cost_weight + strength_weight
+
+    return eco_weight/total, cost_weight/total, strength_weight/total
+
+# Scoring
+
+def calculate_score(catalog, df, eco_w, cost_w, strength_w):
+
+    df = df.copy()
+
+    df["eco_score"] = 1 / (df["predicted_co2"] + 1)
+    df["cost_efficiency"] = 1 / (df["predicted_cost"] + 1)
+    df["strength_norm"] = df["strength"] / catalog.global_max_strength
+
+    df["suitability_score"] = (
+        eco_w * df["eco_score"] +
+        cost_w * df["cost_efficiency"] +
+        strength_w * df["strength_norm"]
+    )
+
+    return df
+
+
+
+# Recommendation Cache
+
+RECOMMENDATION_CACHE_SIZE = int(os.environ.get("RECOMMENDATION_CACHE_SIZE", 256))
+
+# Values outside these sets all take the same branches in apply_filters and
+# get_weights, so they share a single cache entry under "other".
+CACHE_KEY_VALUES = {
+    "product_category": ("electronics", "food", "cosmetics"),
+    "fragility": ("high", "medium"),
+    "shipping_type": ("international",),
+    "sustainability_priority": ("high", "low")
+}
+
+
+def normalize_request_key(product_category, fragility, shipping_type, sustainability_priority):
+
+    values = {
+        "product_category": product_category,
+        "fragility": fragility,
+        "shipping_type": shipping_type,
+        "sustainability_priority": sustainability_priority
+    }
+
+    return tuple(
+        value if value in CACHE_KEY_VALUES[field] else "other"
+        for field, value in values.items()
+    )
+
+
+# the catalog is part of the key, so a reloaded catalog never serves old rankings
+@lru_cache(maxsize=RECOMMENDATION_CACHE_SIZE)
+def rank_materials(catalog, product_category, fragility, shipping_type, sustainability_priority):
+
+    filtered_df, _ = apply_filters(catalog, product_category, fragility)
+
+    if filtered_df.empty:
+        return ()
+
+    predicted_df = run_predictions(catalog, filtered_df)
+
+    eco_w, cost_w, strength_w = get_weights(
+        product_category,
+        sustainability_priority,
+        shipping_type
+    )
+
+    scored_df = calculate_score(catalog, predicted_df, eco_w, cost_w, strength_w)
+
+    ranked_df = scored_df.sort_values("suitability_score", ascending=False)
+
+    top_results = ranked_df[[
+        "material_name",
+        "predicted_cost",
+        "predicted_co2",
+        "suitability_score"
+    ]].head(3)
+
+    return tuple(top_results.to_dict(orient="records"))
+
+
+def generate_recommendations(product_category, fragility, shipping_type, sustainability_priority):
+
+    refresh_catalog()
+
+    key = normalize_request_key(
+        product_category,
+        fragility,
+        shipping_type,
+        sustainability_priority
+    )
+
+    return [dict(item) for item in rank_materials(catalog, *key)]
+
+
+# ranks every known input combination so steady-state requests are cache hits
+def warm_recommendation_cache():
+
+    combinations = itertools.product(*(
+        values + ("other",) for values in CACHE_KEY_VALUES.values()
+    ))
+
+    for key in combinations:
+        rank_materials(catalog, *key)
+
+
+catalog = None
+catalog_lock = threading.Lock()
+load_catalog()
+warm_recommendation_cache()
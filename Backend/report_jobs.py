@@ -0,0 +1,260 @@
+"""
+Background report jobs with a content-addressed file cache.
+
+A job is identified by a hash of its parameters and the data version it
+was requested for, so asking for the same report twice before the data
+changes returns the same job, whether it is still running or finished.
+
+Job state lives in JSON files and artifacts are stored under the SHA-256
+of their content, all inside `cache_dir`:
+
+    jobs/<job_id>.json     status, parameters, artifact name
+    blobs/<sha256>.<ext>   finished report files
+
+Because the state is on disk, any worker process can answer status polls
+and downloads for a job built by another one.
+
+Job records are removed `keep_for` seconds after their last update, and
+blobs once no remaining record refers to them. Submitting a job schedules
+that sweep at most every `evict_every` seconds.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class ReportJobs:
+
+    def __init__(self, cache_dir, workers=2, stale_after=600, keep_for=86400, evict_every=300):
+
+        self.cache_dir = cache_dir
+        self.workers = workers
+        # queued/running jobs not updated for this long belong to a dead worker
+        self.stale_after = stale_after
+        self.keep_for = keep_for
+        self.evict_every = evict_every
+        self.evicted_at = None
+
+        self.jobs_dir = os.path.join(cache_dir, "jobs")
+        self.blobs_dir = os.path.join(cache_dir, "blobs")
+
+        self.executor = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+
+    # ---------------- job records
+
+    def job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def get(self, job_id):
+        """Job record, or None for unknown or malformed ids"""
+
+        if not JOB_ID_PATTERN.fullmatch(job_id or ""):
+            return None
+
+        try:
+            with open(self.job_path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, job):
+
+        job["updated_at"] = time.time()
+
+        tmp_path = f"{self.job_path(job['job_id'])}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+
+        os.replace(tmp_path, self.job_path(job["job_id"]))
+
+    def claim(self, job):
+        """Create the job record; False if another request already did"""
+
+        try:
+            fd = os.open(self.job_path(job["job_id"]), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        os.close(fd)
+        self.save(job)
+
+        return True
+
+    def is_live(self, job):
+
+        if job["status"] == "done":
+            return bool(job["artifact"]) and os.path.exists(self.artifact_path(job))
+
+        if job["status"] == "failed":
+            return False
+
+        return time.time() - job["updated_at"] < self.stale_after
+
+    # ---------------- submitting
+
+    def submit(self, params, version, build, extension, filename):
+        """
+        Returns the job for (params, version), starting it if needed.
+
+        build(output) writes the report to a binary file and returns False
+        when there is nothing to report.
+        """
+
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+        key = json.dumps({"params": params, "version": version}, sort_keys=True, default=str)
+        job_id = hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+        existing = self.get(job_id)
+        if existing is not None and self.is_live(existing):
+            return existing
+
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "params": params,
+            "extension": extension,
+            "filename": filename,
+            "artifact": None,
+            "size": None,
+            "error": None,
+            "created_at": time.time()
+        }
+
+        if existing is None:
+            if not self.claim(job):
+                # claimed by a concurrent request, whose record may still be empty
+                return self.get(job_id) or job
+        else:
+            # failed or stale: run it again
+            self.save(job)
+
+        self.ensure_started()
+        self.executor.submit(self.run, job, build)
+
+        if self.evicted_at is None or time.monotonic() - self.evicted_at >= self.evict_every:
+            self.evicted_at = time.monotonic()
+            self.executor.submit(self.evict)
+
+        return job
+
+    def ensure_started(self):
+        """Worker pool per process; threads do not survive a fork"""
+
+        if self.pid == os.getpid():
+            return
+
+        with self.start_lock:
+            if self.pid != os.getpid():
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report")
+                self.pid = os.getpid()
+
+    # ---------------- worker side
+
+    def run(self, job, build):
+
+        job["status"] = "running"
+        self.save(job)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.blobs_dir, suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "w+b") as output:
+                built = build(output)
+
+            if built is False:
+                job["status"] = "failed"
+                job["error"] = "No data available"
+            else:
+                job["artifact"] = f"{file_digest(tmp_path)}.{job['extension']}"
+
+                # identical content from another job just replaces itself
+                os.replace(tmp_path, self.artifact_path(job))
+
+                job["size"] = os.path.getsize(self.artifact_path(job))
+                job["status"] = "done"
+
+        except Exception as e:
+            logger.exception("Report job %s failed", job["job_id"])
+            job["status"] = "failed"
+            job["error"] = str(e)
+
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        self.save(job)
+
+    def artifact_path(self, job):
+        return os.path.join(self.blobs_dir, job["artifact"] or "")
+
+    # ---------------- eviction
+
+    def evict(self):
+        """Remove job records not updated for keep_for seconds, then the blobs no record refers to"""
+
+        now = time.time()
+        referenced = set()
+        removed = 0
+
+        try:
+            for entry in os.scandir(self.jobs_dir):
+                job = self.get(entry.name[:-len(".json")]) if entry.name.endswith(".json") else None
+
+                if job is None:
+                    # temporary files of interrupted saves, records claimed but never written
+                    if now - entry.stat().st_mtime >= self.keep_for:
+                        remove_file(entry.path)
+                    continue
+
+                if now - job["updated_at"] >= self.keep_for:
+                    remove_file(entry.path)
+                    removed += 1
+                elif job["artifact"]:
+                    referenced.add(job["artifact"])
+
+            for entry in os.scandir(self.blobs_dir):
+                # a blob is written just before the record that refers to it
+                if entry.name in referenced or now - entry.stat().st_mtime < self.stale_after:
+                    continue
+                remove_file(entry.path)
+
+        except OSError as e:
+            logger.warning("Report cache eviction in %s failed: %s", self.cache_dir, e)
+
+        return removed
+
+
+def remove_file(path):
+
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        # another worker evicted it first
+        pass
+
+
+def file_digest(path):
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
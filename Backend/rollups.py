@@ -0,0 +1,177 @@
+"""
+Time-partitioned rollups of the recommendation history, plus retention.
+
+Each app declares one table per granularity ("day", "week", "month"), keyed
+on (<period start>, product_category) with count / total_cost / total_co2
+columns. Inserts add their rows to every rollup in the same transaction, so
+trend charts read one row per period and category instead of the raw
+history:
+
+    day     the date itself
+    week    the Monday of its ISO week
+    month   the first of its month
+
+Raw rows older than a retention window can then be moved to an archive
+table (archive_rows) without changing any trend.
+"""
+
+from datetime import timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+UPSERT_DIALECTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert
+}
+
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def period_start(day, granularity):
+
+    if granularity == "day":
+        return day
+
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+
+    if granularity == "month":
+        return day.replace(day=1)
+
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+
+def period_filters(filters, granularity):
+    """
+    Date filters widened to whole periods, for querying a rollup table: a
+    weekly chart from a Wednesday starts with that Monday's week.
+    """
+
+    if not filters:
+        return filters
+
+    return {
+        **filters,
+        "start": filters["start"] and period_start(filters["start"], granularity),
+        "end": filters["end"] and period_start(filters["end"], granularity)
+    }
+
+
+# sums rows per aggregate key, one upsert row per key
+def summarize_rows(rows, key_fields):
+
+    totals = {}
+
+    for row in rows:
+        key = tuple(row[field] for field in key_fields)
+        entry = totals.setdefault(key, {
+            **dict(zip(key_fields, key)),
+            "count": 0,
+            "total_cost": 0.0,
+            "total_co2": 0.0
+        })
+        entry["count"] += 1
+        entry["total_cost"] += row["predicted_cost"]
+        entry["total_co2"] += row["predicted_co2"]
+
+    return list(totals.values())
+
+
+def rollup_rows(rows, granularity):
+    """Upsert rows for one rollup table from inserted recommendation rows"""
+
+    return summarize_rows([{
+        **row,
+        granularity: period_start(row["created_at"].date(), granularity),
+        "product_category": row["product_category"] or ""
+    } for row in rows], [granularity, "product_category"])
+
+
+def coarser_rows(daily_rows, granularity):
+    """Week or month rollup rows summed from day rollup rows"""
+
+    totals = {}
+
+    for row in daily_rows:
+        key = (period_start(row["day"], granularity), row["product_category"])
+        entry = totals.setdefault(key, {
+            granularity: key[0],
+            "product_category": key[1],
+            "count": 0,
+            "total_cost": 0.0,
+            "total_co2": 0.0
+        })
+        entry["count"] += row["count"]
+        entry["total_cost"] += row["total_cost"]
+        entry["total_co2"] += row["total_co2"]
+
+    return list(totals.values())
+
+
+# adds count/cost/co2 to aggregate rows, creating each row on first use
+def increment_totals(session, model, rows):
+
+    if not rows:
+        return
+
+    insert_for_dialect = UPSERT_DIALECTS.get(session.get_bind().dialect.name)
+    key_fields = [column.name for column in model.__table__.primary_key.columns]
+
+    if insert_for_dialect is None:
+        for row in rows:
+            key = tuple(row[field] for field in key_fields)
+            stats = session.get(model, key) or model(**row)
+            if stats in session:
+                stats.count += row["count"]
+                stats.total_cost += row["total_cost"]
+                stats.total_co2 += row["total_co2"]
+            session.add(stats)
+        return
+
+    stmt = insert_for_dialect(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_fields,
+        set_={
+            "count": model.count + stmt.excluded.count,
+            "total_cost": model.total_cost + stmt.excluded.total_cost,
+            "total_co2": model.total_co2 + stmt.excluded.total_co2
+        }
+    )
+    session.execute(stmt)
+
+
+def archive_rows(session, model, archive_model, cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Moves rows created before `cutoff` from model's table to archive_model's
+    (same column names), oldest first, committing every batch_size rows so
+    neither table is locked for the whole run. Returns the number moved.
+    """
+
+    columns = [column.name for column in model.__table__.columns]
+    source = select(*(model.__table__.c[name] for name in columns))
+
+    archived = 0
+
+    while True:
+        ids = session.execute(
+            select(model.id)
+            .where(model.created_at < cutoff)
+            .order_by(model.id)
+            .limit(batch_size)
+        ).scalars().all()
+
+        if not ids:
+            return archived
+
+        try:
+            session.execute(insert(archive_model).from_select(columns, source.where(model.id.in_(ids))))
+            session.execute(delete(model).where(model.id.in_(ids)))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        archived += len(ids)
@@ -0,0 +1,196 @@
+"""
+Offline batch scorer: ranks a CSV or NDJSON file of product profiles with
+the same filter/predict/score path as /api/recommend, without the web app.
+
+Profiles have the /api/recommend fields (product_category, fragility,
+shipping_type, sustainability_priority, optional other_category). The
+output has one row per recommended material:
+
+    index, <profile fields>, rank, material_name, predicted_cost,
+    predicted_co2, suitability_score
+
+Input is read in chunks and chunks are scored across worker processes.
+Only a few chunks are in flight at a time, so memory stays bounded for any
+input size. Nothing is written to the database.
+
+Run from the repository root:
+    python -m Backend.score_profiles profiles.csv recommendations.csv --workers 4
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+import pandas as pd
+
+from Backend import recommender
+
+
+OUTPUT_FIELDS = [
+    "index",
+    "product_category",
+    "fragility",
+    "shipping_type",
+    "sustainability_priority",
+    "rank",
+    "material_name",
+    "predicted_cost",
+    "predicted_co2",
+    "suitability_score"
+]
+
+
+def file_format(path, requested=None):
+
+    if requested:
+        return requested
+
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def read_chunks(path, fmt, chunk_size):
+    """Yields lists of profile dicts, chunk_size at a time"""
+
+    if fmt == "csv":
+        reader = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+        for chunk in reader:
+            yield chunk.to_dict(orient="records")
+        return
+
+    with open(path, encoding="utf-8") as f:
+        lines = (line for line in f if line.strip())
+        while True:
+            chunk = [json.loads(line) for line in itertools.islice(lines, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+
+
+def score_chunk(task):
+    """Ranked output rows for one chunk; identical profiles are ranked once"""
+
+    offset, profiles = task
+
+    rankings = {}
+    rows = []
+    skipped = 0
+
+    for index, data in enumerate(profiles, offset):
+
+        valid, _ = recommender.validate_input(data)
+        if not valid:
+            skipped += 1
+            continue
+
+        profile = recommender.resolve_profile(data)
+
+        if profile not in rankings:
+            rankings[profile] = recommender.generate_recommendations(*profile)
+
+        for rank, item in enumerate(rankings[profile], 1):
+            rows.append({
+                "index": index,
+                "product_category": profile[0],
+                "fragility": profile[1],
+                "shipping_type": profile[2],
+                "sustainability_priority": profile[3],
+                "rank": rank,
+                "material_name": item["material_name"],
+                "predicted_cost": float(item["predicted_cost"]),
+                "predicted_co2": float(item["predicted_co2"]),
+                "suitability_score": float(item["suitability_score"])
+            })
+
+    return len(profiles), skipped, rows
+
+
+class OutputWriter:
+
+    def __init__(self, path, fmt):
+
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.csv = None
+
+        if fmt == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, rows):
+
+        if self.csv:
+            self.csv.writerows(rows)
+        else:
+            self.file.writelines(json.dumps(row) + "\n" for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+def scored_chunks(tasks, workers):
+    """Scores tasks in order, with at most 2 * workers chunks in flight"""
+
+    if workers <= 1:
+        yield from map(score_chunk, tasks)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+
+        for task in tasks:
+            pending.append(pool.apply_async(score_chunk, (task,)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+
+        while pending:
+            yield pending.popleft().get()
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="CSV or NDJSON file of product profiles")
+    parser.add_argument("output", help="where to write ranked recommendations")
+    parser.add_argument("--input-format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--output-format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="profiles per chunk (default: 10000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    chunks = read_chunks(args.input, file_format(args.input, args.input_format), args.chunk_size)
+    tasks = ((number * args.chunk_size, chunk) for number, chunk in enumerate(chunks))
+
+    writer = OutputWriter(args.output, file_format(args.output, args.output_format))
+
+    started = time.perf_counter()
+    total = skipped = written = 0
+
+    try:
+        for profiles, invalid, rows in scored_chunks(tasks, args.workers):
+            writer.write(rows)
+
+            total += profiles
+            skipped += invalid
+            written += len(rows)
+
+            elapsed = time.perf_counter() - started
+            print(f"{total} profiles scored, {total / elapsed:,.0f} rows/sec", file=sys.stderr)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"Done: {total} profiles ({skipped} invalid skipped), {written} recommendations "
+        f"in {elapsed:.1f}s, {total / elapsed if elapsed else 0:,.0f} rows/sec",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Write-behind queue for recommendation rows.
+
+Requests put rows on a bounded in-process queue and return immediately.
+A background thread writes them in batches, either when `batch_size` rows
+are waiting or every `flush_interval` seconds.
+
+When the queue is full, submit() waits up to `block_timeout` seconds
+(backpressure). After that the row is appended to `spill_path` as a JSON
+line, or dropped if no spill file is configured. Spilled rows are written
+once the queue has drained.
+
+A batch that fails to write is retried one row at a time:
+
+- rows that fail while others succeed are bad rows: they go to
+  `dead_letter_path` (default `<spill_path>.dead`), which is never replayed;
+- when no row gets through, the database is treated as unavailable: the
+  rows are spilled and replayed later, backing off up to
+  `max_replay_delay` seconds between replays. A row that failed
+  `max_attempts` writes is dead-lettered instead.
+
+Without a spill file, rows that cannot be written are dead-lettered (or
+logged, if there is no dead-letter file either).
+
+Rows must be JSON serializable: they are spilled to disk as JSON lines.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+# rows tried one by one after a failed batch before the database is taken to be down
+OUTAGE_PROBE_ROWS = 3
+
+
+class WriteBehindLogger:
+
+    def __init__(self, write_batch, max_queue=10000, batch_size=500,
+                 flush_interval=1.0, block_timeout=0.05, spill_path=None,
+                 dead_letter_path=None, max_attempts=10, max_replay_delay=300.0):
+
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+        self.dead_letter_path = dead_letter_path or (f"{spill_path}.dead" if spill_path else None)
+        self.max_attempts = max_attempts
+        self.max_replay_delay = max_replay_delay
+
+        # consecutive replays that wrote nothing, and when the next one may run
+        self.replay_failures = 0
+        self.next_replay_at = 0.0
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.spill_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stopping = threading.Event()
+
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "dropped": 0,
+            "dead_lettered": 0,
+            "failed_flushes": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+
+        self.thread = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+
+        atexit.register(self.close)
+
+    # ---------------- producer side
+
+    def submit(self, rows):
+        """Queue rows for writing. Returns False if any row was spilled or dropped."""
+
+        self.ensure_started()
+
+        accepted = True
+
+        for row in rows:
+            try:
+                self.queue.put(row, timeout=self.block_timeout)
+                self.count("enqueued")
+            except queue.Full:
+                if self.spill_path:
+                    self.spill([(row, 0)])
+                else:
+                    self.count("dropped")
+                    logger.warning("Write-behind queue full, dropped 1 row")
+                accepted = False
+
+        return accepted
+
+    def spill(self, entries):
+        """Appends (row, failed attempts) pairs to the spill file"""
+
+        if not entries:
+            return
+
+        self.append_lines(self.spill_path, [{"attempts": attempts, "row": row} for row, attempts in entries])
+
+        self.count("spilled", len(entries))
+
+    def retry_later(self, entries):
+        """Spills rows whose write failed, or dead-letters them after max_attempts"""
+
+        entries = [(row, attempts + 1) for row, attempts in entries]
+
+        if self.spill_path:
+            self.dead_letter([row for row, attempts in entries if attempts >= self.max_attempts])
+            self.spill([(row, attempts) for row, attempts in entries if attempts < self.max_attempts])
+        else:
+            self.dead_letter([row for row, _ in entries])
+
+    def dead_letter(self, rows):
+        """Rows that are given up on: kept in dead_letter_path, which is never replayed"""
+
+        if not rows:
+            return
+
+        self.count("dead_lettered", len(rows))
+
+        if self.dead_letter_path:
+            self.append_lines(self.dead_letter_path, rows)
+            logger.error("Write-behind gave up on %d rows, kept in %s", len(rows), self.dead_letter_path)
+        else:
+            logger.error("Write-behind gave up on %d rows: %s", len(rows), json.dumps(rows, default=str))
+
+    def append_lines(self, path, values):
+
+        with self.spill_lock:
+            with open(path, "a", encoding="utf-8") as f:
+                for value in values:
+                    f.write(json.dumps(value, default=str) + "\n")
+
+    # ---------------- flusher thread
+
+    def ensure_started(self):
+        """Start the flusher on first use, and again in a forked worker process."""
+
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+
+        with self.start_lock:
+            if self.pid != os.getpid() or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+                self.thread.start()
+                self.pid = os.getpid()
+
+    def run(self):
+
+        while not (self.stopping.is_set() and self.queue.empty()):
+
+            batch = self.take_batch()
+
+            if batch:
+                self.flush_batch([(row, 0) for row in batch])
+            elif not self.stopping.is_set() and time.monotonic() >= self.next_replay_at:
+                try:
+                    self.replay_spill()
+                except Exception:
+                    logger.exception("Write-behind spill replay failed")
+
+    def take_batch(self):
+
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def flush_batch(self, entries):
+        """
+        Writes a batch of (row, failed attempts) pairs. Returns False when
+        nothing could be written (the database looks unavailable).
+        """
+
+        started = time.perf_counter()
+
+        try:
+            self.write_batch([row for row, _ in entries])
+        except Exception:
+            logger.exception("Write-behind flush of %d rows failed", len(entries))
+            self.count("failed_flushes")
+            return self.write_rows_individually(entries)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self.stats_lock:
+            self.stats["written"] += len(entries)
+            self.stats["flushes"] += 1
+            self.stats["last_flush_ms"] = elapsed_ms
+            self.stats["total_flush_ms"] += elapsed_ms
+            self.stats["max_flush_ms"] = max(self.stats["max_flush_ms"], elapsed_ms)
+
+        return True
+
+    def write_rows_individually(self, entries):
+        """After a failed batch: good rows are written, bad ones dead-lettered"""
+
+        written = 0
+        failed = []
+
+        for index, (row, attempts) in enumerate(entries):
+
+            if not written and len(failed) >= OUTAGE_PROBE_ROWS:
+                # nothing gets through: retry all of them later, the rows that
+                # failed last so they cannot hold the others back again
+                self.retry_later(entries[index:] + failed)
+                return False
+
+            try:
+                self.write_batch([row])
+                written += 1
+            except Exception:
+                failed.append((row, attempts))
+
+        self.count("written", written)
+
+        if written:
+            self.dead_letter([row for row, _ in failed])
+        else:
+            self.retry_later(failed)
+
+        return written > 0
+
+    def replay_spill(self):
+        """Write spilled rows back once the queue has room again."""
+
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+
+        # several workers may share one spill file; os.replace hands it to exactly one
+        replay_path = f"{self.spill_path}.{os.getpid()}.replay"
+
+        with self.spill_lock:
+            try:
+                os.replace(self.spill_path, replay_path)
+            except FileNotFoundError:
+                return
+
+        with open(replay_path, encoding="utf-8") as f:
+            entries = [spilled_entry(json.loads(line)) for line in f if line.strip()]
+
+        os.remove(replay_path)
+
+        self.count("replayed", len(entries))
+
+        for start in range(0, len(entries), self.batch_size):
+            if not self.flush_batch(entries[start:start + self.batch_size]):
+                # the database is unavailable: keep the rest for the next replay
+                self.spill(entries[start + self.batch_size:])
+                self.back_off()
+                return
+
+        self.replay_failures = 0
+        self.next_replay_at = 0.0
+
+    def back_off(self):
+
+        self.replay_failures += 1
+        delay = min(self.flush_interval * 2 ** self.replay_failures, self.max_replay_delay)
+        self.next_replay_at = time.monotonic() + delay
+
+    # ---------------- lifecycle
+
+    def close(self, timeout=10.0):
+        """Write everything still queued, then stop the flusher thread."""
+
+        self.stopping.set()
+
+        if self.thread is not None and self.pid == os.getpid():
+            self.thread.join(timeout)
+
+    def count(self, name, amount=1):
+
+        if not amount:
+            return
+
+        with self.stats_lock:
+            self.stats[name] += amount
+
+    def metrics(self):
+
+        with self.stats_lock:
+            stats = dict(self.stats)
+
+        flushes = stats.pop("flushes")
+        total_flush_ms = stats.pop("total_flush_ms")
+
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "flushes": flushes,
+            "avg_flush_ms": round(total_flush_ms / flushes, 3) if flushes else 0.0,
+            **stats
+        }
+
+
+def spilled_entry(value):
+    """(row, failed attempts) from a spill file line; older files hold bare rows"""
+
+    if isinstance(value, dict) and set(value) == {"attempts", "row"}:
+        return value["row"], value["attempts"]
+
+    return value, 0
@@ -1,33 +1,35 @@
-from flask import Flask, request, jsonify, send_file, make_response, render_template
+from flask import Flask, Response, request, jsonify, send_file, render_template, stream_with_context
 import pandas as pd
 import joblib
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+import hmac
 import io
-from datetime import datetime
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-from reportlab.lib.units import inch
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import base64
+from datetime import date, datetime, timedelta
+from functools import lru_cache, partial
+import itertools
+import tempfile
+import click
 import os
-import os
-import joblib
-import pandas as pd
-from flask import Flask, request, jsonify, render_template
-from flask_cors import CORS
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, inspect
 from pathlib import Path
 from dotenv import load_dotenv
+from Backend.write_behind import WriteBehindLogger
+from Backend.batch_input import BatchError, ndjson_lines, read_profiles
+from Backend.exports import (
+    EXPORT_FORMATS, ExportError, csv_file, csv_lines, export_format, iter_chunks, iter_rows,
+    parquet_file, recommendation_summary, top_materials, xlsx_file
+)
+from Backend.report_jobs import ReportJobs
+from Backend.model_registry import ModelRegistry, RegistryError
+from Backend.migrations import ensure_indexes
+from Backend.query_filters import FilterError, day_conditions, filters_key, parse_filters, parse_granularity, time_conditions
+from Backend.rollups import archive_rows, coarser_rows, increment_totals, period_filters, rollup_rows
+from Backend.prediction_table import PREDICTION_TABLE
+from model_pipeline import ModelPipeline, minmax_normalize
 
 # ---------------------------------------------------
 # 1️⃣ CONFIGURATION
@@ -51,6 +53,15 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db = SQLAlchemy(app)
 
+# x-api-key for the admin endpoints (/api/metrics, /api/models, /models); they
+# answer 401 when API_KEY is not set
+API_KEY = os.environ.get("API_KEY")
+
+
+def is_authorized():
+    key = request.headers.get("x-api-key")
+    return bool(API_KEY) and hmac.compare_digest(key or "", API_KEY)
+
 # Database Model
 class Recommendation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -63,25 +74,244 @@ class Recommendation(db.Model):
     predicted_co2 = db.Column(db.Float)
     suitability_score = db.Column(db.Float)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    
+    # date-range and category filters on the dashboard and exports
+    __table_args__ = (
+        db.Index('ix_recommendation_created_at', 'created_at'),
+        db.Index('ix_recommendation_category_created_at', 'product_category', 'created_at'),
+    )
+
+# Material specs from the materials CSV, kept as a table so the dashboard
+# queries can join them instead of merging with df_materials in pandas
+class MaterialSpec(db.Model):
+    __tablename__ = "material_spec"
+    material_name = db.Column(db.String(100), primary_key=True)
+    biodegradibility_score = db.Column(db.Float)
+    recyclability_percentage = db.Column(db.Float)
+
+# Raw rows past the retention window, moved here by `flask archive-recommendations`
+class RecommendationArchive(db.Model):
+    __tablename__ = "recommendation_archive"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    product_category = db.Column(db.String(50))
+    fragility = db.Column(db.String(20))
+    shipping_type = db.Column(db.String(20))
+    sustainability_priority = db.Column(db.String(20))
+    material_name = db.Column(db.String(100))
+    predicted_cost = db.Column(db.Float)
+    predicted_co2 = db.Column(db.Float)
+    suitability_score = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, index=True)
+
+# Day / week / month totals per category, updated with every insert so the
+# trend charts read one row per period (see Backend/rollups.py)
+class DailyStats(db.Model):
+    __tablename__ = "recommendation_daily_stats"
+    day = db.Column(db.Date, primary_key=True)
+    product_category = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)
+
+class WeeklyStats(db.Model):
+    __tablename__ = "recommendation_weekly_stats"
+    week = db.Column(db.Date, primary_key=True)
+    product_category = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)
+
+class MonthlyStats(db.Model):
+    __tablename__ = "recommendation_monthly_stats"
+    month = db.Column(db.Date, primary_key=True)
+    product_category = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_co2 = db.Column(db.Float, nullable=False, default=0.0)
+
+# granularity -> rollup table, whose period column has the granularity's name
+ROLLUP_MODELS = {
+    "day": DailyStats,
+    "week": WeeklyStats,
+    "month": MonthlyStats
+}
 
 # Create tables on application startup (works with gunicorn)
 try:
     with app.app_context():
         db.create_all()
+        # indexes added after the table was first created
+        ensure_indexes(db.engine, Recommendation.__table__)
         print("✅ Database tables initialized!")
 except Exception as e:
     print(f"⚠️  Note: Table creation will be attempted again on startup: {e}")
 
+# gunicorn.conf.py preloads the app in the master: forked workers drop the
+# master's pooled connections and open their own
+with app.app_context():
+    os.register_at_fork(after_in_child=partial(db.engine.dispose, close=False))
+
 # Load materials and models
+# The materials catalog is fixed for the life of the process: the filter
+# masks, baselines, material_spec rows and /api rankings are all built from
+# this one read, so replacing the CSV takes a restart.
 df_materials = pd.read_csv("ecopackai_frozen_materials.csv")
-co2_model = joblib.load("models/co2_model.pkl")
-cost_model = joblib.load("models/cost_model.pkl")
+
+
+def load_api_models(paths):
+    pipeline = ModelPipeline.load(paths["feature_scaler.pkl"], paths["cost_model.pkl"], paths["co2_model.pkl"])
+
+    # PREDICTION_TABLE=grid|rows: predictions for the catalog's feature values
+    # are computed once per model version and looked up per request
+    if PREDICTION_TABLE != "off":
+        pipeline.use_prediction_table(df_materials, PREDICTION_TABLE)
+
+    return pipeline
+
+
+# Versioned /api models (see Backend/model_registry.py): replaced files in
+# models/ are loaded, probed and swapped in by a background thread
+api_model_registry = ModelRegistry(
+    "models",
+    ["feature_scaler.pkl", "cost_model.pkl", "co2_model.pkl"],
+    load_api_models,
+    ModelPipeline.probe,
+    poll_seconds=float(os.environ.get("MODEL_POLL_SECONDS", 30))
+)
 
 # Baseline values for comparison (average of all materials)
 BASELINE_CO2 = df_materials['co2_score'].mean()  # ~4.14
 BASELINE_COST = df_materials['cost'].mean()  # ~4.96
 
 
+def sync_material_specs():
+    """Replace the material_spec rows when they differ from df_materials"""
+    specs = [{
+        "material_name": row["material_name"],
+        "biodegradibility_score": float(row["biodegradibility_score"]),
+        "recyclability_percentage": float(row["recyclability_percentage"])
+    } for row in df_materials.to_dict("records")]
+    
+    with app.app_context():
+        current = [
+            {"material_name": m.material_name, "biodegradibility_score": m.biodegradibility_score,
+             "recyclability_percentage": m.recyclability_percentage}
+            for m in MaterialSpec.query.order_by(MaterialSpec.material_name)
+        ]
+        if current == sorted(specs, key=lambda spec: spec["material_name"]):
+            return
+        
+        try:
+            MaterialSpec.query.delete()
+            db.session.execute(db.insert(MaterialSpec), specs)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+try:
+    sync_material_specs()
+except Exception as e:
+    # another worker may be syncing the same rows at startup
+    print(f"⚠️  Note: material_spec table not synced: {e}")
+
+
+def rebuild_rollups():
+    """Recompute the day/week/month rollups from the raw and archived rows"""
+    columns = ("product_category", "predicted_cost", "predicted_co2", "created_at")
+    history = db.union_all(
+        db.select(*(getattr(Recommendation, name) for name in columns)),
+        db.select(*(getattr(RecommendationArchive, name) for name in columns))
+    ).subquery()
+    
+    day = db.func.date(history.c.created_at)
+    category = db.func.coalesce(history.c.product_category, "")
+    daily_rows = [{
+        "day": date.fromisoformat(str(row_day)[:10]),
+        "product_category": row_category,
+        "count": count,
+        "total_cost": total_cost,
+        "total_co2": total_co2
+    } for row_day, row_category, count, total_cost, total_co2 in db.session.query(
+        day,
+        category,
+        db.func.count(),
+        db.func.coalesce(db.func.sum(history.c.predicted_cost), 0.0),
+        db.func.coalesce(db.func.sum(history.c.predicted_co2), 0.0)
+    ).filter(history.c.created_at.isnot(None)).group_by(day, category).all()]
+    
+    try:
+        for model in ROLLUP_MODELS.values():
+            model.query.delete()
+        db.session.add_all(DailyStats(**row) for row in daily_rows)
+        for granularity in ("week", "month"):
+            model = ROLLUP_MODELS[granularity]
+            db.session.add_all(model(**row) for row in coarser_rows(daily_rows, granularity))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    rebuild_rollups()
+
+
+# existing databases: fill the rollups once from history
+try:
+    with app.app_context():
+        if WeeklyStats.query.first() is None and Recommendation.query.first() is not None:
+            rebuild_rollups()
+except Exception as e:
+    # another worker may be rebuilding at startup
+    print(f"⚠️  Note: rollup tables not rebuilt: {e}")
+
+
+# Retention: raw rows older than RECOMMENDATION_RETENTION_DAYS move to
+# recommendation_archive. Trends come from the rollups and keep the full
+# history; the other dashboard figures and exports cover the remaining rows.
+RECOMMENDATION_RETENTION_DAYS = int(os.environ.get("RECOMMENDATION_RETENTION_DAYS", 365))
+
+
+@app.cli.command("archive-recommendations")
+@click.option("--days", type=int, default=RECOMMENDATION_RETENTION_DAYS, show_default=True,
+              help="archive raw rows older than this many days")
+def archive_recommendations_command(days):
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = archive_rows(db.session, Recommendation, RecommendationArchive, cutoff)
+    click.echo(f"Archived {archived} recommendations older than {days} days")
+
+# Filter masks for /api, computed once over df_materials
+_strength = df_materials["strength"].to_numpy()
+API_FILTER_MASKS = {
+    "fragility": {
+        "high": _strength >= 3,
+        "medium": _strength >= 2
+    },
+    "category": {
+        "food": df_materials["biodegradibility_score"].to_numpy() >= 7,
+        "electronics": _strength >= 2
+    },
+    "shipping": {
+        "international": _strength >= 2
+    }
+}
+
+
+def select_api_materials(prod_cat, fragility, ship_type):
+    """Row positions in df_materials matching the /api constraints"""
+    mask = np.ones(len(df_materials), dtype=bool)
+
+    for kind, value in (("fragility", fragility), ("category", prod_cat), ("shipping", ship_type)):
+        rule_mask = API_FILTER_MASKS[kind].get(value)
+        if rule_mask is not None:
+            mask &= rule_mask
+
+    return np.flatnonzero(mask)
+
+
 @app.route("/", methods=["GET"])
 def home():
     """Serve the main recommendation page"""
@@ -93,6 +323,302 @@ def dashboard_page():
     return render_template('dashboard.html')
 
 
+def dashboard_aggregates(filters=None, granularity="day"):
+    """
+    GROUP BY queries shared by the analytics and charts endpoints; the database
+    returns one row per material, date and category instead of the full table.
+    filters (see Backend/query_filters.py) restrict them to a date range and/or
+    category. Trends (by_date) come from the day, week or month rollup table.
+    Returns None when there are no matching recommendations.
+    """
+    count = db.func.count(Recommendation.id)
+    conditions = time_conditions(Recommendation.created_at, Recommendation.product_category, filters)
+    
+    totals = db.session.query(
+        count,
+        db.func.count(db.func.distinct(Recommendation.material_name)),
+        db.func.avg(Recommendation.predicted_co2),
+        db.func.avg(Recommendation.predicted_cost),
+        db.func.avg(Recommendation.suitability_score)
+    ).filter(*conditions).one()
+    
+    if not totals[0]:
+        return None
+    
+    # first_id keeps pandas value_counts tie order (first occurrence)
+    by_material = pd.DataFrame(
+        db.session.query(
+            Recommendation.material_name,
+            count,
+            db.func.min(Recommendation.id),
+            db.func.avg(Recommendation.suitability_score),
+            db.func.avg(Recommendation.predicted_co2),
+            db.func.avg(Recommendation.predicted_cost),
+            MaterialSpec.biodegradibility_score
+        )
+        .outerjoin(MaterialSpec, MaterialSpec.material_name == Recommendation.material_name)
+        .filter(Recommendation.material_name.isnot(None), *conditions)
+        .group_by(Recommendation.material_name, MaterialSpec.biodegradibility_score)
+        .all(),
+        columns=['material_name', 'count', 'first_id', 'avg_suitability', 'avg_co2', 'avg_cost', 'biodegradibility_score']
+    )
+    
+    rollup = ROLLUP_MODELS[granularity]
+    period = getattr(rollup, granularity)
+    by_date = pd.DataFrame(
+        db.session.query(
+            period,
+            db.func.sum(rollup.total_co2) / db.func.sum(rollup.count),
+            db.func.sum(rollup.total_cost) / db.func.sum(rollup.count),
+            db.func.sum(rollup.count)
+        )
+        .filter(*day_conditions(period, rollup.product_category, period_filters(filters, granularity)))
+        .group_by(period)
+        .all(),
+        columns=['date', 'avg_co2', 'avg_cost', 'recommendation_count']
+    )
+    by_date['date'] = by_date['date'].astype(str)
+    
+    by_category = pd.DataFrame(
+        db.session.query(
+            Recommendation.product_category,
+            db.func.avg(Recommendation.predicted_co2),
+            db.func.avg(Recommendation.predicted_cost),
+            db.func.count(Recommendation.material_name)
+        )
+        .filter(Recommendation.product_category.isnot(None), *conditions)
+        .group_by(Recommendation.product_category)
+        .all(),
+        columns=['product_category', 'predicted_co2', 'predicted_cost', 'material_name']
+    )
+    
+    # same key order as pandas groupby, independent of the database collation
+    return {
+        "total_recommendations": totals[0],
+        "unique_materials": totals[1],
+        "avg_co2": totals[2],
+        "avg_cost": totals[3],
+        "avg_suitability": totals[4],
+        "by_material": by_material.sort_values('material_name').reset_index(drop=True),
+        "by_date": by_date.sort_values('date').reset_index(drop=True),
+        "by_category": by_category.sort_values('product_category').reset_index(drop=True)
+    }
+
+
+def material_counts(aggregates):
+    """Recommendation count per material, like df['material_name'].value_counts()"""
+    by_first_use = aggregates["by_material"].sort_values('first_id')
+    return pd.Series(
+        by_first_use['count'].to_numpy(),
+        index=by_first_use['material_name'].to_numpy()
+    ).sort_values(ascending=False, kind="stable")
+
+
+def build_analytics_data(aggregates):
+    """
+    Analytics payload (summary cards, usage, trends, breakdowns) from dashboard_aggregates()
+    """
+    total = aggregates["total_recommendations"]
+    by_material = aggregates["by_material"]
+    
+    
+    # 1. MATERIAL USAGE COUNT
+    
+    material_usage = material_counts(aggregates).head(10).to_dict()
+    
+    
+    # 2. CO2 REDUCTION PERCENTAGE
+    
+    avg_predicted_co2 = aggregates["avg_co2"]
+    co2_reduction_percent = ((BASELINE_CO2 - avg_predicted_co2) / BASELINE_CO2) * 100
+    total_co2_saved = (BASELINE_CO2 - avg_predicted_co2) * total
+    
+    
+    # 3. COST SAVINGS
+    
+    avg_predicted_cost = aggregates["avg_cost"]
+    cost_savings_percent = ((BASELINE_COST - avg_predicted_cost) / BASELINE_COST) * 100
+    total_cost_saved = (BASELINE_COST - avg_predicted_cost) * total
+    
+    
+    # 4. ECO-FRIENDLY MATERIALS DISTRIBUTION
+    
+    # biodegradability comes from the material_spec join
+    eco_friendly_count = int(by_material.loc[by_material['biodegradibility_score'] >= 7, 'count'].sum())
+    non_eco_count = int(by_material.loc[by_material['biodegradibility_score'] < 7, 'count'].sum())
+    
+    
+    # 5. TRENDS OVER TIME
+    
+    daily_trends = aggregates["by_date"]
+    
+    
+    # 6. CATEGORY BREAKDOWN
+    
+    category_breakdown = aggregates["by_category"].set_index('product_category').round(2).to_dict()
+    
+    
+    # 7. TOP PERFORMING MATERIALS
+    
+    top_materials = by_material.set_index('material_name')[
+        ['avg_suitability', 'avg_co2', 'avg_cost', 'count']
+    ].round(3)
+    top_materials.columns = ['avg_suitability', 'avg_co2', 'avg_cost', 'times_recommended']
+    top_materials = top_materials.sort_values('avg_suitability', ascending=False).head(10)
+    
+    # Prepare response
+    analytics_data = {
+        "summary_cards": {
+            "total_recommendations": total,
+            "unique_materials_used": aggregates["unique_materials"],
+            "co2_reduction_percent": round(co2_reduction_percent, 2),
+            "total_co2_saved": round(total_co2_saved, 2),
+            "cost_savings_percent": round(cost_savings_percent, 2),
+            "total_cost_saved": round(total_cost_saved, 2),
+            "avg_suitability_score": round(aggregates["avg_suitability"] * 100, 1),
+            "eco_friendly_percentage": round((eco_friendly_count / total) * 100, 1)
+        },
+        "material_usage": material_usage,
+        "eco_distribution": {
+            "eco_friendly": eco_friendly_count,
+            "non_eco_friendly": non_eco_count
+        },
+        "trends": daily_trends.to_dict('records'),
+        "category_breakdown": category_breakdown,
+        "top_materials": top_materials.reset_index().to_dict('records')
+    }
+    
+    return analytics_data
+
+
+def build_charts_data(aggregates):
+    """
+    Chart series for the dashboard from dashboard_aggregates()
+    """
+    by_material = aggregates["by_material"]
+    
+    charts_data = {}
+    
+    
+    # CHART 1: Material Usage Bar Chart
+    
+    material_counts_top = material_counts(aggregates).head(10)
+    charts_data['material_usage'] = {
+        'labels': material_counts_top.index.tolist(),
+        'values': material_counts_top.values.tolist()
+    }
+    
+    
+    # CHART 2: Eco-Friendly Distribution
+    
+    # materials without a spec count as non-eco, as in the old pandas merge
+    is_eco = by_material['biodegradibility_score'] >= 7
+    eco_groups = pd.DataFrame({
+        'label': np.where(is_eco, 'Eco-Friendly (≥7)', 'Non-Eco (<7)'),
+        'count': by_material['count'],
+        'first_id': by_material['first_id']
+    }).groupby('label').agg({'count': 'sum', 'first_id': 'min'}).sort_values('first_id')
+    eco_counts = eco_groups['count'].sort_values(ascending=False, kind="stable")
+    charts_data['eco_distribution'] = {
+        'labels': eco_counts.index.tolist(),
+        'values': eco_counts.values.tolist()
+    }
+    
+    
+    # CHART 3: CO2 Reduction Trend
+    
+    by_date = aggregates["by_date"]
+    charts_data['co2_trend'] = {
+        'dates': by_date['date'].tolist(),
+        'values': (((BASELINE_CO2 - by_date['avg_co2']) / BASELINE_CO2) * 100).tolist()
+    }
+    
+    
+    # CHART 4: Cost Savings Trend
+    
+    charts_data['cost_trend'] = {
+        'dates': by_date['date'].tolist(),
+        'values': (BASELINE_COST - by_date['avg_cost']).tolist()
+    }
+    
+    
+    # CHART 5: Top Materials Ranking
+    
+    top_materials = by_material.set_index('material_name')[['avg_suitability']].sort_values(
+        'avg_suitability', ascending=True
+    ).tail(10)
+    charts_data['top_materials'] = {
+        'labels': top_materials.index.tolist(),
+        'values': (top_materials['avg_suitability'] * 100).tolist()
+    }
+    
+    
+    # CHART 6: Category Comparison
+    
+    category_stats = aggregates["by_category"]
+    charts_data['category_comparison'] = {
+        'categories': category_stats['product_category'].tolist(),
+        'co2_values': category_stats['predicted_co2'].round(2).tolist(),
+        'cost_values': category_stats['predicted_cost'].round(2).tolist()
+    }
+    
+    return charts_data
+
+
+# Analytics snapshots: aggregates + both payloads, built once per data version,
+# filter combination and trend granularity. The version (recommendation_data_version)
+# is re-checked at most every ANALYTICS_TTL_SECONDS, so the dashboard may lag new
+# rows by that long.
+ANALYTICS_TTL_SECONDS = float(os.environ.get("ANALYTICS_TTL_SECONDS", 10))
+ANALYTICS_SNAPSHOT_LIMIT = 32
+
+analytics_snapshots = {}  # (filters_key(filters), granularity) -> {"version", "checked_at", "data"}
+analytics_lock = threading.Lock()
+
+
+def get_dashboard_snapshot(filters=None, granularity="day", max_age=None):
+    """
+    {"aggregates", "analytics", "charts"} for the current data, or None when
+    there are no matching recommendations. max_age=0 always re-checks the data version.
+    """
+    if max_age is None:
+        max_age = ANALYTICS_TTL_SECONDS
+    
+    key = (filters_key(filters), granularity)
+    analytics_snapshot = analytics_snapshots.get(key)
+    
+    if analytics_snapshot and time.monotonic() - analytics_snapshot["checked_at"] < max_age:
+        return analytics_snapshot["data"]
+    
+    with analytics_lock:
+        analytics_snapshot = analytics_snapshots.get(key)
+        
+        if analytics_snapshot is None:
+            # oldest filter combination makes room; the unfiltered one is rebuilt on demand
+            if len(analytics_snapshots) >= ANALYTICS_SNAPSHOT_LIMIT:
+                analytics_snapshots.pop(next(iter(analytics_snapshots)))
+            analytics_snapshot = {"version": None, "checked_at": 0.0, "data": None}
+            analytics_snapshots[key] = analytics_snapshot
+        
+        if time.monotonic() - analytics_snapshot["checked_at"] < max_age:
+            return analytics_snapshot["data"]
+        
+        version = recommendation_data_version()
+        
+        if version != analytics_snapshot["version"]:
+            aggregates = dashboard_aggregates(filters, granularity)
+            analytics_snapshot["data"] = aggregates and {
+                "aggregates": aggregates,
+                "analytics": build_analytics_data(aggregates),
+                "charts": build_charts_data(aggregates)
+            }
+            analytics_snapshot["version"] = version
+        
+        analytics_snapshot["checked_at"] = time.monotonic()
+        
+        return analytics_snapshot["data"]
+
+
 @app.route("/api/dashboard/analytics", methods=["GET"])
 def get_dashboard_analytics():
     """
@@ -100,120 +626,25 @@ def get_dashboard_analytics():
     Returns: Material usage, CO2 reduction, cost savings, trends
     """
     try:
-        # Get all recommendations from database
-        recommendations = Recommendation.query.all()
+        snapshot = get_dashboard_snapshot(
+            parse_filters(request.args),
+            parse_granularity(request.args, ROLLUP_MODELS)
+        )
         
-        if not recommendations:
+        if snapshot is None:
             return jsonify({
                 "status": "success",
                 "message": "No data available yet. Make some recommendations first!",
                 "data": None
             })
         
-        # Convert to DataFrame for analysis
-        df = pd.DataFrame([{
-            'material_name': r.material_name,
-            'predicted_cost': r.predicted_cost,
-            'predicted_co2': r.predicted_co2,
-            'suitability_score': r.suitability_score,
-            'product_category': r.product_category,
-            'sustainability_priority': r.sustainability_priority,
-            'created_at': r.created_at
-        } for r in recommendations])
-        
-     
-        # 1. MATERIAL USAGE COUNT
-
-        material_usage = df['material_name'].value_counts().head(10).to_dict()
-        
-        
-        # 2. CO2 REDUCTION PERCENTAGE
-        
-        avg_predicted_co2 = df['predicted_co2'].mean()
-        co2_reduction_percent = ((BASELINE_CO2 - avg_predicted_co2) / BASELINE_CO2) * 100
-        total_co2_saved = (BASELINE_CO2 - avg_predicted_co2) * len(df)
-        
-        
-        # 3. COST SAVINGS
-        
-        avg_predicted_cost = df['predicted_cost'].mean()
-        cost_savings_percent = ((BASELINE_COST - avg_predicted_cost) / BASELINE_COST) * 100
-        total_cost_saved = (BASELINE_COST - avg_predicted_cost) * len(df)
-        
-        
-        # 4. ECO-FRIENDLY MATERIALS DISTRIBUTION
-        
-        # Merge with materials data to get biodegradability
-        df_with_specs = df.merge(
-            df_materials[['material_name', 'biodegradibility_score', 'recyclability_percentage']], 
-            on='material_name', 
-            how='left'
-        )
-        
-        eco_friendly_count = len(df_with_specs[df_with_specs['biodegradibility_score'] >= 7])
-        non_eco_count = len(df_with_specs[df_with_specs['biodegradibility_score'] < 7])
-        
-        
-        # 5. TRENDS OVER TIME
-        
-        df['date'] = pd.to_datetime(df['created_at']).dt.date
-        daily_trends = df.groupby('date').agg({
-            'predicted_co2': 'mean',
-            'predicted_cost': 'mean',
-            'material_name': 'count'
-        }).reset_index()
-        
-        daily_trends.columns = ['date', 'avg_co2', 'avg_cost', 'recommendation_count']
-        daily_trends['date'] = daily_trends['date'].astype(str)
-        
-        
-        # 6. CATEGORY BREAKDOWN
-        
-        category_breakdown = df.groupby('product_category').agg({
-            'predicted_co2': 'mean',
-            'predicted_cost': 'mean',
-            'material_name': 'count'
-        }).round(2).to_dict()
-        
-        
-        # 7. TOP PERFORMING MATERIALS
-        
-        top_materials = df.groupby('material_name').agg({
-            'suitability_score': 'mean',
-            'predicted_co2': 'mean',
-            'predicted_cost': 'mean',
-            'material_name': 'count'
-        }).round(3)
-        top_materials.columns = ['avg_suitability', 'avg_co2', 'avg_cost', 'times_recommended']
-        top_materials = top_materials.sort_values('avg_suitability', ascending=False).head(10)
-        
-        # Prepare response
-        analytics_data = {
-            "summary_cards": {
-                "total_recommendations": len(df),
-                "unique_materials_used": df['material_name'].nunique(),
-                "co2_reduction_percent": round(co2_reduction_percent, 2),
-                "total_co2_saved": round(total_co2_saved, 2),
-                "cost_savings_percent": round(cost_savings_percent, 2),
-                "total_cost_saved": round(total_cost_saved, 2),
-                "avg_suitability_score": round(df['suitability_score'].mean() * 100, 1),
-                "eco_friendly_percentage": round((eco_friendly_count / len(df)) * 100, 1)
-            },
-            "material_usage": material_usage,
-            "eco_distribution": {
-                "eco_friendly": eco_friendly_count,
-                "non_eco_friendly": non_eco_count
-            },
-            "trends": daily_trends.to_dict('records'),
-            "category_breakdown": category_breakdown,
-            "top_materials": top_materials.reset_index().to_dict('records')
-        }
-        
         return jsonify({
             "status": "success",
-            "data": analytics_data
+            "data": snapshot["analytics"]
         })
         
+    except FilterError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -228,102 +659,59 @@ def get_dashboard_charts():
     Returns: JSON data for charts
     """
     try:
-        recommendations = Recommendation.query.all()
+        snapshot = get_dashboard_snapshot(
+            parse_filters(request.args),
+            parse_granularity(request.args, ROLLUP_MODELS)
+        )
         
-        if not recommendations:
+        if snapshot is None:
             return jsonify({
                 "status": "error",
                 "message": "No data available"
             }), 404
         
-        df = pd.DataFrame([{
-            'material_name': r.material_name,
-            'predicted_cost': r.predicted_cost,
-            'predicted_co2': r.predicted_co2,
-            'suitability_score': r.suitability_score,
-            'product_category': r.product_category,
-            'created_at': r.created_at
-        } for r in recommendations])
-        
-        # Merge with material specs
-        df_with_specs = df.merge(
-            df_materials[['material_name', 'biodegradibility_score', 'recyclability_percentage']], 
-            on='material_name', 
-            how='left'
-        )
-        
-        charts_data = {}
-        
-        
-        # CHART 1: Material Usage Bar Chart
-        
-        material_counts = df['material_name'].value_counts().head(10)
-        charts_data['material_usage'] = {
-            'labels': material_counts.index.tolist(),
-            'values': material_counts.values.tolist()
-        }
-        
-        
-        # CHART 2: Eco-Friendly Distribution
-        
-        eco_counts = df_with_specs['biodegradibility_score'].apply(
-            lambda x: 'Eco-Friendly (≥7)' if x >= 7 else 'Non-Eco (<7)'
-        ).value_counts()
-        charts_data['eco_distribution'] = {
-            'labels': eco_counts.index.tolist(),
-            'values': eco_counts.values.tolist()
-        }
-        
-        
-        # CHART 3: CO2 Reduction Trend
-        
-        df['date'] = pd.to_datetime(df['created_at']).dt.date
-        daily_co2 = df.groupby('date')['predicted_co2'].mean().reset_index()
-        daily_co2['co2_reduction'] = ((BASELINE_CO2 - daily_co2['predicted_co2']) / BASELINE_CO2) * 100
-        charts_data['co2_trend'] = {
-            'dates': [str(d) for d in daily_co2['date'].tolist()],
-            'values': daily_co2['co2_reduction'].tolist()
-        }
-        
-        
-        # CHART 4: Cost Savings Trend
-        
-        daily_cost = df.groupby('date')['predicted_cost'].mean().reset_index()
-        daily_cost['cost_savings'] = BASELINE_COST - daily_cost['predicted_cost']
-        charts_data['cost_trend'] = {
-            'dates': [str(d) for d in daily_cost['date'].tolist()],
-            'values': daily_cost['cost_savings'].tolist()
-        }
-        
-        
-        # CHART 5: Top Materials Ranking
-        
-        top_materials = df.groupby('material_name').agg({
-            'suitability_score': 'mean'
-        }).sort_values('suitability_score', ascending=True).tail(10)
-        charts_data['top_materials'] = {
-            'labels': top_materials.index.tolist(),
-            'values': (top_materials['suitability_score'] * 100).tolist()
-        }
-        
+        return jsonify({
+            "status": "success",
+            "data": snapshot["charts"]
+        })
         
-        # CHART 6: Category Comparison
+    except FilterError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+@app.route("/api/dashboard", methods=["GET"])
+def get_dashboard_data():
+    """
+    Analytics and chart data in one response, so the dashboard loads in a single request
+    """
+    try:
+        snapshot = get_dashboard_snapshot(
+            parse_filters(request.args),
+            parse_granularity(request.args, ROLLUP_MODELS)
+        )
         
-        category_stats = df.groupby('product_category').agg({
-            'predicted_co2': 'mean',
-            'predicted_cost': 'mean'
-        }).reset_index()
-        charts_data['category_comparison'] = {
-            'categories': category_stats['product_category'].tolist(),
-            'co2_values': category_stats['predicted_co2'].round(2).tolist(),
-            'cost_values': category_stats['predicted_cost'].round(2).tolist()
-        }
+        if snapshot is None:
+            return jsonify({
+                "status": "success",
+                "message": "No data available yet. Make some recommendations first!",
+                "data": None
+            })
         
         return jsonify({
             "status": "success",
-            "data": charts_data
+            "data": {
+                "analytics": snapshot["analytics"],
+                "charts": snapshot["charts"]
+            }
         })
         
+    except FilterError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -331,108 +719,129 @@ def get_dashboard_charts():
         }), 500
 
 
+def build_pdf_report(output, filters=None):
+    """
+    Write the sustainability report PDF to output; False when there is no data
+    """
+    # report jobs are keyed on the data version, so never use a snapshot older than it
+    snapshot = get_dashboard_snapshot(filters, max_age=0)
+    
+    if snapshot is None:
+        return False
+    
+    aggregates = snapshot["aggregates"]
+    
+    # Calculate metrics
+    avg_co2 = aggregates['avg_co2']
+    co2_reduction = ((BASELINE_CO2 - avg_co2) / BASELINE_CO2) * 100
+    avg_cost = aggregates['avg_cost']
+    cost_savings = BASELINE_COST - avg_cost
+    
+    # ReportLab is only imported when a PDF is built
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    
+    # Create PDF
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2ecc71'),
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    elements.append(Paragraph("EcoPack AI Sustainability Report", title_style))
+    elements.append(Spacer(1, 20))
+    
+    # Report date
+    date_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    elements.append(Paragraph(date_text, styles['Normal']))
+    
+    start, end, category = filters_key(filters)
+    if start or end or category:
+        filter_text = f"Period: {start or 'start'} to {end or 'today'}"
+        if category:
+            filter_text += f", category: {category}"
+        elements.append(Paragraph(filter_text, styles['Normal']))
+    elements.append(Spacer(1, 30))
+    
+    # Summary Section
+    elements.append(Paragraph("Executive Summary", styles['Heading2']))
+    elements.append(Spacer(1, 10))
+    
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Recommendations', str(aggregates['total_recommendations'])],
+        ['Unique Materials Used', str(aggregates['unique_materials'])],
+        ['Average CO2 Emissions', f"{avg_co2:.2f}"],
+        ['CO2 Reduction vs Baseline', f"{co2_reduction:.2f}%"],
+        ['Average Cost', f"${avg_cost:.2f}"],
+        ['Cost Savings vs Baseline', f"${cost_savings:.2f}"],
+        ['Average Suitability Score', f"{aggregates['avg_suitability']*100:.1f}%"],
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ecc71')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 30))
+    
+    # Top Materials
+    elements.append(Paragraph("Top Recommended Materials", styles['Heading2']))
+    elements.append(Spacer(1, 10))
+    
+    top_materials = snapshot['analytics']['material_usage']
+    materials_data = [['Rank', 'Material', 'Times Recommended']]
+    for idx, (material, count) in enumerate(top_materials.items(), 1):
+        materials_data.append([str(idx), material, str(count)])
+    
+    materials_table = Table(materials_data, colWidths=[0.75*inch, 3*inch, 1.5*inch])
+    materials_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(materials_table)
+    
+    # Build PDF
+    doc.build(elements)
+    
+    return True
+
+
 @app.route("/api/export/pdf", methods=["GET"])
 def export_pdf_report():
     """
     Export sustainability report as PDF
     """
     try:
-        recommendations = Recommendation.query.all()
+        filters = parse_filters(request.args)
+        buffer = io.BytesIO()
         
-        if not recommendations:
+        if not build_pdf_report(buffer, filters):
             return jsonify({"status": "error", "message": "No data to export"}), 404
         
-        df = pd.DataFrame([{
-            'material_name': r.material_name,
-            'predicted_cost': r.predicted_cost,
-            'predicted_co2': r.predicted_co2,
-            'suitability_score': r.suitability_score,
-            'product_category': r.product_category,
-            'created_at': r.created_at
-        } for r in recommendations])
-        
-        # Calculate metrics
-        avg_co2 = df['predicted_co2'].mean()
-        co2_reduction = ((BASELINE_CO2 - avg_co2) / BASELINE_CO2) * 100
-        avg_cost = df['predicted_cost'].mean()
-        cost_savings = BASELINE_COST - avg_cost
-        
-        # Create PDF
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2ecc71'),
-            spaceAfter=30,
-            alignment=1  # Center
-        )
-        elements.append(Paragraph("EcoPack AI Sustainability Report", title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Report date
-        date_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        elements.append(Paragraph(date_text, styles['Normal']))
-        elements.append(Spacer(1, 30))
-        
-        # Summary Section
-        elements.append(Paragraph("Executive Summary", styles['Heading2']))
-        elements.append(Spacer(1, 10))
-        
-        summary_data = [
-            ['Metric', 'Value'],
-            ['Total Recommendations', str(len(df))],
-            ['Unique Materials Used', str(df['material_name'].nunique())],
-            ['Average CO2 Emissions', f"{avg_co2:.2f}"],
-            ['CO2 Reduction vs Baseline', f"{co2_reduction:.2f}%"],
-            ['Average Cost', f"${avg_cost:.2f}"],
-            ['Cost Savings vs Baseline', f"${cost_savings:.2f}"],
-            ['Average Suitability Score', f"{df['suitability_score'].mean()*100:.1f}%"],
-        ]
-        
-        summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ecc71')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(summary_table)
-        elements.append(Spacer(1, 30))
-        
-        # Top Materials
-        elements.append(Paragraph("Top Recommended Materials", styles['Heading2']))
-        elements.append(Spacer(1, 10))
-        
-        top_materials = df['material_name'].value_counts().head(10)
-        materials_data = [['Rank', 'Material', 'Times Recommended']]
-        for idx, (material, count) in enumerate(top_materials.items(), 1):
-            materials_data.append([str(idx), material, str(count)])
-        
-        materials_table = Table(materials_data, colWidths=[0.75*inch, 3*inch, 1.5*inch])
-        materials_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(materials_table)
-        
-        # Build PDF
-        doc.build(elements)
         buffer.seek(0)
         
         return send_file(
@@ -442,76 +851,451 @@ def export_pdf_report():
             mimetype='application/pdf'
         )
         
+    except FilterError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+API_EXPORT_COLUMNS = [
+    ('ID', Recommendation.id),
+    ('Material Name', Recommendation.material_name),
+    ('Product Category', Recommendation.product_category),
+    ('Fragility', Recommendation.fragility),
+    ('Shipping Type', Recommendation.shipping_type),
+    ('Sustainability Priority', Recommendation.sustainability_priority),
+    ('Predicted Cost', Recommendation.predicted_cost),
+    ('Predicted CO2', Recommendation.predicted_co2),
+    ('Suitability Score', Recommendation.suitability_score),
+    ('Recommended At', Recommendation.created_at)
+]
+
+
+def export_conditions(filters):
+    """WHERE conditions for the optional date range / category filters"""
+    return time_conditions(Recommendation.created_at, Recommendation.product_category, filters)
+
+
+def export_statement(filters):
+    return (
+        db.select(*(column for _, column in API_EXPORT_COLUMNS))
+        .where(*export_conditions(filters))
+        .order_by(Recommendation.id)
+    )
+
+
+def build_excel_export(output, fmt, filters=None):
+    """
+    Write the ranking table (or its filtered rows) to output as xlsx, csv or parquet;
+    False when there is no data. Rows are streamed from the database in chunks;
+    see Backend/exports.py
+    """
+    conditions = export_conditions(filters)
+    summary = recommendation_summary(db.session, Recommendation, conditions)
+    
+    if not summary["total"]:
+        return False
+    
+    header = [name for name, _ in API_EXPORT_COLUMNS]
+    stmt = export_statement(filters)
+    
+    if fmt == "csv":
+        csv_file(header, iter_rows(iter_chunks(db.session, stmt)), output)
+    elif fmt == "parquet":
+        parquet_file(header, iter_chunks(db.session, stmt), output)
+    else:
+        xlsx_file([
+            # Full data sheet
+            ('All Recommendations', header, iter_rows(iter_chunks(db.session, stmt))),
+            # Summary sheet
+            ('Summary', ['Metric', 'Value'], [
+                ('Total Recommendations', summary["total"]),
+                ('Unique Materials', summary["unique_materials"]),
+                ('Average CO2', f"{summary['avg_co2']:.2f}"),
+                ('Average Cost', f"${summary['avg_cost']:.2f}"),
+                ('Average Suitability Score', f"{summary['avg_score']*100:.1f}%")
+            ]),
+            # Top materials sheet
+            ('Top Materials', ['Material', 'Count'], top_materials(db.session, Recommendation, conditions))
+        ], output)
+    
+    return True
+
+
 @app.route("/api/export/excel", methods=["GET"])
 def export_excel_report():
     """
-    Export full ranking table as Excel
+    Export full ranking table as Excel (default), CSV or Parquet (?format=csv|parquet),
+    optionally limited with ?start=YYYY-MM-DD&end=YYYY-MM-DD&category=...
     """
     try:
-        recommendations = Recommendation.query.all()
-        
-        if not recommendations:
-            return jsonify({"status": "error", "message": "No data to export"}), 404
+        fmt = export_format(request.args.get("format"))
+        filters = parse_filters(request.args)
+        download_name = f'recommendations_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{fmt}'
         
-        df = pd.DataFrame([{
-            'ID': r.id,
-            'Material Name': r.material_name,
-            'Product Category': r.product_category,
-            'Fragility': r.fragility,
-            'Shipping Type': r.shipping_type,
-            'Sustainability Priority': r.sustainability_priority,
-            'Predicted Cost': r.predicted_cost,
-            'Predicted CO2': r.predicted_co2,
-            'Suitability Score': r.suitability_score,
-            'Recommended At': r.created_at
-        } for r in recommendations])
-        
-        # Create Excel file in memory
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            # Full data sheet
-            df.to_excel(writer, sheet_name='All Recommendations', index=False)
+        if fmt == "csv":
+            if not recommendation_summary(db.session, Recommendation, export_conditions(filters))["total"]:
+                return jsonify({"status": "error", "message": "No data to export"}), 404
             
-            # Summary sheet
-            summary_df = pd.DataFrame({
-                'Metric': [
-                    'Total Recommendations',
-                    'Unique Materials',
-                    'Average CO2',
-                    'Average Cost',
-                    'Average Suitability Score'
-                ],
-                'Value': [
-                    len(df),
-                    df['Material Name'].nunique(),
-                    f"{df['Predicted CO2'].mean():.2f}",
-                    f"${df['Predicted Cost'].mean():.2f}",
-                    f"{df['Suitability Score'].mean()*100:.1f}%"
-                ]
-            })
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+            header = [name for name, _ in API_EXPORT_COLUMNS]
+            stmt = export_statement(filters)
             
-            # Top materials sheet
-            top_materials = df['Material Name'].value_counts().reset_index()
-            top_materials.columns = ['Material', 'Count']
-            top_materials.to_excel(writer, sheet_name='Top Materials', index=False)
+            return Response(
+                stream_with_context(csv_lines(header, iter_rows(iter_chunks(db.session, stmt)))),
+                mimetype=EXPORT_FORMATS["csv"],
+                headers={"Content-Disposition": f"attachment; filename={download_name}"}
+            )
         
-        buffer.seek(0)
+        output = tempfile.TemporaryFile()
+        
+        if not build_excel_export(output, fmt, filters):
+            output.close()
+            return jsonify({"status": "error", "message": "No data to export"}), 404
+        
+        output.seek(0)
         
         return send_file(
-            buffer,
+            output,
             as_attachment=True,
-            download_name=f'recommendations_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            download_name=download_name,
+            mimetype=EXPORT_FORMATS[fmt]
         )
         
+    except (ExportError, FilterError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+
+# report jobs
+
+# POST /api/reports queues a PDF or Excel export on a background worker pool;
+# poll /api/reports/<job_id> and download from /api/reports/<job_id>/download.
+# Jobs are keyed on the table's data version (see Backend/report_jobs.py) and
+# removed with their files REPORT_TTL_SECONDS after their last update.
+report_jobs = ReportJobs(
+    os.environ.get("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ecopackai_api_reports")),
+    workers=int(os.environ.get("REPORT_WORKERS", 2)),
+    keep_for=int(os.environ.get("REPORT_TTL_SECONDS", 86400))
+)
+
+
+def recommendation_data_version():
+    """
+    Changes whenever the dashboard data can: rows are inserted (count, max id),
+    archived (max archive id) or re-counted by rebuild-rollups (month totals)
+    """
+    rows = db.session.query(
+        db.select(db.func.count(Recommendation.id)).scalar_subquery(),
+        db.select(db.func.max(Recommendation.id)).scalar_subquery(),
+        db.select(db.func.max(RecommendationArchive.id)).scalar_subquery()
+    ).one()
+    totals = db.session.query(
+        db.func.sum(MonthlyStats.count),
+        db.func.sum(MonthlyStats.total_cost),
+        db.func.sum(MonthlyStats.total_co2)
+    ).one()
+    return tuple(rows) + tuple(totals)
+
+
+def report_job_response(job, status_code=200):
+    return jsonify({
+        "status": "success",
+        "data": {
+            "job_id": job["job_id"],
+            "state": job["status"],
+            "error": job["error"],
+            "size": job["size"],
+            "status_url": f"/api/reports/{job['job_id']}",
+            "download_url": f"/api/reports/{job['job_id']}/download" if job["status"] == "done" else None
+        }
+    }), status_code
+
+
+def run_in_app_context(build, *args):
+    def run(output):
+        with app.app_context():
+            return build(output, *args)
+    return run
+
+
+@app.route("/api/reports", methods=["POST"])
+def create_report():
+    """
+    Queue a report job: {"report": "pdf"} or {"report": "excel", "format": "xlsx|csv|parquet"},
+    plus optional "start", "end" and "category" filters
+    """
+    try:
+        data = request.get_json(silent=True) or request.form
+        report = data.get("report", "pdf")
+        filters = parse_filters(data)
+        
+        if report == "pdf":
+            fmt = "pdf"
+            build = run_in_app_context(build_pdf_report, filters)
+            filename = "sustainability_report.pdf"
+        elif report == "excel":
+            fmt = export_format(data.get("format"))
+            build = run_in_app_context(build_excel_export, fmt, filters)
+            filename = f"recommendations_data.{fmt}"
+        else:
+            return jsonify({"status": "error", "message": "report must be 'pdf' or 'excel'"}), 400
+        
+        params = {"report": report, "format": fmt, "filters": filters_key(filters)}
+        job = report_jobs.submit(params, recommendation_data_version(), build, fmt, filename)
+        
+        return report_job_response(job, 200 if job["status"] == "done" else 202)
+        
+    except (ExportError, FilterError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+
+@app.route("/api/reports/<job_id>", methods=["GET"])
+def report_status(job_id):
+    """Report job status"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown report job"}), 404
+    return report_job_response(job)
+
+
+@app.route("/api/reports/<job_id>/download", methods=["GET"])
+def download_report(job_id):
+    """Finished report file"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown report job"}), 404
+    if job["status"] != "done":
+        return report_job_response(job, 409)
+    return send_file(
+        report_jobs.artifact_path(job),
+        as_attachment=True,
+        download_name=job["filename"],
+        mimetype=EXPORT_FORMATS.get(job["extension"], "application/pdf")
+    )
+
+# api recommendation cache
+
+# Inputs outside these sets take the same branches in /api, so they share
+# one cache entry under "other"
+API_CACHE_KEY_VALUES = (
+    ("food", "electronics"),
+    ("high", "medium"),
+    ("international",),
+    ("high", "medium", "low")
+)
+
+def api_catalog_signature():
+    """Active model version: the only input of the /api rankings that changes at runtime"""
+    api_model_registry.ensure_watching()
+    return (api_model_registry.active.version,)
+
+
+def normalize_api_key(prod_cat, fragility, ship_type, sust_prio):
+    return tuple(
+        value if value in known else "other"
+        for value, known in zip((prod_cat, fragility, ship_type, sust_prio), API_CACHE_KEY_VALUES)
+    )
+
+
+@lru_cache(maxsize=int(os.environ.get("RECOMMENDATION_CACHE_SIZE", 256)))
+def rank_api_materials(signature, prod_cat, fragility, ship_type, sust_prio):
+    """Top 3 ranked materials for one normalized /api input combination"""
+
+    # Apply filtering
+    df = df_materials.iloc[select_api_materials(prod_cat, fragility, ship_type)]
+    
+    if df.empty:
+        return ()
+    
+    # Make predictions
+    df["predicted_cost"], df["predicted_co2"] = api_model_registry.get(signature[-1]).models.predict(df)
+    
+    # Normalization
+    df["cost_norm"] = 1 - minmax_normalize(df["predicted_cost"])
+    df["co2_norm"] = 1 - minmax_normalize(df["predicted_co2"])
+    df["strength_norm"] = minmax_normalize(df["strength"])
+    
+    # Weight management
+    eco_weight = 0.4
+    cost_weight = 0.4
+    strength_weight = 0.2
+    
+    if sust_prio == "high":
+        eco_weight += 0.3
+        cost_weight -= 0.3
+    elif sust_prio == "medium":
+        eco_weight += 0.15
+        cost_weight -= 0.15
+    elif sust_prio == "low":
+        eco_weight -= 0.20
+        cost_weight += 0.20
+
+    if ship_type == "international":
+        eco_weight += 0.1
+        strength_weight += 0.1
+    
+    # Normalize weights
+    total = eco_weight + cost_weight + strength_weight
+    eco_weight /= total
+    cost_weight /= total
+    strength_weight /= total
+    
+    # Calculate suitability score
+    df["suitability_score"] = (
+        eco_weight * df["co2_norm"] +
+        cost_weight * df["cost_norm"] +
+        strength_weight * df["strength_norm"]
+    )
+    
+    df = df.sort_values("suitability_score", ascending=False)
+    
+    top_df = df.head(3).reset_index(drop=True)
+    top_df["rank"] = top_df.index + 1
+
+    return tuple(top_df[[
+        "rank",
+        "material_name",
+        "predicted_cost",
+        "predicted_co2",
+        "suitability_score"
+    ]].to_dict(orient="records"))
+
+
+def warm_api_cache():
+    """Rank every known /api input combination ahead of the first request"""
+    signature = api_catalog_signature()
+    for key in itertools.product(*(known + ("other",) for known in API_CACHE_KEY_VALUES)):
+        rank_api_materials(signature, *key)
+
+
+warm_api_cache()
+
+
+def api_prediction_table_stats():
+    table = api_model_registry.active.models.table
+    return table.describe() if table is not None else None
+
+
+@app.route("/api/metrics", methods=["GET"])
+def api_metrics():
+    """Recommendation cache and write-behind counters"""
+    if not is_authorized():
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+    
+    cache_info = rank_api_materials.cache_info()
+    return jsonify({
+        "status": "success",
+        "data": {
+            "recommendation_cache": {
+                "hits": cache_info.hits,
+                "misses": cache_info.misses,
+                "size": cache_info.currsize,
+                "max_size": cache_info.maxsize
+            },
+            "write_behind": recommendation_writer.metrics(),
+            "models": api_model_registry.describe(),
+            "prediction_table": api_prediction_table_stats()
+        }
+    })
+
+
+# model versions
+
+@app.route("/api/models", methods=["GET"])
+def api_model_versions():
+    """Loaded /api model versions and the active one"""
+    if not is_authorized():
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+    return jsonify({"status": "success", "data": api_model_registry.describe()})
+
+
+@app.route("/api/models/rollback", methods=["POST"])
+def api_model_rollback():
+    """
+    Activate an earlier model version: {"version": "..."}, or the previous one
+    without a body. Every worker switches to it within MODEL_POLL_SECONDS, and
+    it stays active until new files appear in models/.
+    """
+    if not is_authorized():
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        api_model_registry.rollback(data.get("version"))
+    except RegistryError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", "data": api_model_registry.describe()})
+
+
+# api recommendation logging
+
+# With ASYNC_DB_WRITES=1, /api only queues its rows and a background flusher
+# inserts them in batches (see Backend/write_behind.py)
+ASYNC_DB_WRITES = os.environ.get("ASYNC_DB_WRITES") == "1"
+
+
+def save_recommendation_rows(rows):
+    """Insert recommendation rows and add them to the rollups in one transaction"""
+    try:
+        # created_at comes back from the database when it filled in the default
+        inserted = db.session.execute(
+            db.insert(Recommendation).returning(
+                Recommendation.product_category,
+                Recommendation.predicted_cost,
+                Recommendation.predicted_co2,
+                Recommendation.created_at
+            ),
+            rows
+        ).mappings().all()
+        for granularity, model in ROLLUP_MODELS.items():
+            increment_totals(db.session, model, rollup_rows(inserted, granularity))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def write_queued_rows(rows):
+    for row in rows:
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    with app.app_context():
+        save_recommendation_rows(rows)
+
+
+recommendation_writer = WriteBehindLogger(
+    write_queued_rows,
+    max_queue=int(os.environ.get("WRITE_BEHIND_QUEUE_SIZE", 10000)),
+    batch_size=int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", 500)),
+    flush_interval=float(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", 1.0)),
+    spill_path=os.environ.get("WRITE_BEHIND_SPILL_PATH"),
+    dead_letter_path=os.environ.get("WRITE_BEHIND_DEAD_LETTER_PATH"),
+    max_attempts=int(os.environ.get("WRITE_BEHIND_MAX_ATTEMPTS", 10))
+)
+
+
+def build_api_rows(prod_cat, fragility, ship_type, sust_prio, top_materials):
+    """Recommendation table rows for one /api result"""
+    return [{
+        "product_category": prod_cat,
+        "fragility": fragility,
+        "shipping_type": ship_type,
+        "sustainability_priority": sust_prio,
+        "material_name": row["material_name"],
+        "predicted_cost": float(row["predicted_cost"]),
+        "predicted_co2": float(row["predicted_co2"]),
+        "suitability_score": float(row["suitability_score"])
+    } for row in top_materials]
+
+
+def log_api_rows(rows):
+    """Save rows now, or queue them for the write-behind flusher"""
+    if ASYNC_DB_WRITES:
+        created_at = datetime.utcnow().isoformat()
+        recommendation_writer.submit([{**row, "created_at": created_at} for row in rows])
+    elif rows:
+        save_recommendation_rows(rows)
+
+
 # api route
 
 @app.route("/api", methods=["POST"])
@@ -519,9 +1303,6 @@ def material():
     """Material recommendation API endpoint"""
     
     try:
-        # Load full dataset
-        df = df_materials.copy()
-        
         # Get user inputs
         data = request.get_json()
         prod_cat = data["Product_category"].lower()
@@ -529,104 +1310,24 @@ def material():
         ship_type = data["Shipping_type"].lower()
         sust_prio = data["Sustainability_priority"].lower()
         
-        # Apply filtering
-        if fragility == "high":
-            df = df[df["strength"] >= 3]
-        elif fragility == "medium":
-            df = df[df["strength"] >= 2]
-
-        if prod_cat == "food":
-            df = df[df["biodegradibility_score"] >= 7]
-        elif prod_cat == "electronics":
-            df = df[df["strength"] >= 2]
+        key = normalize_api_key(prod_cat, fragility, ship_type, sust_prio)
+        signature = api_catalog_signature()
+        top_materials = [dict(item) for item in rank_api_materials(signature, *key)]
 
-        if ship_type == "international":
-            df = df[df["strength"] >= 2]
-        
-        if df.empty:
+        if not top_materials:
             return jsonify({
                 "status": "fail",
                 "message": "No suitable materials found for the given constraints"
             }), 404
-        
-        # Make predictions
-        features = ["strength", "weight_capacity", "biodegradibility_score", "recyclability_percentage"]
-        x = df[features]
-
-        scaler = joblib.load("models/feature_scaler.pkl")
-        x_scaled = scaler.transform(x)
-        
-        df["predicted_cost"] = cost_model.predict(x_scaled)
-        df["predicted_co2"] = co2_model.predict(x_scaled)
-        
-        # Normalization
-        df["cost_norm"] = 1 - MinMaxScaler().fit_transform(df[["predicted_cost"]]).flatten()
-        df["co2_norm"] = 1 - MinMaxScaler().fit_transform(df[["predicted_co2"]]).flatten()
-        df["strength_norm"] = MinMaxScaler().fit_transform(df[["strength"]]).flatten()
-        
-        # Weight management
-        eco_weight = 0.4
-        cost_weight = 0.4
-        strength_weight = 0.2
-        
-        if sust_prio == "high":
-            eco_weight += 0.3
-            cost_weight -= 0.3
-        elif sust_prio == "medium":
-            eco_weight += 0.15
-            cost_weight -= 0.15
-        elif sust_prio == "low":
-            eco_weight -= 0.20
-            cost_weight += 0.20
-
-        if ship_type == "international":
-            eco_weight += 0.1
-            strength_weight += 0.1
-        
-        # Normalize weights
-        total = eco_weight + cost_weight + strength_weight
-        eco_weight /= total
-        cost_weight /= total
-        strength_weight /= total
-        
-        # Calculate suitability score
-        df["suitability_score"] = (
-            eco_weight * df["co2_norm"] +
-            cost_weight * df["cost_norm"] +
-            strength_weight * df["strength_norm"]
-        )
-        
-        df = df.sort_values("suitability_score", ascending=False)
-        
-        top_df = df.head(3).reset_index(drop=True)
-        top_df["rank"] = top_df.index + 1
 
         # Save to database
-        for _, row in top_df.iterrows():
-            rec = Recommendation(
-                product_category=prod_cat,
-                fragility=fragility,
-                shipping_type=ship_type,
-                sustainability_priority=sust_prio,
-                material_name=row["material_name"],
-                predicted_cost=float(row["predicted_cost"]),
-                predicted_co2=float(row["predicted_co2"]),
-                suitability_score=float(row["suitability_score"])
-            )
-            db.session.add(rec)
-
-        db.session.commit()
+        log_api_rows(build_api_rows(prod_cat, fragility, ship_type, sust_prio, top_materials))
         
         # Return response
         response = {
             "status": "success",
-            "recommended_materials": top_df[[
-                "rank",
-                "material_name",
-                "predicted_cost",
-                "predicted_co2",
-                "suitability_score"
-            ]].to_dict(orient="records")
+            "recommended_materials": top_materials,
+            "model_version": signature[-1]
         }
         
         return jsonify(response)
@@ -638,6 +1339,61 @@ def material():
         }), 500
 
 
+API_PROFILE_FIELDS = ["Product_category", "Fragility", "Shipping_type", "Sustainability_priority"]
+BATCH_MAX_PROFILES = int(os.environ.get("BATCH_MAX_PROFILES", 50000))
+
+
+@app.route("/api/batch", methods=["POST"])
+def material_batch():
+    """
+    Batch version of /api. Takes a JSON array or NDJSON of /api profiles,
+    ranks each distinct profile once, saves all rows in one insert and
+    streams one NDJSON result line per profile, in input order.
+    """
+
+    try:
+        profiles = read_profiles(request, BATCH_MAX_PROFILES)
+    except BatchError as e:
+        return jsonify({"status": "error", "message": str(e)}), e.status
+
+    signature = api_catalog_signature()
+    groups = {}
+    outcomes = []
+    rows = []
+
+    for data in profiles:
+        missing = [field for field in API_PROFILE_FIELDS if not isinstance(data, dict) or field not in data]
+        if missing:
+            outcomes.append(f"Missing field: {missing[0]}")
+            continue
+
+        profile = tuple(str(data[field]).lower() for field in API_PROFILE_FIELDS)
+
+        if profile not in groups:
+            groups[profile] = [dict(item) for item in rank_api_materials(signature, *normalize_api_key(*profile))]
+
+        outcomes.append(profile)
+        rows += build_api_rows(*profile, groups[profile])
+
+    log_api_rows(rows)
+
+    def results():
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, str):
+                yield {"index": index, "status": "error", "message": outcome}
+            elif groups[outcome]:
+                yield {
+                    "index": index,
+                    "status": "success",
+                    "recommended_materials": groups[outcome],
+                    "model_version": signature[-1]
+                }
+            else:
+                yield {"index": index, "status": "fail", "message": "No suitable materials found for the given constraints"}
+
+    return Response(ndjson_lines(results()), mimetype="application/x-ndjson")
+
+
 if __name__ == "__main__":
     # Create database tables on startup
     with app.app_context():
@@ -679,6 +1435,9 @@ if DB_URI.startswith("postgres://"):
 
 engine = create_engine(DB_URI)
 
+# preloaded workers (gunicorn.conf.py) must not reuse the master's connections
+os.register_at_fork(after_in_child=partial(engine.dispose, close=False))
+
 # ---------------------------------------------------
 # 3️⃣ MODEL LOADING
 # ---------------------------------------------------
@@ -692,9 +1451,41 @@ def load_model(filename):
         return None
     return joblib.load(path)
 
-rf_model = load_model("rf_model.pkl")
-xgb_model = load_model("xgb_model.pkl")
-scaler = load_model("scaler.pkl")
+# CO2 prediction features, renamed to the names the scaler was fitted with
+CO2_FEATURES = {
+    "strength": "Strength",
+    "weight_capacity": "Weight_Capacity",
+    "cost_per_unit": "Cost_Per_Unit_INR",
+    "biodegradability_score": "Biodegradability_Score",
+    "recyclability": "Recyclability"
+}
+
+def load_models(paths):
+    # absolute paths: archived versions are loaded from MODEL_ARCHIVE_DIR
+    return {name: load_model(path) for name, path in paths.items()}
+
+def probe_models(models):
+    scaler, xgb_model = models["scaler.pkl"], models["xgb_model.pkl"]
+    if scaler and xgb_model:
+        probe = pd.DataFrame([[1.0] * len(CO2_FEATURES)], columns=list(CO2_FEATURES.values()))
+        xgb_model.predict(scaler.transform(probe))
+
+# Versioned model files (see Backend/model_registry.py): replaced files are
+# loaded, probed and swapped in by a background thread, and the materials
+# snapshot re-predicts CO2 with the newly active version
+model_registry = ModelRegistry(
+    str(BASE_DIR),
+    ["rf_model.pkl", "xgb_model.pkl", "scaler.pkl"],
+    load_models,
+    probe_models,
+    poll_seconds=float(os.getenv("MODEL_POLL_SECONDS", 30))
+)
+
+try:
+    MATERIALS_HAS_UPDATED_AT = "updated_at" in {c["name"] for c in inspect(engine).get_columns("materials")}
+except Exception as e:
+    print(f"⚠ Could not inspect materials table: {e}")
+    MATERIALS_HAS_UPDATED_AT = False
 
 # ---------------------------------------------------
 # 4️⃣ DATA UTILITIES
@@ -703,33 +1494,203 @@ scaler = load_model("scaler.pkl")
 def fetch_data():
     return pd.read_sql("SELECT * FROM materials", engine)
 
+def fetch_materials_version():
+    # change marker for the materials table: max(updated_at) when the column exists, plus the row count
+    if MATERIALS_HAS_UPDATED_AT:
+        row = pd.read_sql("SELECT MAX(updated_at) AS updated_at, COUNT(*) AS n FROM materials", engine).iloc[0]
+        return (str(row["updated_at"]), int(row["n"]))
+    return (None, int(pd.read_sql("SELECT COUNT(*) AS n FROM materials", engine).iloc[0]["n"]))
+
 def safe_normalize(value, min_val, max_val):
+    # works on scalars and NumPy arrays alike
     if max_val == min_val:
         return 0.5
     return (value - min_val) / (max_val - min_val)
 
+NORMALIZED_COLUMNS = [
+    "strength",
+    "recyclability",
+    "biodegradability_score",
+    "cost_per_unit",
+    "co2_emission_score"
+]
+
+def column_ranges(df):
+    return {col: (df[col].min(), df[col].max()) for col in NORMALIZED_COLUMNS}
+
+def top_k_positions(scores, k):
+    """Positions of the k best scores, best first (ties keep catalog order)"""
+    if len(scores) > k:
+        candidates = np.sort(np.argpartition(-scores, k - 1)[:k])
+    else:
+        candidates = np.arange(len(scores))
+    rounded = np.round(scores[candidates] * 100, 2)
+    return candidates[np.argsort(-rounded, kind="stable")]
+
+def predict_co2(df, models):
+    scaler, xgb_model = models["scaler.pkl"], models["xgb_model.pkl"]
+
+    if df.empty or not (scaler and xgb_model):
+        return df["co2_emission_score"].to_numpy() if "co2_emission_score" in df else np.array([])
+
+    rename_map = CO2_FEATURES
+
+    feature_order = list(rename_map.values())
+
+    X_input = df[list(rename_map.keys())].rename(columns=rename_map)
+    X_input = X_input[feature_order]
+    X_scaled = scaler.transform(X_input)
+    return xgb_model.predict(X_scaled)
+
+# ---------------------------------------------------
+# MATERIALS SNAPSHOT
+# ---------------------------------------------------
+
+# The materials table is read once and kept in memory together with everything
+# derived from it. A background thread polls a cheap change marker and swaps in
+# a new snapshot when it moves or the snapshot is older than the TTL.
+
+MATERIALS_POLL_SECONDS = float(os.getenv("MATERIALS_POLL_SECONDS", 30))
+MATERIALS_TTL_SECONDS = float(os.getenv("MATERIALS_TTL_SECONDS", 300))
+
+class MaterialsSnapshot:
+    def __init__(self, df, version):
+        self.df = df
+        self.version = version
+        self.loaded_at = time.time()
+        self.filter_index = build_filter_index(df)
+        self.ranges = column_ranges(df)
+        self.model = model_registry.active
+        self.co2_preds = predict_co2(df, self.model.models)
+
+class MaterialsCache:
+    def __init__(self):
+        self.snapshot = None
+        self.lock = threading.Lock()
+        self.poller = None
+        self.pid = None
+        self.stats = {"refreshes": 0, "last_refresh_ms": None, "last_error": None}
+
+    def get(self):
+        """Current snapshot; the first call loads it synchronously"""
+        if self.snapshot is None:
+            with self.lock:
+                if self.snapshot is None:
+                    self.refresh()
+        elif self.snapshot.model is not model_registry.active:
+            with self.lock:
+                if self.snapshot.model is not model_registry.active:
+                    # same rows, CO2 re-predicted by the newly active model version
+                    self.snapshot = MaterialsSnapshot(self.snapshot.df, self.snapshot.version)
+        self.ensure_poller()
+        model_registry.ensure_watching()
+        return self.snapshot
+
+    def refresh(self):
+        started = time.perf_counter()
+        version = fetch_materials_version()
+        snapshot = MaterialsSnapshot(fetch_data(), version)
+        # single reference swap: requests keep the snapshot they started with
+        self.snapshot = snapshot
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.stats["last_error"] = None
+
+    def is_stale(self):
+        snapshot = self.snapshot
+        if time.time() - snapshot.loaded_at >= MATERIALS_TTL_SECONDS:
+            return True
+        return fetch_materials_version() != snapshot.version
+
+    def ensure_poller(self):
+        # (re)start the poller in every worker process
+        if self.pid == os.getpid() and self.poller.is_alive():
+            return
+        with self.lock:
+            if self.pid != os.getpid() or not self.poller.is_alive():
+                self.poller = threading.Thread(target=self.poll, name="materials-refresh", daemon=True)
+                self.poller.start()
+                self.pid = os.getpid()
+
+    def poll(self):
+        while True:
+            time.sleep(MATERIALS_POLL_SECONDS)
+            try:
+                if self.is_stale():
+                    self.refresh()
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                print("ERROR: materials refresh failed:", str(e))
+
+    def metrics(self):
+        snapshot = self.snapshot
+        return {
+            "loaded": snapshot is not None,
+            "rows": len(snapshot.df) if snapshot else 0,
+            "age_seconds": round(time.time() - snapshot.loaded_at, 1) if snapshot else None,
+            **self.stats
+        }
+
+materials_cache = MaterialsCache()
+
+# first snapshot at import, so a preloading server (gunicorn.conf.py) builds it
+# once in the master; the poller threads still start per worker on first use
+try:
+    materials_cache.refresh()
+except Exception as e:
+    print(f"⚠ Materials not preloaded, loading on first request: {e}")
+
 # ---------------------------------------------------
 # 5️⃣ CATEGORY RULES
 # ---------------------------------------------------
 
 Category_rules = {
-    "food": lambda df: df[df["biodegradability_score"] >= 8],
-    "beverages": lambda df: df[(df["strength"] >= 3) & (df["recyclability"] >= 70)],
-    "pharmaceuticals": lambda df: df[df["biodegradability_score"] >= 6],
-    "agriculture": lambda df: df[df["biodegradability_score"] >= 9],
-    "electronics": lambda df: df[df["strength"] >= 4],
-    "automotive_parts": lambda df: df[df["strength"] >= 5],
-    "construction_tools": lambda df: df[df["weight_capacity"] >= 50],
-    "industrial_chemicals": lambda df: df[(df["strength"] >= 5) & (df["recyclability"] >= 50)],
-    "cosmetics": lambda df: df[df["recyclability"] >= 80],
-    "apparel_fashion": lambda df: df[df["biodegradability_score"] >= 7],
-    "luxury_goods": lambda df: df[df["cost_per_unit"] >= 100],
-    "e_commerce_general": lambda df: df[df["recyclability"] >= 60],
-    "home_appliances": lambda df: df[df["strength"] >= 4],
-    "toys_baby_products": lambda df: df[(df["biodegradability_score"] >= 8) & (df["strength"] >= 2)],
-    "office_supplies": lambda df: df[df["recyclability"] >= 90]
+    "food": lambda df: df["biodegradability_score"] >= 8,
+    "beverages": lambda df: (df["strength"] >= 3) & (df["recyclability"] >= 70),
+    "pharmaceuticals": lambda df: df["biodegradability_score"] >= 6,
+    "agriculture": lambda df: df["biodegradability_score"] >= 9,
+    "electronics": lambda df: df["strength"] >= 4,
+    "automotive_parts": lambda df: df["strength"] >= 5,
+    "construction_tools": lambda df: df["weight_capacity"] >= 50,
+    "industrial_chemicals": lambda df: (df["strength"] >= 5) & (df["recyclability"] >= 50),
+    "cosmetics": lambda df: df["recyclability"] >= 80,
+    "apparel_fashion": lambda df: df["biodegradability_score"] >= 7,
+    "luxury_goods": lambda df: df["cost_per_unit"] >= 100,
+    "e_commerce_general": lambda df: df["recyclability"] >= 60,
+    "home_appliances": lambda df: df["strength"] >= 4,
+    "toys_baby_products": lambda df: (df["biodegradability_score"] >= 8) & (df["strength"] >= 2),
+    "office_supplies": lambda df: df["recyclability"] >= 90
+}
+
+Fragility_rules = {
+    "high": lambda df: df["strength"] >= 4,
+    "medium": lambda df: df["strength"] >= 2
+}
+
+Shipping_rules = {
+    "international": lambda df: df["strength"] >= 3
 }
 
+
+def build_filter_index(df):
+    """Precompute one boolean mask per category, fragility and shipping rule"""
+    return {
+        kind: {name: rule(df).to_numpy() for name, rule in rules.items()}
+        for kind, rules in (
+            ("category", Category_rules),
+            ("fragility", Fragility_rules),
+            ("shipping", Shipping_rules)
+        )
+    }
+
+
+def narrow(mask, rule_mask):
+    """AND a rule into the selection, keeping the selection if nothing would match"""
+    if rule_mask is None:
+        return mask
+    narrowed = mask & rule_mask
+    return narrowed if narrowed.any() else mask
+
 # ---------------------------------------------------
 # 6️⃣ ROUTES
 # ---------------------------------------------------
@@ -740,7 +1701,30 @@ def home():
 
 @app.route("/health")
 def health():
-    return jsonify({"status": "online"})
+    return jsonify({
+        "status": "online",
+        "materials_snapshot": materials_cache.metrics(),
+        "models": model_registry.describe()
+    })
+
+@app.route("/models", methods=["GET"])
+def model_versions():
+    if not is_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(model_registry.describe())
+
+@app.route("/models/rollback", methods=["POST"])
+def model_rollback():
+    # {"version": "..."}, or the previously loaded version without a body;
+    # pinned in ACTIVE so every worker switches to it
+    if not is_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        model_registry.rollback(data.get("version"))
+    except RegistryError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(model_registry.describe())
 
 @app.route("/recommend", methods=["POST"])
 def recommend():
@@ -757,43 +1741,39 @@ def recommend():
         if not all(field in data for field in required_fields):
             return jsonify({"error": "Missing required fields"}), 400
 
-        full_df = fetch_data()
+        snapshot = materials_cache.get()
+        full_df = snapshot.df
 
         if full_df.empty:
             return jsonify({"error": "No materials available"}), 500
 
+        filter_index = snapshot.filter_index
+        mask = np.ones(len(full_df), dtype=bool)
+
         # ---------------- CATEGORY FILTER
         category = data["product_category"].lower()
 
-        if category in Category_rules:
-            filtered = Category_rules[category](full_df)
-            materials_df = filtered if not filtered.empty else full_df.copy()
-        else:
-            materials_df = full_df.copy()
+        mask = narrow(mask, filter_index["category"].get(category))
 
         # ---------------- FRAGILITY FILTER
         fragility = data["fragility"].lower()
 
         if fragility == "high":
             strength_boost = 0.2
-            temp = materials_df[materials_df["strength"] >= 4]
         elif fragility == "medium":
             strength_boost = 0.1
-            temp = materials_df[materials_df["strength"] >= 2]
         else:
             strength_boost = 0.0
-            temp = materials_df
 
-        if not temp.empty:
-            materials_df = temp
+        mask = narrow(mask, filter_index["fragility"].get(fragility))
 
         # ---------------- SHIPPING FILTER
         shipping = data["Shipping_Type"].lower()
 
-        if shipping == "international":
-            temp = materials_df[materials_df["strength"] >= 3]
-            if not temp.empty:
-                materials_df = temp
+        mask = narrow(mask, filter_index["shipping"].get(shipping))
+
+        positions = np.flatnonzero(mask)
+        materials_df = full_df.iloc[positions]
 
         # ---------------- PRIORITY WEIGHTS
         priority = data["Sustainability_Priority"].lower()
@@ -805,70 +1785,51 @@ def recommend():
         else:
             w_cost, w_co2, w_suit = 0.60, 0.25, 0.15
 
-        # ---------------- ML CO2 PREDICTION
-        if scaler and xgb_model:
-            rename_map = {
-                "strength": "Strength",
-                "weight_capacity": "Weight_Capacity",
-                "cost_per_unit": "Cost_Per_Unit_INR",
-                "biodegradability_score": "Biodegradability_Score",
-                "recyclability": "Recyclability"
-            }
-
-            feature_order = list(rename_map.values())
-
-            X_input = materials_df[list(rename_map.keys())].rename(columns=rename_map)
-            X_input = X_input[feature_order]
-            X_scaled = scaler.transform(X_input)
-            co2_preds = xgb_model.predict(X_scaled)
-        else:
-            co2_preds = materials_df["co2_emission_score"].values
+        # ---------------- ML CO2 PREDICTION (precomputed per snapshot)
+        co2_preds = snapshot.co2_preds[positions]
 
         # ---------------- NORMALIZATION RANGES
-        min_cost = full_df["cost_per_unit"].min()
-        max_cost = full_df["cost_per_unit"].max()
-        min_co2 = max(0.0, full_df["co2_emission_score"].min())
-        max_co2 = full_df["co2_emission_score"].max()
-
-        results = []
-
-        for i, (_, row) in enumerate(materials_df.iterrows()):
-
-            cost = max(0.0, float(row["cost_per_unit"]))
-            pred_co2 = max(0.0, float(co2_preds[i]))  # NEVER NEGATIVE
-
-            s_norm = safe_normalize(row["strength"], full_df["strength"].min(), full_df["strength"].max())
-            r_norm = safe_normalize(row["recyclability"], full_df["recyclability"].min(), full_df["recyclability"].max())
-            b_norm = safe_normalize(row["biodegradability_score"], full_df["biodegradability_score"].min(), full_df["biodegradability_score"].max())
-            cost_norm = safe_normalize(cost, min_cost, max_cost)
-            co2_norm = safe_normalize(pred_co2, min_co2, max_co2)
-
-            sustainability = (
-                (0.4 + strength_boost) * s_norm +
-                0.3 * r_norm +
-                0.3 * b_norm
-            )
-
-            final_score = (
-                w_cost * (1 - cost_norm) +
-                w_co2 * (1 - co2_norm) +
-                w_suit * sustainability
-            )
+        ranges = snapshot.ranges
+        min_cost, max_cost = ranges["cost_per_unit"]
+        min_co2, max_co2 = ranges["co2_emission_score"]
+        min_co2 = max(0.0, min_co2)
+
+        # ---------------- VECTORIZED SCORING
+        costs = np.fmax(0.0, materials_df["cost_per_unit"].to_numpy(dtype=float))
+        pred_co2 = np.fmax(0.0, np.asarray(co2_preds, dtype=float))  # NEVER NEGATIVE
+
+        s_norm = safe_normalize(materials_df["strength"].to_numpy(), *ranges["strength"])
+        r_norm = safe_normalize(materials_df["recyclability"].to_numpy(), *ranges["recyclability"])
+        b_norm = safe_normalize(materials_df["biodegradability_score"].to_numpy(), *ranges["biodegradability_score"])
+        cost_norm = safe_normalize(costs, min_cost, max_cost)
+        co2_norm = safe_normalize(pred_co2, min_co2, max_co2)
+
+        sustainability = (
+            (0.4 + strength_boost) * s_norm +
+            0.3 * r_norm +
+            0.3 * b_norm
+        )
 
-            final_score = max(0.0, final_score)
+        final_scores = (
+            w_cost * (1 - cost_norm) +
+            w_co2 * (1 - co2_norm) +
+            w_suit * sustainability
+        )
 
-            results.append({
-                "material": row["material_type"],
-                "predicted_cost": round(cost, 2),
-                "predicted_co2": round(pred_co2, 2),
-                "suitability_score": round(final_score * 100, 2)
-            })
+        final_scores = np.broadcast_to(np.fmax(0.0, final_scores), len(materials_df))
 
-        df_results = pd.DataFrame(results)
-        top5 = df_results.sort_values("suitability_score", ascending=False).head(5)
+        # ---------------- TOP 5
+        top5 = top_k_positions(final_scores, 5)
+        material_types = materials_df["material_type"].to_numpy()
 
         return jsonify({
-            "recommended_materials": top5.to_dict(orient="records")
+            "recommended_materials": [{
+                "material": material_types[i],
+                "predicted_cost": round(float(costs[i]), 2),
+                "predicted_co2": round(float(pred_co2[i]), 2),
+                "suitability_score": float(np.round(final_scores[i] * 100, 2))
+            } for i in top5],
+            "model_version": snapshot.model.version
         })
 
     except Exception as e:
@@ -0,0 +1,80 @@
+"""
+Benchmark: tree-ensemble models vs their compiled NumPy form.
+
+For every model file, compares model.predict() with
+Backend/compiled_trees.py's CompiledEnsemble.predict() at batch sizes from
+1 to 100k rows. Both are checked to give identical predictions first.
+
+Run from the repository root:
+    python benchmarks/bench_compiled_trees.py
+"""
+
+import os
+import sys
+import timeit
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from Backend.compiled_trees import compile_model, sample_rows  # noqa: E402
+
+# the pickled models were saved with older scikit-learn/XGBoost versions
+warnings.filterwarnings("ignore")
+
+
+MODEL_PATHS = [
+    "models/cost_model.pkl",
+    "models/co2_model.pkl",
+    "Backend/models/cost_model.pkl",
+    "Backend/models/co2_model.pkl",
+    "rf_cost.pkl",
+    "xgb_co2.pkl"
+]
+
+BATCH_SIZES = [1, 3, 10, 60, 1_000, 10_000, 100_000]
+
+# time per size: enough calls for ~0.2 s, best of 3
+TARGET_SECONDS = 0.2
+
+
+def best_seconds(predict, X):
+
+    calls = max(1, int(TARGET_SECONDS / max(timeit.timeit(lambda: predict(X), number=1), 1e-6)))
+
+    return min(timeit.repeat(lambda: predict(X), number=calls, repeat=3)) / calls
+
+
+def main():
+
+    rng = np.random.default_rng(0)
+
+    for path in MODEL_PATHS:
+        model = joblib.load(path)
+        compiled = compile_model(model)
+
+        print(f"\n{path}: {compiled.meta['kind']}, {compiled.meta['n_trees']} trees, depth {compiled.depth}")
+        print(f"{'rows':>8}  {'model ms':>10}  {'compiled ms':>12}  {'speedup':>8}")
+
+        rows = sample_rows(compiled, max(BATCH_SIZES), rng)
+
+        for size in BATCH_SIZES:
+            X = rows[:size]
+            if compiled.feature_names is not None:
+                X = pd.DataFrame(X, columns=compiled.feature_names)
+
+            assert np.array_equal(model.predict(X), compiled.predict(X))
+
+            original = best_seconds(model.predict, X)
+            fast = best_seconds(compiled.predict, X)
+
+            print(f"{size:>8}  {original * 1000:>10.3f}  {fast * 1000:>12.3f}  {original / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
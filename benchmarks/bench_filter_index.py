@@ -0,0 +1,95 @@
+"""
+Benchmark: FilterIndex vs the old DataFrame filtering in apply_filters.
+
+Synthetic catalogs are built by resampling Backend/data/Ecopack_dataset.csv.
+Both paths are checked to return the same rows before they are timed.
+
+Run from the repository root:
+    python benchmarks/bench_filter_index.py
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Backend import recommender  # noqa: E402
+
+
+CATALOG_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUERIES = [
+    ("electronics", "high"),
+    ("food", "medium"),
+    ("cosmetics", "low"),
+    ("Toys", "medium")
+]
+
+
+def legacy_apply_filters(catalog, df, product_category, fragility):
+
+    filtered = df.copy()
+
+    if product_category == "electronics":
+        filtered = filtered[
+            (filtered["strength"] >= catalog.strength_q50) &
+            (filtered["co2_score"] <= catalog.co2_q75)
+        ]
+    elif product_category == "food":
+        filtered = filtered[filtered["biodegradability_score"] >= catalog.bio_q70]
+    elif product_category == "cosmetics":
+        filtered = filtered[filtered["weight_capacity"] <= catalog.weight_median]
+    else:
+        filtered = filtered[filtered["strength"] >= catalog.strength_q50]
+
+    if fragility == "high":
+        filtered = filtered[filtered["strength"] >= catalog.strength_q75]
+    elif fragility == "medium":
+        filtered = filtered[filtered["strength"] >= catalog.strength_q50]
+
+    return filtered
+
+
+def indexed_apply_filters(df, index, product_category, fragility):
+    return df.iloc[index.select(product_category, fragility)]
+
+
+def main():
+
+    print(f"{'rows':>10} {'legacy ms':>10} {'index ms':>10} {'speedup':>8} {'build ms':>9}")
+
+    catalog = recommender.catalog
+
+    for size in CATALOG_SIZES:
+
+        df = catalog.materials_df.sample(n=size, replace=True, random_state=42).reset_index(drop=True)
+
+        build_time = timeit.timeit(lambda: recommender.FilterIndex(df, catalog), number=1)
+        index = recommender.FilterIndex(df, catalog)
+
+        for category, fragility in QUERIES:
+            expected = legacy_apply_filters(catalog, df, category, fragility)
+            actual = indexed_apply_filters(df, index, category, fragility)
+            assert expected.index.equals(actual.index), (size, category, fragility)
+
+        number = max(1, 200_000 // size)
+
+        legacy = timeit.timeit(
+            lambda: [legacy_apply_filters(catalog, df, c, f) for c, f in QUERIES],
+            number=number
+        ) / (number * len(QUERIES))
+
+        indexed = timeit.timeit(
+            lambda: [indexed_apply_filters(df, index, c, f) for c, f in QUERIES],
+            number=number
+        ) / (number * len(QUERIES))
+
+        print(
+            f"{size:>10} {legacy * 1000:>10.3f} {indexed * 1000:>10.3f} "
+            f"{legacy / indexed:>7.1f}x {build_time * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
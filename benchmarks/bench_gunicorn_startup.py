@@ -0,0 +1,126 @@
+"""
+Benchmark: gunicorn worker startup and memory, with and without preload.
+
+Starts gunicorn with gunicorn.conf.py for each mode, waits for every worker
+to log "Worker <pid> ready in <ms> ms" (post_worker_init), then reads the
+workers' memory from /proc/<pid>/smaps_rollup:
+
+    rss   resident pages, shared ones included
+    pss   resident pages, each shared page divided between its sharers
+    uss   pages private to the worker (what another worker really costs)
+
+Benchmarks the deployed Backend API (the root app.py holds two apps
+registering the same endpoints, so it cannot be imported by gunicorn). Linux
+only; a throwaway SQLite database is used unless DATABASE_URL is set.
+
+Run from the repository root:
+    python benchmarks/bench_gunicorn_startup.py [--workers N]
+"""
+
+import argparse
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READY = re.compile(r"Worker (\d+) ready in ([\d.]+) ms")
+STARTUP_TIMEOUT = 180
+
+
+def smaps_kb(pid):
+
+    fields = {}
+
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                fields[name] = int(rest.split()[0])
+
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"]
+    }
+
+
+def run(preload, workers, env):
+
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+        "--workers", str(workers),
+        "--bind", "127.0.0.1:0",
+        "Backend.app:app"
+    ]
+
+    env = {**env, "GUNICORN_PRELOAD": "1" if preload else "0"}
+
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stderr=subprocess.PIPE, text=True)
+
+    ready = {}
+    try:
+        while len(ready) < workers:
+            line = server.stderr.readline()
+            if not line:
+                raise RuntimeError(f"gunicorn exited with {server.wait()}")
+            if time.perf_counter() - started > STARTUP_TIMEOUT:
+                raise RuntimeError("workers did not start in time")
+
+            match = READY.search(line)
+            if match:
+                ready[int(match.group(1))] = float(match.group(2))
+
+        all_ready = time.perf_counter() - started
+
+        # let lazily-touched pages settle before measuring
+        time.sleep(1)
+        memory = [smaps_kb(pid) for pid in ready]
+
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    return {
+        "all_ready_ms": all_ready * 1000,
+        "spawn_ms": statistics.median(ready.values()),
+        **{name: statistics.median(entry[name] for entry in memory) / 1024 for name in ("rss", "pss", "uss")}
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("API_KEY", "benchmark")
+    env.setdefault("MODEL_POLL_SECONDS", "0")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+        # first run creates the tables, so both modes start from the same database
+        run(True, 1, env)
+
+        print(f"{args.workers} workers, median per worker")
+        print(f"{'mode':>10}  {'all ready ms':>12}  {'spawn ms':>9}  {'rss MB':>7}  {'pss MB':>7}  {'uss MB':>7}")
+
+        for preload in (False, True):
+            result = run(preload, args.workers, env)
+            print(
+                f"{'preload' if preload else 'no preload':>10}  {result['all_ready_ms']:>12.0f}  "
+                f"{result['spawn_ms']:>9.1f}  {result['rss']:>7.1f}  {result['pss']:>7.1f}  {result['uss']:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: cold-start import time of app.py and Backend/app.py, with a budget.
+
+Runs each app's module-level import statements (not the rest of the module:
+no database, no model loading) under `python -X importtime` in a fresh
+interpreter and sums the cumulative time of the third-party imports. The
+run fails (exit status 1) when:
+
+- a dependency that is only needed by exports, PDFs or charts is imported
+  at module level again (LAZY_MODULES), or
+- the import time of an app is over its budget (best of RUNS runs).
+
+Run from the repository root:
+    python benchmarks/bench_import_time.py [--budget-ms N]
+
+tests/test_import_time.py runs the same checks under pytest, plus a budget
+for importing each whole app.
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# imported inside the export, PDF and chart code paths only
+LAZY_MODULES = ("matplotlib", "openpyxl", "plotly", "reportlab")
+
+# (label, module path); both are started from the repository root
+APPS = [
+    ("app.py", os.path.join(ROOT, "app.py")),
+    ("Backend/app.py", os.path.join(ROOT, "Backend", "app.py"))
+]
+
+INTERPRETER_MODULES = {"encodings", "site"}
+
+RUNS = 5
+DEFAULT_BUDGET_MS = 1000
+
+
+def module_imports(path):
+    """Source of the import statements at the top level of a module"""
+
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+    return ast.unparse(ast.Module(body=imports, type_ignores=[]))
+
+
+def is_first_party(name):
+
+    top = name.split(".")[0]
+
+    return os.path.exists(os.path.join(ROOT, top + ".py")) or os.path.isdir(os.path.join(ROOT, top))
+
+
+def import_times(source):
+    """{top-level module: cumulative microseconds} and every module imported"""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", source],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    top_level = {}
+    imported = set()
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imported.add(name.strip())
+
+        # nested imports are indented under the module that imported them;
+        # `site` and `encodings` are interpreter startup
+        if not name.startswith("  ") and name.strip() not in INTERPRETER_MODULES:
+            top_level[name.strip()] = int(cumulative)
+
+    return top_level, imported
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    args = parser.parse_args()
+
+    failures = []
+
+    for label, path in APPS:
+
+        source = module_imports(path)
+        runs = []
+
+        for _ in range(RUNS):
+            top_level, imported = import_times(source)
+            third_party = {name: us for name, us in top_level.items() if not is_first_party(name)}
+            runs.append((sum(third_party.values()) / 1000, third_party, imported))
+
+        total_ms, third_party, imported = min(runs, key=lambda run: run[0])
+
+        print(f"{label}: {total_ms:.0f} ms in third-party imports (best of {RUNS}, budget {args.budget_ms:.0f} ms)")
+        for name, us in sorted(third_party.items(), key=lambda item: -item[1])[:8]:
+            print(f"    {us / 1000:>8.1f} ms  {name}")
+
+        eager = sorted({name.split(".")[0] for name in imported} & set(LAZY_MODULES))
+        if eager:
+            failures.append(f"{label} imports {', '.join(eager)} at startup")
+        if total_ms > args.budget_ms:
+            failures.append(f"{label} import time {total_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: per-request model work in the root /api endpoint.
+
+Compares the old path (unpickle feature_scaler.pkl, scaler.transform, three
+MinMaxScaler fits) with ModelPipeline loaded once plus closed-form min-max
+normalization. Both paths are checked to give identical scores first.
+
+Run from the repository root:
+    python benchmarks/bench_model_pipeline.py
+"""
+
+import os
+import sys
+import timeit
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from model_pipeline import ModelPipeline, minmax_normalize  # noqa: E402
+
+# the pickled models were saved with older scikit-learn/XGBoost versions
+warnings.filterwarnings("ignore")
+
+
+REPEATS = 50
+FEATURES = ["strength", "weight_capacity", "biodegradibility_score", "recyclability_percentage"]
+
+cost_model = joblib.load("models/cost_model.pkl")
+co2_model = joblib.load("models/co2_model.pkl")
+pipeline = ModelPipeline.load("models/feature_scaler.pkl", "models/cost_model.pkl", "models/co2_model.pkl")
+
+df_materials = pd.read_csv("ecopackai_frozen_materials.csv")
+
+
+def legacy_scores(df):
+
+    scaler = joblib.load("models/feature_scaler.pkl")
+    x_scaled = scaler.transform(df[FEATURES])
+
+    cost = pd.DataFrame({"x": cost_model.predict(x_scaled)})
+    co2 = pd.DataFrame({"x": co2_model.predict(x_scaled)})
+
+    return (
+        1 - MinMaxScaler().fit_transform(cost).flatten(),
+        1 - MinMaxScaler().fit_transform(co2).flatten(),
+        MinMaxScaler().fit_transform(df[["strength"]]).flatten()
+    )
+
+
+def pipeline_scores(df):
+
+    cost, co2 = pipeline.predict(df)
+
+    return (
+        1 - minmax_normalize(cost),
+        1 - minmax_normalize(co2),
+        minmax_normalize(df["strength"])
+    )
+
+
+def main():
+
+    print(f"{'rows':>8}  {'legacy ms':>10}  {'pipeline ms':>12}  {'speedup':>8}")
+
+    for size in [len(df_materials) // 4, len(df_materials), 1_000, 10_000]:
+
+        df = df_materials.sample(size, replace=True, random_state=0).reset_index(drop=True)
+
+        for old, new in zip(legacy_scores(df), pipeline_scores(df)):
+            assert np.array_equal(old, new)
+
+        legacy = min(timeit.repeat(lambda: legacy_scores(df), number=REPEATS, repeat=3)) / REPEATS
+        fused = min(timeit.repeat(lambda: pipeline_scores(df), number=REPEATS, repeat=3)) / REPEATS
+
+        print(f"{size:>8}  {legacy * 1000:>10.3f}  {fused * 1000:>12.3f}  {legacy / fused:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: live cost/CO2 prediction vs Backend/prediction_table.py lookups.
+
+For the /api models (model_pipeline.py with the frozen catalog) and the
+Backend models (with Backend/data/Ecopack_dataset.csv), builds a "grid" and
+a "rows" table from the catalog, then times predictions of catalog rows at
+batch sizes from 1 row to the whole catalog. Table predictions are checked
+to be identical to the live ones first.
+
+Run from the repository root:
+    python benchmarks/bench_prediction_table.py
+"""
+
+import os
+import sys
+import time
+import timeit
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from Backend.compiled_trees import compile_or_keep  # noqa: E402
+from Backend.prediction_table import PredictionTable  # noqa: E402
+from model_pipeline import ModelPipeline  # noqa: E402
+
+# the pickled models were saved with older scikit-learn/XGBoost versions
+warnings.filterwarnings("ignore")
+
+
+BACKEND_FEATURES = ["strength", "weight_capacity", "recyclability_percentage", "biodegradability_score"]
+
+BATCH_SIZES = [1, 3, 10, 30, None]
+
+# time per size: enough calls for ~0.2 s, best of 3
+TARGET_SECONDS = 0.2
+
+
+def best_seconds(predict, df):
+
+    calls = max(1, int(TARGET_SECONDS / max(timeit.timeit(lambda: predict(df), number=1), 1e-6)))
+
+    return min(timeit.repeat(lambda: predict(df), number=calls, repeat=3)) / calls
+
+
+def api_predictor():
+
+    pipeline = ModelPipeline.load("models/feature_scaler.pkl", "models/cost_model.pkl", "models/co2_model.pkl")
+
+    return pipeline.predict_live, pipeline.features, pd.read_csv("ecopackai_frozen_materials.csv")
+
+
+def backend_predictor():
+
+    cost_model = compile_or_keep(joblib.load("Backend/models/cost_model.pkl"))
+    co2_model = compile_or_keep(joblib.load("Backend/models/co2_model.pkl"))
+
+    def predict(df):
+        return cost_model.predict(df), co2_model.predict(df)
+
+    return predict, BACKEND_FEATURES, pd.read_csv("Backend/data/Ecopack_dataset.csv")
+
+
+def main():
+
+    for label, load in (("/api models", api_predictor), ("Backend models", backend_predictor)):
+        predict, columns, catalog = load()
+        rows = catalog[columns]
+
+        tables = {}
+        for mode in ("grid", "rows"):
+            started = time.perf_counter()
+            tables[mode] = PredictionTable(predict, columns, catalog, mode)
+            print(f"\n{label}: {mode} table, {tables[mode].size} cells, built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        print(f"{'rows':>8}  {'live ms':>9}  {'grid ms':>9}  {'rows ms':>9}  {'speedup':>8}")
+
+        for size in BATCH_SIZES:
+            df = rows if size is None else rows.sample(size, random_state=0)
+            live = predict(df)
+
+            for table in tables.values():
+                assert all(np.array_equal(a, b) for a, b in zip(table.predict(df), live))
+
+            live_s = best_seconds(predict, df)
+            grid_s = best_seconds(tables["grid"].predict, df)
+            rows_s = best_seconds(tables["rows"].predict, df)
+
+            print(
+                f"{len(df):>8}  {live_s * 1000:>9.3f}  {grid_s * 1000:>9.3f}  "
+                f"{rows_s * 1000:>9.3f}  {live_s / min(grid_s, rows_s):>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Gunicorn settings for both apps.
+
+    gunicorn -c gunicorn.conf.py app:app              (repository root)
+    gunicorn -c gunicorn.conf.py Backend.app:app      (Backend API)
+
+With preload (the default) the app module is imported once in the master:
+the CSV catalog, the unpickled models, baselines, quantiles and
+db.create_all() are built there, and every worker is forked with them
+already in memory. The pages stay shared between workers until written.
+Both apps drop the master's pooled database connections in each forked
+worker (os.register_at_fork), and their background threads start lazily
+per process, so nothing else has to be re-done after the fork.
+
+GUNICORN_PRELOAD=0 goes back to every worker importing the app itself.
+"""
+
+import gc
+import os
+import time
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+
+def pre_fork(server, worker):
+    # objects built during preload are moved out of the collected generations,
+    # so a worker's garbage collector never writes to (and un-shares) their pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    # logged once the worker has its app, with or without preload
+    worker.log.info(
+        "Worker %s ready in %.1f ms", worker.pid, (time.perf_counter() - worker.forked_at) * 1000
+    )
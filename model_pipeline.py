@@ -0,0 +1,90 @@
+"""
+Fused feature scaling + cost/CO2 prediction for the /api endpoint.
+
+The scaler and both models are unpickled once. The scaler is applied in
+closed form from its fitted mean_/scale_, and both tree ensembles are
+compiled to NumPy node arrays (Backend/compiled_trees.py), so a prediction
+is one subtraction, one division and two array traversals. With a
+prediction table (Backend/prediction_table.py) known feature values are
+looked up instead.
+"""
+
+import joblib
+import numpy as np
+
+from Backend.compiled_trees import compile_or_keep
+from Backend.prediction_table import PredictionTable
+
+
+class ModelPipeline:
+
+    def __init__(self, scaler, cost_model, co2_model):
+
+        self.features = list(scaler.feature_names_in_)
+        self.mean = scaler.mean_ if scaler.with_mean else 0.0
+        self.scale = scaler.scale_ if scaler.with_std else 1.0
+
+        self.cost_model = compile_or_keep(cost_model)
+        self.co2_model = compile_or_keep(co2_model)
+
+        self.table = None
+
+    @classmethod
+    def load(cls, scaler_path, cost_model_path, co2_model_path):
+        return cls(
+            joblib.load(scaler_path),
+            joblib.load(cost_model_path),
+            joblib.load(co2_model_path)
+        )
+
+    def transform(self, df):
+        """Same result as scaler.transform(df[features])"""
+        x = df[self.features].to_numpy(dtype=np.float64)
+        return (x - self.mean) / self.scale
+
+    def predict(self, df):
+        """Predicted (cost, co2) arrays for the rows of df"""
+        if self.table is not None:
+            return self.table.predict(df)
+        return self.predict_live(df)
+
+    def predict_live(self, df):
+        x_scaled = self.transform(df)
+        return self.cost_model.predict(x_scaled), self.co2_model.predict(x_scaled)
+
+    def use_prediction_table(self, rows, mode):
+        """Precomputes the predictions of the feature values in `rows` ("grid" or "rows")"""
+        self.table = PredictionTable(self.predict_live, self.features, rows, mode)
+
+    def probe(self):
+        """One prediction on a dummy row: warms both models and fails early if one is broken"""
+        x_scaled = (np.ones((1, len(self.features))) - self.mean) / self.scale
+        self.cost_model.predict(x_scaled)
+        self.co2_model.predict(x_scaled)
+
+
+def minmax_normalize(values):
+    """
+    Closed-form MinMaxScaler().fit_transform() for a single column.
+
+    Uses the same float operations as scikit-learn, so the results are
+    bit-identical. A constant column (zero range) maps to 0.
+    """
+
+    values = np.asarray(values)
+
+    # like scikit-learn, keep float32 input (XGBoost predictions) in float32
+    if values.dtype not in (np.float32, np.float64):
+        values = values.astype(np.float64)
+
+    dtype = values.dtype.type
+
+    data_min = values.min()
+    data_range = values.max() - data_min
+
+    # scikit-learn treats ranges below 10 * eps as constant
+    if data_range < 10 * np.finfo(dtype).eps:
+        data_range = dtype(1.0)
+
+    scale = dtype(1.0) / data_range
+    return values * scale + (dtype(0.0) - data_min * scale)
@@ -0,0 +1,81 @@
+"""
+Shared fixtures. The tests run from the repository root against throwaway
+SQLite databases:
+
+    python -m pytest
+"""
+
+import os
+import sys
+import tempfile
+import types
+
+import pytest
+
+
+# no background model watchers in tests
+os.environ.setdefault("MODEL_POLL_SECONDS", "0")
+# model versions loaded by the apps are archived away from the shared default
+os.environ.setdefault("MODEL_ARCHIVE_DIR", tempfile.mkdtemp(prefix="model-archive-"))
+
+API_KEY = "test-key"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    """The Backend.app module, on a fresh SQLite database"""
+
+    directory = tmp_path_factory.mktemp("backend")
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory / 'backend.db'}"
+    os.environ["API_KEY"] = API_KEY
+    os.environ["REPORT_CACHE_DIR"] = str(directory / "reports")
+
+    from Backend import app
+
+    return app
+
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
+
+
+@pytest.fixture
+def auth():
+    return {"x-api-key": API_KEY}
+
+
+@pytest.fixture(scope="session")
+def root(tmp_path_factory):
+    """
+    The first app in the root app.py, as module root_app on a fresh SQLite
+    database. The file continues with a second, older app after its first
+    `if __name__ == "__main__":` block, which registers "/" again and cannot
+    be imported, so only the first app is loaded.
+    """
+
+    directory = tmp_path_factory.mktemp("root")
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory / 'root.db'}"
+    os.environ["API_KEY"] = API_KEY
+
+    path = os.path.join(ROOT, "app.py")
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+
+    module = types.ModuleType("root_app")
+    module.__file__ = path
+    sys.modules["root_app"] = module
+    exec(compile(source[:source.index('\nif __name__ == "__main__":')], path, "exec"), module.__dict__)
+
+    return module
+
+
+@pytest.fixture
+def root_client(root, monkeypatch):
+    # every request re-checks the data version
+    monkeypatch.setattr(root, "ANALYTICS_TTL_SECONDS", 0)
+    return root.app.test_client()
@@ -0,0 +1,75 @@
+import json
+
+from Backend import score_profiles
+
+
+PROFILE = {
+    "product_category": "food",
+    "fragility": "high",
+    "shipping_type": "domestic",
+    "sustainability_priority": "high"
+}
+
+
+def post_batch(client, auth, body, content_type="application/json"):
+
+    response = client.post("/api/recommend/batch", data=body, content_type=content_type, headers=auth)
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_bad_field_type_fails_only_its_profile(client, auth):
+
+    results = post_batch(client, auth, json.dumps([{**PROFILE, "product_category": 5}, PROFILE]))
+
+    assert results[0] == {"index": 0, "status": "error", "message": "Field must be a string: product_category"}
+    assert results[1]["index"] == 1
+    assert results[1]["status"] == "success"
+    assert results[1]["data"]
+
+
+def test_each_invalid_profile_gets_its_own_error(client, auth):
+
+    profiles = [
+        PROFILE,
+        {key: value for key, value in PROFILE.items() if key != "fragility"},
+        ["not", "an", "object"],
+        {**PROFILE, "product_category": "other", "other_category": None},
+        {**PROFILE, "sustainability_priority": ["high"]}
+    ]
+    body = "\n".join(json.dumps(profile) for profile in profiles)
+
+    results = post_batch(client, auth, body, "application/x-ndjson")
+
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert results[0]["status"] == "success"
+    assert [result.get("message") for result in results[1:]] == [
+        "Missing field: fragility",
+        "Profile must be a JSON object",
+        "Field must be a string: other_category",
+        "Field must be a string: sustainability_priority"
+    ]
+
+
+def test_single_recommendation_rejects_bad_types(client, auth):
+
+    response = client.post("/api/recommend", json={**PROFILE, "fragility": 3}, headers=auth)
+
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Field must be a string: fragility"
+
+    response = client.post("/api/recommend", json=[PROFILE], headers=auth)
+
+    assert response.status_code == 400
+
+
+def test_offline_scorer_skips_bad_profiles():
+
+    profiles, skipped, rows = score_profiles.score_chunk((10, [{**PROFILE, "product_category": 5}, PROFILE, "x"]))
+
+    assert (profiles, skipped) == (3, 2)
+    assert rows
+    assert {row["index"] for row in rows} == {11}
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from Backend import compiled_trees
+from Backend.compiled_trees import CompiledEnsemble, compile_or_keep
+
+
+COLUMNS = ["strength", "weight_capacity", "recyclability", "biodegradability"]
+
+
+@pytest.fixture(scope="module")
+def training():
+    rng = np.random.default_rng(24)
+    X = pd.DataFrame(rng.integers(1, 11, size=(300, len(COLUMNS))).astype(float), columns=COLUMNS)
+    y = X["strength"] * 0.7 - X["recyclability"] * 0.2 + rng.normal(0, 0.3, len(X))
+    return X, y
+
+
+def rows(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.uniform(0, 12, size=(n, len(COLUMNS))), columns=COLUMNS)
+
+
+@pytest.mark.parametrize("make_model", [
+    lambda: RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0),
+    lambda: make_pipeline(StandardScaler(), RandomForestRegressor(n_estimators=10, random_state=0))
+])
+def test_random_forest_compiles_to_the_same_predictions(training, make_model):
+
+    X, y = training
+    model = make_model().fit(X, y)
+
+    compiled = compile_or_keep(model)
+
+    assert isinstance(compiled, CompiledEnsemble)
+    for batch in (rows(1), rows(60), X):
+        np.testing.assert_allclose(compiled.predict(batch), model.predict(batch), rtol=1e-6)
+
+
+def test_xgboost_compiles_to_the_same_predictions(training):
+
+    xgboost = pytest.importorskip("xgboost")
+    X, y = training
+    model = xgboost.XGBRegressor(n_estimators=30, max_depth=4).fit(X, y)
+
+    compiled = compile_or_keep(model)
+
+    assert isinstance(compiled, CompiledEnsemble)
+    np.testing.assert_allclose(compiled.predict(rows(200)), model.predict(rows(200)), rtol=1e-6)
+
+
+def test_unsupported_model_is_served_as_is(training):
+
+    X, y = training
+    model = LinearRegression().fit(X, y)
+
+    assert compile_or_keep(model) is model
+
+
+@pytest.mark.parametrize("error", [IndexError, ValueError, TypeError])
+def test_unexpected_compile_errors_serve_the_model(training, monkeypatch, error):
+
+    X, y = training
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+
+    def broken(model):
+        raise error("unexpected tree layout")
+
+    monkeypatch.setattr(compiled_trees, "compile_model", broken)
+
+    assert compile_or_keep(model) is model
@@ -0,0 +1,101 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def context(backend):
+    with backend.app.app_context():
+        yield
+
+
+def save(backend, material=None, created_at=None):
+
+    result = {
+        "material_name": material or f"Material {uuid.uuid4().hex[:8]}",
+        "predicted_cost": 2.0,
+        "predicted_co2": 1.0,
+        "suitability_score": 0.5
+    }
+
+    backend.save_rows(backend.build_recommendation_rows(
+        "food", "high", "domestic", "high", [result], created_at=created_at
+    ))
+
+    return result["material_name"]
+
+
+def test_insert_invalidates_cached_dashboard(backend, context):
+
+    save(backend)
+    version = backend.get_data_version()
+    metrics = backend.compute_dashboard_data()
+
+    assert backend.compute_dashboard_data() is metrics
+
+    save(backend)
+
+    assert backend.get_data_version() != version
+    assert backend.compute_dashboard_data() is not metrics
+
+
+def test_duplicate_insert_keeps_data_version(backend, context):
+
+    material = save(backend)
+    version = backend.get_data_version()
+
+    save(backend, material)
+
+    assert backend.get_data_version() == version
+
+
+def test_archive_changes_data_version(backend, context):
+
+    save(backend, created_at=datetime.utcnow() - timedelta(days=800))
+    version = backend.get_data_version()
+
+    assert backend.archive_old_recommendations(days=365) >= 1
+    assert backend.get_data_version() != version
+
+
+def test_rebuild_changes_data_version_when_totals_change(backend, context):
+
+    save(backend)
+    version = backend.get_data_version()
+
+    # totals that drifted from the raw rows
+    backend.MonthlyStats.query.update({"count": backend.MonthlyStats.count + 1})
+    backend.db.session.commit()
+    drifted = backend.get_data_version()
+
+    backend.rebuild_dashboard_stats()
+
+    assert drifted != version
+    assert backend.get_data_version() == version
+
+
+def test_alternating_filters_keep_their_own_results(backend, context):
+
+    save(backend)
+    food = {"start": None, "end": None, "category": "food"}
+
+    daily = backend.compute_dashboard_data()
+    weekly = backend.compute_dashboard_data(granularity="week")
+    filtered = backend.compute_dashboard_data(food)
+
+    assert len({id(daily), id(weekly), id(filtered)}) == 3
+    assert backend.compute_dashboard_data() is daily
+    assert backend.compute_dashboard_data(food) is filtered
+    assert backend.compute_dashboard_data(granularity="week") is weekly
+
+
+def test_dashboard_cache_is_bounded(backend, context, monkeypatch):
+
+    monkeypatch.setattr(backend, "DASHBOARD_CACHE_SIZE", 2)
+
+    for category in ("a", "b", "c"):
+        backend.compute_dashboard_data({"start": None, "end": None, "category": category})
+
+    assert len(backend.dashboard_cache) == 2
+    assert [key[3][2] for key in backend.dashboard_cache] == ["b", "c"]
@@ -0,0 +1,92 @@
+"""
+Cold-start budget for both apps, measured with `python -X importtime` in a
+fresh interpreter (see benchmarks/bench_import_time.py for the breakdown):
+
+- IMPORT_BUDGET_MS: the third-party imports at the top of each app
+- STARTUP_BUDGET_MS: importing the whole app, models and catalog included
+
+Neither may import the export, PDF or chart libraries (LAZY_MODULES).
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.bench_import_time import DEFAULT_BUDGET_MS, LAZY_MODULES, import_times, is_first_party, module_imports
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 10000))
+RUNS = 2
+
+# the root app.py holds a second app after its first __main__ block that
+# cannot be imported, so its startup runs the first app only
+STARTUP = {
+    "app.py": (
+        "source = open('app.py', encoding='utf-8').read()\n"
+        "source = source[:source.index('\\nif __name__ == \"__main__\":')]\n"
+        "exec(compile(source, 'app.py', 'exec'), {'__name__': 'root_app'})"
+    ),
+    "Backend/app.py": "import Backend.app"
+}
+
+
+def startup(source, tmp_path):
+    """(milliseconds, every module imported) for running `source` in a fresh interpreter"""
+
+    timed = f"import time\nstarted = time.perf_counter()\n{source}\nprint((time.perf_counter() - started) * 1000)"
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'startup.db'}",
+        "API_KEY": "startup-test",
+        "REPORT_CACHE_DIR": str(tmp_path / "reports"),
+        "MODEL_POLL_SECONDS": "0"
+    }
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", timed],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    imported = {
+        line.split("|")[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "self [us]" not in line
+    }
+
+    return float(result.stdout.splitlines()[-1]), imported
+
+
+def lazy_imports(imported):
+    return sorted({name.split(".")[0] for name in imported} & set(LAZY_MODULES))
+
+
+@pytest.mark.parametrize("label", sorted(STARTUP))
+def test_module_imports_fit_the_budget(label):
+
+    runs = []
+
+    for _ in range(RUNS):
+        top_level, imported = import_times(module_imports(os.path.join(ROOT, label)))
+        third_party_ms = sum(us for name, us in top_level.items() if not is_first_party(name)) / 1000
+        runs.append((third_party_ms, imported))
+
+    total_ms, imported = min(runs, key=lambda run: run[0])
+
+    assert lazy_imports(imported) == []
+    assert total_ms <= IMPORT_BUDGET_MS, f"{label}: {total_ms:.0f} ms in third-party imports"
+
+
+@pytest.mark.parametrize("label", sorted(STARTUP))
+def test_startup_fits_the_budget(label, tmp_path):
+
+    total_ms, imported = min(startup(STARTUP[label], tmp_path) for _ in range(RUNS))
+
+    assert lazy_imports(imported) == []
+    assert total_ms <= STARTUP_BUDGET_MS, f"{label}: {total_ms:.0f} ms to start"
@@ -0,0 +1,147 @@
+import json
+
+import pytest
+
+from Backend import model_registry
+from Backend.model_registry import ModelRegistry, RegistryError, files_digest
+
+
+FILES = ["cost.txt", "co2.txt"]
+
+
+def load(paths):
+    models = {}
+    for name, path in paths.items():
+        with open(path, encoding="utf-8") as f:
+            models[name] = f.read()
+    return models
+
+
+def deploy(directory, content):
+    for name in FILES:
+        (directory / name).write_text(f"{name} {content}", encoding="utf-8")
+    return files_digest({name: str(directory / name) for name in FILES})
+
+
+def worker(directory):
+    # poll_seconds=0: no watcher thread, the tests call sync() for each poll
+    return ModelRegistry(str(directory), FILES, load, poll_seconds=0, archive_dir=str(directory.parent / "archive"))
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    directory = tmp_path / "models"
+    directory.mkdir()
+    return directory
+
+
+def test_rollback_is_applied_by_every_worker(models_dir):
+
+    v1 = deploy(models_dir, "one")
+    first, second = worker(models_dir), worker(models_dir)
+
+    v2 = deploy(models_dir, "two, longer")
+    first.sync()
+    second.sync()
+    assert first.active.version == second.active.version == v2
+
+    first.rollback()
+    assert first.active.version == v1
+    assert second.active.version == v2
+
+    second.sync()
+    assert second.active.version == v1
+    assert second.active.models["cost.txt"] == "cost.txt one"
+    assert second.describe()["pinned_version"] == v1
+
+
+def test_new_worker_loads_the_pinned_version_from_the_archive(models_dir):
+
+    v1 = deploy(models_dir, "one")
+    first = worker(models_dir)
+    deploy(models_dir, "two, longer")
+    first.sync()
+    first.rollback(v1)
+
+    # started after the rollback, with only the new files on disk
+    later = worker(models_dir)
+
+    assert later.active.version == v1
+    assert later.active.models["co2.txt"] == "co2.txt one"
+
+
+def test_new_files_on_disk_replace_the_pin(models_dir):
+
+    deploy(models_dir, "one")
+    first, second = worker(models_dir), worker(models_dir)
+    deploy(models_dir, "two, longer")
+    first.sync()
+    second.sync()
+    first.rollback()
+
+    v3 = deploy(models_dir, "three, longer still")
+    first.sync()
+    second.sync()
+
+    assert first.active.version == second.active.version == v3
+    assert first.describe()["pinned_version"] is None
+
+
+def test_unknown_version_is_not_pinned(models_dir):
+
+    v1 = deploy(models_dir, "one")
+    registry = worker(models_dir)
+
+    with pytest.raises(RegistryError):
+        registry.rollback("000000000000")
+    with pytest.raises(RegistryError):
+        registry.rollback()
+
+    assert registry.active.version == v1
+    assert not (models_dir / "ACTIVE").exists()
+
+
+def test_unusable_pin_keeps_the_files_on_disk(models_dir):
+
+    v1 = deploy(models_dir, "one")
+    (models_dir / "ACTIVE").write_text(json.dumps({"version": "000000000000", "disk_version": v1}))
+
+    registry = worker(models_dir)
+
+    assert registry.active.version == v1
+    assert registry.stats["last_error"] == "Unknown model version: 000000000000"
+
+
+def test_archive_is_kept_outside_the_models_directory(models_dir):
+
+    v1 = deploy(models_dir, "one")
+    worker(models_dir)
+
+    assert sorted(path.name for path in models_dir.iterdir()) == sorted(FILES)
+    assert (models_dir.parent / "archive" / v1).is_dir()
+
+
+def test_files_that_keep_changing_fail_startup(models_dir, monkeypatch):
+
+    deploy(models_dir, "one")
+    monkeypatch.setattr(model_registry, "STARTUP_RETRY_SECONDS", 0)
+    changes = iter(range(1000))
+
+    def load_while_copying(paths):
+        deploy(models_dir, f"copy {next(changes)}")
+        return load(paths)
+
+    with pytest.raises(RegistryError, match="kept changing"):
+        ModelRegistry(str(models_dir), FILES, load_while_copying, poll_seconds=0,
+                      archive_dir=str(models_dir.parent / "archive"))
+
+
+def test_rollback_endpoint_needs_the_api_key(client, auth):
+
+    assert client.get("/api/models").status_code == 401
+    assert client.post("/api/models/rollback", json={"version": "000000000000"}).status_code == 401
+
+    response = client.post("/api/models/rollback", json={"version": "000000000000"}, headers=auth)
+
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Unknown model version: 000000000000"
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Backend.prediction_table import PredictionTable
+
+
+COLUMNS = ["strength", "recyclability"]
+
+
+def predict(df):
+    x = df[COLUMNS].to_numpy(dtype=np.float64)
+    return x[:, 0] * 10 + x[:, 1], x.sum(axis=1)
+
+
+def catalog(*rows):
+    return pd.DataFrame(list(rows), columns=COLUMNS)
+
+
+def assert_same_as_live(table, df):
+    for looked_up, live in zip(table.predict(df), predict(df)):
+        np.testing.assert_array_equal(looked_up, live)
+
+
+def test_grid_covers_the_bounding_box():
+
+    table = PredictionTable(predict, COLUMNS, catalog((1, 2), (3, 5)))
+
+    assert table.mode == "grid"
+    assert table.size == 3 * 4
+    assert table.index is None
+
+    assert_same_as_live(table, catalog((2, 4), (3, 2), (9, 9), (np.nan, 1)))
+    assert table.describe()["fallbacks"] == 2
+
+
+@pytest.mark.parametrize("rows, max_cells", [
+    (((1, 2), (1000, 5)), 100),
+    (((1.5, 2), (3, 5)), 1_000_000)
+])
+def test_fallback_to_rows_clears_the_grid(rows, max_cells):
+
+    table = PredictionTable(predict, COLUMNS, catalog(*rows), max_cells=max_cells)
+
+    assert table.mode == "rows"
+    assert table.low is None and table.shape is None and table.strides is None
+    assert table.size == 2
+
+    assert_same_as_live(table, catalog(*rows, (2, 2)))
+    assert table.describe()["fallbacks"] == 1
+
+
+def test_empty_table_predicts_live():
+
+    table = PredictionTable(predict, COLUMNS, catalog((np.nan, 1)))
+
+    assert table.size == 0
+    assert_same_as_live(table, catalog((1, 1)))
@@ -0,0 +1,120 @@
+import os
+import shutil
+
+import pytest
+
+from Backend import recommender
+
+
+PROFILE = ("food", "high", "domestic", "high")
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    """A copy of the catalog CSV that the recommender reloads from"""
+
+    path = tmp_path / "Ecopack_dataset.csv"
+    shutil.copy(recommender.DATASET_PATH, path)
+
+    monkeypatch.setattr(recommender, "DATASET_PATH", str(path))
+    monkeypatch.setattr(recommender, "CATALOG_CHECK_SECONDS", 0)
+    recommender.load_catalog()
+
+    yield path
+
+    monkeypatch.undo()
+    recommender.load_catalog()
+    recommender.rank_materials.cache_clear()
+
+
+def replace_dataset(path, edit):
+
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(edit(text))
+
+    os.replace(tmp_path, path)
+
+    # a different modification time, even on coarse filesystem clocks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_catalog_is_published_as_one_object(dataset):
+
+    catalog = recommender.catalog
+
+    assert len(catalog.prediction_store) == len(catalog.materials_df)
+    assert catalog.prediction_store.index.equals(catalog.materials_df.index)
+    assert catalog.filter_index.select("food", "high").max() < len(catalog.materials_df)
+    assert catalog.model_version == recommender.model_registry.active.version
+
+
+def test_reload_replaces_catalog_and_rankings(dataset):
+
+    before = recommender.generate_recommendations(*PROFILE)
+    old_catalog = recommender.catalog
+    top = before[0]["material_name"]
+
+    replace_dataset(dataset, lambda text: text.replace(f'"{top}"', '"Renamed Material"'))
+
+    assert recommender.refresh_catalog() is True
+    assert recommender.catalog is not old_catalog
+
+    after = recommender.generate_recommendations(*PROFILE)
+
+    assert after[0]["material_name"] == "Renamed Material"
+    assert [r["predicted_cost"] for r in after] == [r["predicted_cost"] for r in before]
+
+
+def test_refresh_without_changes_keeps_catalog(dataset):
+
+    catalog = recommender.catalog
+
+    assert recommender.refresh_catalog() is False
+    assert recommender.catalog is catalog
+
+
+def test_refresh_after_another_reload_returns_false(dataset):
+
+    replace_dataset(dataset, lambda text: text.replace("Jute Fiber Packaging", "Jute"))
+
+    # another thread got the lock first and reloaded
+    recommender.load_catalog()
+    catalog = recommender.catalog
+
+    assert recommender.refresh_catalog() is False
+    assert recommender.catalog is catalog
+
+
+def test_dataset_check_is_throttled(dataset, monkeypatch):
+
+    monkeypatch.setattr(recommender, "CATALOG_CHECK_SECONDS", 3600)
+    recommender.catalog_checked_at = recommender.time.monotonic()
+
+    replace_dataset(dataset, lambda text: text.replace("Jute Fiber Packaging", "Jute"))
+
+    assert recommender.refresh_catalog() is False
+    assert "Jute Fiber Packaging" in set(recommender.catalog.materials_df["material_name"])
+
+
+def test_missing_dataset_keeps_serving_current_catalog(dataset):
+
+    catalog = recommender.catalog
+    os.remove(dataset)
+
+    assert recommender.refresh_catalog() is False
+    assert recommender.catalog is catalog
+    assert recommender.generate_recommendations(*PROFILE)
+
+
+def test_broken_dataset_keeps_serving_current_catalog(dataset):
+
+    catalog = recommender.catalog
+    replace_dataset(dataset, lambda text: text.splitlines()[0][:20])
+
+    assert recommender.refresh_catalog() is False
+    assert recommender.catalog is catalog
@@ -0,0 +1,114 @@
+import json
+import os
+import time
+
+import pytest
+
+from Backend.report_jobs import ReportJobs
+
+
+DAY = 86400
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    # one worker runs the tasks in order, so wait() follows every earlier job
+    return ReportJobs(str(tmp_path), workers=1, keep_for=DAY)
+
+
+def wait(jobs):
+    jobs.executor.submit(lambda: None).result(timeout=10)
+
+
+def build_report(content):
+    def build(output):
+        output.write(content)
+    return build
+
+
+def finish(jobs, params, content):
+    job = jobs.submit(params, 1, build_report(content), "pdf", "report.pdf")
+    wait(jobs)
+    return jobs.get(job["job_id"])
+
+
+def age(jobs, job, seconds):
+    """Pretend the job record and its blob were last written `seconds` ago"""
+
+    path = jobs.job_path(job["job_id"])
+    with open(path, encoding="utf-8") as f:
+        record = json.load(f)
+
+    record["updated_at"] -= seconds
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+
+    if job["artifact"]:
+        old = time.time() - seconds
+        os.utime(jobs.artifact_path(job), (old, old))
+
+
+def test_finished_job_returns_the_same_artifact(jobs):
+
+    job = finish(jobs, {"report": "a"}, b"report a")
+
+    assert job["status"] == "done"
+    assert jobs.submit({"report": "a"}, 1, build_report(b"other"), "pdf", "report.pdf") == job
+
+    with open(jobs.artifact_path(job), "rb") as f:
+        assert f.read() == b"report a"
+
+
+def test_expired_jobs_are_removed_with_their_artifacts(jobs):
+
+    old = finish(jobs, {"report": "old"}, b"old report")
+    new = finish(jobs, {"report": "new"}, b"new report")
+    age(jobs, old, DAY + 1)
+
+    assert jobs.evict() == 1
+
+    assert jobs.get(old["job_id"]) is None
+    assert not os.path.exists(jobs.artifact_path(old))
+    assert jobs.get(new["job_id"]) == new
+    assert os.path.exists(jobs.artifact_path(new))
+
+
+def test_artifact_shared_with_a_live_job_is_kept(jobs):
+
+    old = finish(jobs, {"report": "old"}, b"same report")
+    new = finish(jobs, {"report": "new"}, b"same report")
+    assert old["artifact"] == new["artifact"]
+    age(jobs, old, DAY + 1)
+
+    jobs.evict()
+
+    assert jobs.get(old["job_id"]) is None
+    assert os.path.exists(jobs.artifact_path(new))
+
+
+def test_unreferenced_blobs_are_kept_while_a_job_may_still_record_them(jobs):
+
+    finish(jobs, {"report": "a"}, b"report a")
+    fresh = os.path.join(jobs.blobs_dir, "unrecorded.pdf")
+    stale = os.path.join(jobs.blobs_dir, "abandoned.tmp")
+    for path in (fresh, stale):
+        with open(path, "wb") as f:
+            f.write(b"x")
+    old = time.time() - jobs.stale_after - 1
+    os.utime(stale, (old, old))
+
+    jobs.evict()
+
+    assert os.path.exists(fresh)
+    assert not os.path.exists(stale)
+
+
+def test_submit_schedules_eviction(jobs):
+
+    old = finish(jobs, {"report": "old"}, b"old report")
+    age(jobs, old, DAY + 1)
+    jobs.evicted_at = None
+
+    finish(jobs, {"report": "new"}, b"new report")
+
+    assert jobs.get(old["job_id"]) is None
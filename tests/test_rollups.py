@@ -0,0 +1,208 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from Backend import rollups
+from Backend.rollups import coarser_rows, period_filters, period_start, rollup_rows
+
+
+# ---------------- bucketing
+
+@pytest.mark.parametrize("day, week, month", [
+    (date(2025, 3, 2), date(2025, 2, 24), date(2025, 3, 1)),     # Sunday: the week began in February
+    (date(2025, 3, 3), date(2025, 3, 3), date(2025, 3, 1)),      # Monday starts its own week
+    (date(2025, 3, 31), date(2025, 3, 31), date(2025, 3, 1)),
+    (date(2025, 1, 1), date(2024, 12, 30), date(2025, 1, 1)),    # ISO week across the new year
+    (date(2024, 2, 29), date(2024, 2, 26), date(2024, 2, 1))
+])
+def test_period_start(day, week, month):
+
+    assert period_start(day, "day") == day
+    assert period_start(day, "week") == week
+    assert period_start(day, "month") == month
+
+
+def test_unknown_granularity_is_rejected():
+
+    with pytest.raises(ValueError):
+        period_start(date(2025, 1, 1), "year")
+
+
+def row(created_at, category="food", cost=1.0, co2=2.0):
+    return {"product_category": category, "predicted_cost": cost, "predicted_co2": co2, "created_at": created_at}
+
+
+def test_rows_on_either_side_of_a_boundary_go_to_different_periods():
+
+    rows = [
+        row(datetime(2025, 3, 2, 23, 59, 59)),
+        row(datetime(2025, 3, 3, 0, 0)),
+        row(datetime(2025, 3, 31, 23, 59, 59)),
+        row(datetime(2025, 4, 1, 0, 0), category=None)
+    ]
+
+    weeks = {(r["week"], r["product_category"]): r["count"] for r in rollup_rows(rows, "week")}
+    months = {(r["month"], r["product_category"]): r["count"] for r in rollup_rows(rows, "month")}
+
+    assert weeks == {
+        (date(2025, 2, 24), "food"): 1,
+        (date(2025, 3, 3), "food"): 1,
+        (date(2025, 3, 31), "food"): 1,
+        (date(2025, 3, 31), ""): 1
+    }
+    assert months == {(date(2025, 3, 1), "food"): 3, (date(2025, 4, 1), ""): 1}
+
+
+def test_coarser_rows_match_rollups_of_the_raw_rows():
+
+    start = datetime(2024, 12, 20, 12)
+    rows = [row(start + timedelta(hours=7 * i), ("food", "cosmetics")[i % 2], cost=i, co2=2 * i) for i in range(200)]
+
+    daily = rollup_rows(rows, "day")
+
+    for granularity in ("week", "month"):
+        key = lambda r: (r[granularity], r["product_category"])
+        assert sorted(coarser_rows(daily, granularity), key=key) == sorted(rollup_rows(rows, granularity), key=key)
+
+
+def test_period_filters_widen_to_whole_periods():
+
+    filters = {"start": date(2025, 3, 5), "end": date(2025, 3, 20), "category": "food"}
+
+    assert period_filters(filters, "week") == {"start": date(2025, 3, 3), "end": date(2025, 3, 17), "category": "food"}
+    assert period_filters(filters, "month")["start"] == date(2025, 3, 1)
+    assert period_filters(None, "week") is None
+
+
+# ---------------- upserts and archiving on SQLite (Backend app)
+
+@pytest.fixture
+def empty(backend):
+    with backend.app.app_context():
+        for model in (backend.Recommendation, backend.RecommendationArchive, backend.MaterialStats,
+                      *backend.ROLLUP_MODELS.values()):
+            model.query.delete()
+        backend.db.session.commit()
+        yield
+
+
+def save(backend, days_ago, material, category="food", cost=2.0, co2=1.0):
+
+    result = {"material_name": material, "predicted_cost": cost, "predicted_co2": co2, "suitability_score": 0.5}
+    created_at = datetime.utcnow() - timedelta(days=days_ago)
+
+    backend.save_rows(backend.build_recommendation_rows(category, "high", "domestic", "high", [result], created_at=created_at))
+
+
+def rollup_tables(backend):
+    return {
+        model.__tablename__: sorted(
+            (getattr(stats, granularity), stats.product_category, stats.count,
+             round(stats.total_cost, 9), round(stats.total_co2, 9))
+            for stats in model.query
+        )
+        for granularity, model in backend.ROLLUP_MODELS.items()
+    }
+
+
+def dashboard_figures(backend, granularity):
+    data = backend.build_dashboard_data(granularity=granularity)
+    return data["avg_co2_reduction"], data["avg_cost_savings"]
+
+
+def test_inserts_upsert_every_rollup(backend, empty):
+
+    save(backend, 0, "Kraft Paper", cost=2.0, co2=1.0)
+    save(backend, 0, "Molded Pulp", cost=4.0, co2=3.0)
+    save(backend, 0, "Molded Pulp", category="cosmetics", cost=1.0, co2=1.0)
+
+    today = datetime.utcnow().date()
+
+    for granularity, model in backend.ROLLUP_MODELS.items():
+        food = backend.db.session.get(model, (period_start(today, granularity), "food"))
+        assert (food.count, food.total_cost, food.total_co2) == (2, 6.0, 4.0)
+
+    assert backend.db.session.get(backend.MaterialStats, "Molded Pulp").count == 2
+
+
+def test_archiving_keeps_the_dashboard_totals(backend, empty):
+
+    for days_ago in (400, 420, 500, 10, 1):
+        save(backend, days_ago, f"Material {days_ago}", cost=days_ago / 100, co2=days_ago / 50)
+
+    tables = rollup_tables(backend)
+    # the trend charts are drawn from the rollup tables compared below
+    dashboards = {granularity: dashboard_figures(backend, granularity) for granularity in backend.ROLLUP_MODELS}
+
+    assert backend.archive_old_recommendations(days=365) == 3
+
+    assert backend.Recommendation.query.count() == 2
+    assert backend.RecommendationArchive.query.count() == 3
+    assert rollup_tables(backend) == tables
+    for granularity, dashboard in dashboards.items():
+        assert dashboard_figures(backend, granularity) == dashboard
+
+    # and a rebuild from raw + archived rows comes back to the same totals
+    backend.rebuild_dashboard_stats()
+    assert rollup_tables(backend) == tables
+
+
+def test_archive_moves_rows_oldest_first_in_batches(backend, empty, monkeypatch):
+
+    for days_ago in (900, 800, 700, 600, 500, 1):
+        save(backend, days_ago, f"Material {days_ago}")
+
+    old_ids = [r.id for r in backend.Recommendation.query.order_by(backend.Recommendation.created_at)][:5]
+    moved = []
+    commit = backend.db.session.commit
+
+    def commit_batch():
+        moved.append(sorted(r.id for r in backend.RecommendationArchive.query))
+        commit()
+
+    monkeypatch.setattr(backend.db.session, "commit", commit_batch)
+
+    cutoff = datetime.utcnow() - timedelta(days=365)
+    archived = rollups.archive_rows(
+        backend.db.session, backend.Recommendation, backend.RecommendationArchive, cutoff, batch_size=2
+    )
+
+    assert archived == 5
+    assert moved == [sorted(old_ids[:2]), sorted(old_ids[:4]), sorted(old_ids)]
+    assert [r.material_name for r in backend.Recommendation.query] == ["Material 1"]
+
+    archived_row = backend.db.session.get(backend.RecommendationArchive, old_ids[0])
+    assert (archived_row.material_name, archived_row.product_category) == ("Material 900", "food")
+
+
+# ---------------- root app data version
+
+def test_root_data_version_follows_archives_and_rebuilds(root):
+
+    rows = [{
+        "product_category": "food",
+        "material_name": "Kraft Paper",
+        "predicted_cost": 2.0,
+        "predicted_co2": 1.0,
+        "suitability_score": 0.5,
+        "created_at": datetime.utcnow() - timedelta(days=days_ago)
+    } for days_ago in (800, 1)]
+
+    with root.app.app_context():
+        root.save_recommendation_rows(rows)
+        version = root.recommendation_data_version()
+
+        # totals that drifted from the raw rows: a rebuild changes the trends
+        root.MonthlyStats.query.update({"count": root.MonthlyStats.count + 1})
+        root.db.session.commit()
+        drifted = root.recommendation_data_version()
+        root.rebuild_rollups()
+
+        assert drifted != version
+        assert root.recommendation_data_version() == version
+
+        rollups.archive_rows(
+            root.db.session, root.Recommendation, root.RecommendationArchive, datetime.utcnow() - timedelta(days=365)
+        )
+
+        assert root.recommendation_data_version() != version
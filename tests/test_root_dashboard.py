@@ -0,0 +1,246 @@
+"""
+The root dashboard's GROUP BY aggregates against the pandas computation
+they replaced, which loaded every row and merged it with df_materials.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+
+CATEGORIES = ["food", "electronics", "cosmetics", "pharmacy"]
+
+
+@pytest.fixture
+def seeded(root):
+    """About 300 recommendations over eight days, one material without a spec"""
+
+    rng = random.Random(16)
+    materials = root.df_materials["material_name"].sample(12, random_state=16).tolist() + ["Unlisted Foam"]
+    start = datetime(2025, 3, 1, 8)
+
+    rows = [{
+        "product_category": rng.choice(CATEGORIES),
+        "fragility": "medium",
+        "shipping_type": "domestic",
+        "sustainability_priority": "high",
+        "material_name": rng.choice(materials),
+        "predicted_cost": rng.uniform(1, 9),
+        "predicted_co2": rng.uniform(1, 8),
+        "suitability_score": rng.random(),
+        "created_at": start + timedelta(days=rng.randrange(8), minutes=rng.randrange(600))
+    } for _ in range(300)]
+
+    with root.app.app_context():
+        for model in (root.Recommendation, root.RecommendationArchive, *root.ROLLUP_MODELS.values()):
+            model.query.delete()
+        root.db.session.commit()
+
+        root.save_recommendation_rows(rows)
+
+        yield pd.DataFrame([{
+            "material_name": r.material_name,
+            "predicted_cost": r.predicted_cost,
+            "predicted_co2": r.predicted_co2,
+            "suitability_score": r.suitability_score,
+            "product_category": r.product_category,
+            "created_at": r.created_at
+        } for r in root.Recommendation.query.order_by(root.Recommendation.id)])
+
+
+def pandas_analytics(root, df):
+    """get_dashboard_analytics before the SQL pushdown"""
+
+    BASELINE_CO2, BASELINE_COST = root.BASELINE_CO2, root.BASELINE_COST
+
+    material_usage = df['material_name'].value_counts().head(10).to_dict()
+
+    avg_predicted_co2 = df['predicted_co2'].mean()
+    co2_reduction_percent = ((BASELINE_CO2 - avg_predicted_co2) / BASELINE_CO2) * 100
+    total_co2_saved = (BASELINE_CO2 - avg_predicted_co2) * len(df)
+
+    avg_predicted_cost = df['predicted_cost'].mean()
+    cost_savings_percent = ((BASELINE_COST - avg_predicted_cost) / BASELINE_COST) * 100
+    total_cost_saved = (BASELINE_COST - avg_predicted_cost) * len(df)
+
+    df_with_specs = df.merge(
+        root.df_materials[['material_name', 'biodegradibility_score', 'recyclability_percentage']],
+        on='material_name',
+        how='left'
+    )
+    eco_friendly_count = len(df_with_specs[df_with_specs['biodegradibility_score'] >= 7])
+    non_eco_count = len(df_with_specs[df_with_specs['biodegradibility_score'] < 7])
+
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['created_at']).dt.date
+    daily_trends = df.groupby('date').agg({
+        'predicted_co2': 'mean',
+        'predicted_cost': 'mean',
+        'material_name': 'count'
+    }).reset_index()
+    daily_trends.columns = ['date', 'avg_co2', 'avg_cost', 'recommendation_count']
+    daily_trends['date'] = daily_trends['date'].astype(str)
+
+    category_breakdown = df.groupby('product_category').agg({
+        'predicted_co2': 'mean',
+        'predicted_cost': 'mean',
+        'material_name': 'count'
+    }).round(2).to_dict()
+
+    top_materials = df.groupby('material_name').agg({
+        'suitability_score': 'mean',
+        'predicted_co2': 'mean',
+        'predicted_cost': 'mean',
+        'material_name': 'count'
+    }).round(3)
+    top_materials.columns = ['avg_suitability', 'avg_co2', 'avg_cost', 'times_recommended']
+    top_materials = top_materials.sort_values('avg_suitability', ascending=False).head(10)
+
+    return {
+        "summary_cards": {
+            "total_recommendations": len(df),
+            "unique_materials_used": df['material_name'].nunique(),
+            "co2_reduction_percent": round(co2_reduction_percent, 2),
+            "total_co2_saved": round(total_co2_saved, 2),
+            "cost_savings_percent": round(cost_savings_percent, 2),
+            "total_cost_saved": round(total_cost_saved, 2),
+            "avg_suitability_score": round(df['suitability_score'].mean() * 100, 1),
+            "eco_friendly_percentage": round((eco_friendly_count / len(df)) * 100, 1)
+        },
+        "material_usage": material_usage,
+        "eco_distribution": {
+            "eco_friendly": eco_friendly_count,
+            "non_eco_friendly": non_eco_count
+        },
+        "trends": daily_trends.to_dict('records'),
+        "category_breakdown": category_breakdown,
+        "top_materials": top_materials.reset_index().to_dict('records')
+    }
+
+
+def pandas_charts(root, df):
+    """get_dashboard_charts before the SQL pushdown"""
+
+    BASELINE_CO2, BASELINE_COST = root.BASELINE_CO2, root.BASELINE_COST
+
+    df_with_specs = df.merge(
+        root.df_materials[['material_name', 'biodegradibility_score', 'recyclability_percentage']],
+        on='material_name',
+        how='left'
+    )
+
+    charts_data = {}
+
+    material_counts = df['material_name'].value_counts().head(10)
+    charts_data['material_usage'] = {
+        'labels': material_counts.index.tolist(),
+        'values': material_counts.values.tolist()
+    }
+
+    eco_counts = df_with_specs['biodegradibility_score'].apply(
+        lambda x: 'Eco-Friendly (≥7)' if x >= 7 else 'Non-Eco (<7)'
+    ).value_counts()
+    charts_data['eco_distribution'] = {
+        'labels': eco_counts.index.tolist(),
+        'values': eco_counts.values.tolist()
+    }
+
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['created_at']).dt.date
+    daily_co2 = df.groupby('date')['predicted_co2'].mean().reset_index()
+    daily_co2['co2_reduction'] = ((BASELINE_CO2 - daily_co2['predicted_co2']) / BASELINE_CO2) * 100
+    charts_data['co2_trend'] = {
+        'dates': [str(d) for d in daily_co2['date'].tolist()],
+        'values': daily_co2['co2_reduction'].tolist()
+    }
+
+    daily_cost = df.groupby('date')['predicted_cost'].mean().reset_index()
+    daily_cost['cost_savings'] = BASELINE_COST - daily_cost['predicted_cost']
+    charts_data['cost_trend'] = {
+        'dates': [str(d) for d in daily_cost['date'].tolist()],
+        'values': daily_cost['cost_savings'].tolist()
+    }
+
+    top_materials = df.groupby('material_name').agg({
+        'suitability_score': 'mean'
+    }).sort_values('suitability_score', ascending=True).tail(10)
+    charts_data['top_materials'] = {
+        'labels': top_materials.index.tolist(),
+        'values': (top_materials['suitability_score'] * 100).tolist()
+    }
+
+    category_stats = df.groupby('product_category').agg({
+        'predicted_co2': 'mean',
+        'predicted_cost': 'mean'
+    }).reset_index()
+    charts_data['category_comparison'] = {
+        'categories': category_stats['product_category'].tolist(),
+        'co2_values': category_stats['predicted_co2'].round(2).tolist(),
+        'cost_values': category_stats['predicted_cost'].round(2).tolist()
+    }
+
+    return charts_data
+
+
+def as_response(root, data):
+    """data as the endpoints serialize it"""
+    return json.loads(root.app.json.dumps(data))
+
+
+def assert_same(actual, expected, path="data"):
+    """Equal field by field; unrounded means may differ in the last bits"""
+
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected), path
+        for key in expected:
+            assert_same(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for index, (a, e) in enumerate(zip(actual, expected)):
+            assert_same(a, e, f"{path}[{index}]")
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-12, abs=1e-12), path
+    else:
+        assert actual == expected, path
+
+
+def test_analytics_match_the_pandas_computation(root, root_client, seeded):
+
+    response = root_client.get("/api/dashboard/analytics")
+
+    assert response.status_code == 200
+    assert_same(response.get_json()["data"], as_response(root, pandas_analytics(root, seeded)))
+
+
+def test_charts_match_the_pandas_computation(root, root_client, seeded):
+
+    response = root_client.get("/api/dashboard/charts")
+
+    assert response.status_code == 200
+    assert_same(response.get_json()["data"], as_response(root, pandas_charts(root, seeded)))
+
+
+def test_material_usage_keeps_the_value_counts_order(root, seeded):
+
+    expected = seeded["material_name"].value_counts()
+
+    with root.app.app_context():
+        counts = root.material_counts(root.dashboard_aggregates())
+
+    assert counts.index.tolist() == expected.index.tolist()
+    assert counts.tolist() == expected.tolist()
+
+
+def test_unlisted_material_counts_as_non_eco(root, seeded):
+
+    unlisted = int((seeded["material_name"] == "Unlisted Foam").sum())
+    assert unlisted
+
+    with root.app.app_context():
+        analytics = root.build_analytics_data(root.dashboard_aggregates())
+
+    distribution = analytics["eco_distribution"]
+    assert distribution["eco_friendly"] + distribution["non_eco_friendly"] == len(seeded) - unlisted
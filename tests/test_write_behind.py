@@ -0,0 +1,211 @@
+import json
+import logging
+
+import pytest
+
+from Backend.write_behind import WriteBehindLogger
+
+
+class Database:
+    """write_batch stand-in: rejects batches holding a "bad" row, or everything while down"""
+
+    def __init__(self):
+        self.rows = []
+        self.down = False
+        self.calls = 0
+
+    def write(self, batch):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("database unavailable")
+        if any(row.get("bad") for row in batch):
+            raise ValueError("bad row")
+        self.rows += batch
+
+
+def rows(*ids, bad=()):
+    return [{"id": i, "bad": i in bad} for i in ids]
+
+
+def entries(batch):
+    return [(row, 0) for row in batch]
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def database():
+    return Database()
+
+
+@pytest.fixture
+def writer(database, tmp_path):
+    logger = WriteBehindLogger(database.write, spill_path=str(tmp_path / "spill.jsonl"), max_attempts=3)
+    yield logger
+    logger.close()
+
+
+def test_bad_row_is_dead_lettered_and_good_rows_are_written(writer, database, tmp_path):
+
+    assert writer.flush_batch(entries(rows(1, 2, 3, 4, bad={2}))) is True
+
+    assert [row["id"] for row in database.rows] == [1, 3, 4]
+    assert read_lines(tmp_path / "spill.jsonl.dead") == rows(2, bad={2})
+    assert not (tmp_path / "spill.jsonl").exists()
+    assert writer.metrics()["dead_lettered"] == 1
+
+
+def test_outage_spills_rows_and_replay_writes_them(writer, database):
+
+    database.down = True
+    assert writer.flush_batch(entries(rows(1, 2, 3, 4, 5))) is False
+
+    database.down = False
+    writer.replay_spill()
+
+    assert sorted(row["id"] for row in database.rows) == [1, 2, 3, 4, 5]
+    assert writer.metrics()["dead_lettered"] == 0
+
+
+def test_outage_probes_a_few_rows_only(writer, database):
+
+    database.down = True
+    writer.flush_batch(entries(rows(*range(100))))
+
+    # the batch, then OUTAGE_PROBE_ROWS single rows
+    assert database.calls == 4
+    assert writer.metrics()["spilled"] == 100
+
+
+def test_replay_attempts_are_capped(writer, database, tmp_path):
+
+    database.down = True
+    writer.flush_batch(entries(rows(1, 2)))
+
+    for _ in range(10):
+        writer.replay_spill()
+
+    assert not (tmp_path / "spill.jsonl").exists()
+    assert read_lines(tmp_path / "spill.jsonl.dead") == rows(1, 2)
+    assert writer.metrics()["dead_lettered"] == 2
+
+
+def test_failed_replay_backs_off(writer, database):
+
+    database.down = True
+    writer.flush_batch(entries(rows(1)))
+    writer.replay_spill()
+
+    assert writer.next_replay_at > 0
+    assert writer.replay_failures == 1
+
+    database.down = False
+    writer.replay_spill()
+
+    assert writer.replay_failures == 0
+    assert [row["id"] for row in database.rows] == [1]
+
+
+def test_bad_rows_first_in_a_batch_do_not_hold_back_good_rows(writer, database, tmp_path):
+
+    # three failing rows in a row look like an outage at first
+    writer.flush_batch(entries(rows(1, 2, 3, 4, 5, bad={1, 2, 3})))
+    assert database.rows == []
+
+    writer.replay_spill()
+
+    assert [row["id"] for row in database.rows] == [4, 5]
+    assert [row["id"] for row in read_lines(tmp_path / "spill.jsonl.dead")] == [1, 2, 3]
+
+
+def test_rows_are_not_dropped_silently_without_a_spill_file(database, caplog):
+
+    writer = WriteBehindLogger(database.write)
+    database.down = True
+
+    with caplog.at_level(logging.ERROR, logger="Backend.write_behind"):
+        writer.flush_batch(entries(rows(1, 2)))
+
+    assert writer.metrics()["dead_lettered"] == 2
+    assert '"id": 1' in caplog.text and '"id": 2' in caplog.text
+
+
+def test_spill_files_with_bare_rows_are_replayed(writer, database, tmp_path):
+
+    with open(tmp_path / "spill.jsonl", "w", encoding="utf-8") as f:
+        for row in rows(1, 2):
+            f.write(json.dumps(row) + "\n")
+
+    writer.replay_spill()
+
+    assert [row["id"] for row in database.rows] == [1, 2]
+
+
+def test_submitted_rows_are_written_by_the_flusher(database):
+
+    writer = WriteBehindLogger(database.write, flush_interval=0.01)
+
+    assert writer.submit(rows(1, 2, 3)) is True
+    writer.close()
+
+    assert [row["id"] for row in database.rows] == [1, 2, 3]
+    assert writer.metrics()["written"] == 3
+
+
+# the Backend app's own writer on its SQLite database
+
+def queued_rows(backend, *materials):
+    results = [{
+        "material_name": material,
+        "predicted_cost": 2.0,
+        "predicted_co2": 1.0,
+        "suitability_score": 0.5
+    } for material in materials]
+
+    rows = backend.build_recommendation_rows("food", "high", "domestic", "high", results)
+
+    # as record_rows queues them
+    return [{**row, "created_at": row["created_at"].isoformat()} for row in rows]
+
+
+def saved_materials(backend, *materials):
+    with backend.app.app_context():
+        query = backend.Recommendation.query.filter(backend.Recommendation.material_name.in_(materials))
+        return sorted(row.material_name for row in query)
+
+
+def test_sqlite_rows_spilled_during_an_outage_are_replayed(backend, tmp_path):
+
+    outage = {"down": True}
+
+    def write(batch):
+        if outage["down"]:
+            raise ConnectionError("database unavailable")
+        backend.write_queued_rows(batch)
+
+    writer = WriteBehindLogger(write, spill_path=str(tmp_path / "spill.jsonl"))
+    materials = [f"Spilled {i}" for i in range(3)]
+
+    assert writer.flush_batch(entries(queued_rows(backend, *materials))) is False
+    assert saved_materials(backend, *materials) == []
+
+    outage["down"] = False
+    writer.replay_spill()
+
+    assert saved_materials(backend, *materials) == materials
+    assert not (tmp_path / "spill.jsonl").exists()
+
+
+def test_sqlite_bad_row_is_dead_lettered(backend, tmp_path):
+
+    writer = WriteBehindLogger(backend.write_queued_rows, spill_path=str(tmp_path / "spill.jsonl"))
+    good, bad = queued_rows(backend, "Written", "Dead lettered")
+    bad["created_at"] = "not a date"
+
+    assert writer.flush_batch(entries([good, bad])) is True
+
+    assert saved_materials(backend, "Written", "Dead lettered") == ["Written"]
+    assert [row["material_name"] for row in read_lines(tmp_path / "spill.jsonl.dead")] == ["Dead lettered"]